@@ -0,0 +1,272 @@
+"""
+file    : bot/api.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Local read-only HTTP API for dashboards on the farm LAN, served by
+    bot/httpserver.py on the bot's event loop.
+
+        GET /api                 list of the endpoints
+        GET /api/detections      recent detections, newest first (?limit=N&sensor=ID)
+        GET /api/sensors         last state reported by each sensor
+        GET /api/rollups         detections per sensor per hour (24 h) and per day (7 days)
+        GET /api/health          startup gates, internet, memory and command latency
+
+    Responses are JSON built from in-memory state that on_message keeps up
+    to date (`live`), never from SQLite: the rollups are read from the
+    database once at startup and counted in memory from then on. A built
+    response is reused for API_CACHE_SECONDS and carries an ETag, so a
+    dashboard polling with If-None-Match gets a bodiless 304 while nothing
+    changed. Enabled with API_PORT in single-process mode.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import asyncio, hashlib, json, logging, threading, time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from db.rollup import RollupStore, HOURLY_TABLE, DAILY_TABLE, HOUR_FORMAT, DAY_FORMAT
+from utility.readiness import readiness
+from utility import memory
+from .httpserver import HttpServer, Response
+from .connectivity import monitor
+from .concurrency import command_stats
+from .config import get_config
+
+log = logging.getLogger(__name__)
+
+HOURLY_WINDOW = 24  # Hourly buckets served by /api/rollups
+DAILY_WINDOW = 7  # Daily buckets served by /api/rollups
+
+# Most distinct responses (path and query) kept in the cache
+MAX_CACHED = 64
+
+JSON_TYPE = "application/json; charset=utf-8"
+
+
+class LiveState:
+    """What the API serves, updated from the MQTT thread and read on the event loop."""
+
+    def __init__(self, recent: int = 200):
+        """
+        Parameters:
+        recent (int): Detections kept for /api/detections.
+        """
+        self.detections = deque(maxlen=recent)  # (sensor_id, event time, alarm raised)
+        self.sensors = {}  # sensor_id -> state dict
+        self.hourly = {}  # (sensor_id, bucket) -> count
+        self.daily = {}
+        self.messages = 0
+        self.last_message = None
+        self.started_at = datetime.now()
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, events: list):
+        """Updates the sensor states with the parsed events of one MQTT message."""
+        with self._lock:
+            self.messages += 1
+            self.last_message = datetime.now()
+            for event in events:
+                sensor_id = str(event.sensor_id)
+                state = self.sensors.get(sensor_id)
+                if state is None:
+                    state = self.sensors[sensor_id] = {"events": 0, "motions": 0, "last_motion": None}
+                state["events"] += 1
+                state["last_seen"] = event.received_at
+                state["motion"] = event.motion
+                state["core"] = event.core
+                state["sensitivity"] = event.sensitivity
+                if event.motion:
+                    state["motions"] += 1
+                    state["last_motion"] = event.event_time()
+
+    def record(self, escalated: list, suppressed: list = ()):
+        """Adds the motion events of one message, split by the correlation rules."""
+        with self._lock:
+            for alarm, events in ((True, escalated), (False, suppressed)):
+                for event in events:
+                    sensor_id, when = str(event.sensor_id), event.event_time()
+                    self.detections.append((sensor_id, when, alarm))
+                    hour_key = (sensor_id, when.strftime(HOUR_FORMAT))
+                    day_key = (sensor_id, when.strftime(DAY_FORMAT))
+                    self.hourly[hour_key] = self.hourly.get(hour_key, 0) + 1
+                    self.daily[day_key] = self.daily.get(day_key, 0) + 1
+            if time.monotonic() >= self._next_prune:
+                self._prune()
+
+    def load_rollups(self, name_db: str):
+        """Seeds the in-memory rollups from the database; blocking, run once at startup."""
+        hour_since, day_since = self._since()
+        store = RollupStore(name_db)
+        hourly = store.buckets(HOURLY_TABLE, hour_since)
+        daily = store.buckets(DAILY_TABLE, day_since)
+        with self._lock:
+            # Hits recorded meanwhile may already be in the rows, keep the larger count
+            for counts, rows in ((self.hourly, hourly), (self.daily, daily)):
+                for sensor_id, bucket, count in rows:
+                    key = (str(sensor_id), bucket)
+                    counts[key] = max(counts.get(key, 0), count)
+        log.debug("API rollups loaded: %d hourly, %d daily buckets", len(hourly), len(daily))
+
+    @staticmethod
+    def _since():
+        now = datetime.now()
+        return ((now - timedelta(hours=HOURLY_WINDOW - 1)).strftime(HOUR_FORMAT),
+                (now - timedelta(days=DAILY_WINDOW - 1)).strftime(DAY_FORMAT))
+
+    def _prune(self):
+        """Drops the buckets that left the windows, so the counts stay small; call with the lock held."""
+        hour_since, day_since = self._since()
+        for counts, since in ((self.hourly, hour_since), (self.daily, day_since)):
+            for key in [key for key in counts if key[1] < since]:
+                del counts[key]
+        self._next_prune = time.monotonic() + 60
+
+    def recent(self, limit: int, sensor: str = None) -> list:
+        with self._lock:
+            detections = list(self.detections)
+        detections.reverse()
+        if sensor is not None:
+            detections = [item for item in detections if item[0] == sensor]
+        return [{"sensor_id": sensor_id, "time": when.isoformat(timespec="seconds"), "alarm": alarm}
+                for sensor_id, when, alarm in detections[:limit]]
+
+    def sensor_states(self) -> dict:
+        with self._lock:
+            sensors = {sensor_id: dict(state) for sensor_id, state in self.sensors.items()}
+        for state in sensors.values():
+            for key in ("last_seen", "last_motion"):
+                if state.get(key) is not None:
+                    state[key] = state[key].isoformat(timespec="seconds")
+        return dict(sorted(sensors.items()))
+
+    def rollups(self) -> dict:
+        with self._lock:
+            self._prune()
+            hourly, daily = dict(self.hourly), dict(self.daily)
+
+        result = {"hourly": {}, "daily": {}}
+        for name, counts in (("hourly", hourly), ("daily", daily)):
+            for (sensor_id, bucket), count in sorted(counts.items()):
+                result[name].setdefault(sensor_id, {})[bucket] = count
+        return result
+
+    def counters(self) -> dict:
+        with self._lock:
+            return {
+                "messages": self.messages,
+                "last_message": self.last_message.isoformat(timespec="seconds") if self.last_message else None,
+                "sensors": len(self.sensors),
+            }
+
+
+class DashboardApi:
+    """Serves the dashboard endpoints from cached snapshots of `live`."""
+
+    def __init__(self, state: LiveState, host: str = "127.0.0.1", port: int = 8090, ttl: float = 5):
+        """
+        Parameters:
+        state (LiveState): Source of the responses.
+        host (str), port (int): Address of the listener.
+        ttl (float): Seconds a built response is served before it is built again.
+        """
+        self.state = state
+        self.ttl = ttl
+        self.server = HttpServer(self.handle, host=host, port=port)
+        self._cache = OrderedDict()  # (path, query) -> (expires, etag, body)
+        self.routes = {
+            "/api": self.index,
+            "/api/detections": self.detections,
+            "/api/sensors": lambda query: self.state.sensor_states(),
+            "/api/rollups": lambda query: self.state.rollups(),
+            "/api/health": self.health,
+        }
+
+    async def start(self):
+        """Seeds the rollups and starts listening, raises OSError if the address cannot be bound."""
+        try:
+            await asyncio.to_thread(self.state.load_rollups, get_config().DATABASE_NAME)
+        except Exception as e:
+            log.warning("API rollups start empty, could not read the database: %s", e)
+        await self.server.start()
+
+    async def stop(self):
+        await self.server.stop()
+
+    def index(self, query: dict):
+        return {"endpoints": sorted(self.routes)}
+
+    def detections(self, query: dict):
+        limit = self.state.detections.maxlen
+        if "limit" in query:
+            limit = max(1, min(int(query["limit"]), limit))
+        return self.state.recent(limit, query.get("sensor"))
+
+    def health(self, query: dict):
+        subsystems = {name: {"state": state, "ready_after": ready_after, "error": error}
+                      for name, state, ready_after, error in readiness.report()}
+        return {
+            "status": "ok" if readiness.all_ready() else "degraded",
+            "started_at": self.state.started_at.isoformat(timespec="seconds"),
+            "subsystems": subsystems,
+            "internet": monitor.online,
+            "rss_kib": memory.rss_kib(),
+            "mqtt": self.state.counters(),
+            "commands": command_stats.snapshot(),
+            "commands_running_after_timeout": command_stats.stray,
+        }
+
+    def _snapshot(self, route, path: str, query: dict):
+        """Returns (etag, body) of a response, building it at most once per ttl."""
+        key = (path, tuple(sorted(query.items())))
+        now = time.monotonic()
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] > now:
+            return cached[1], cached[2]
+
+        body = json.dumps(route(query), separators=(",", ":"), default=str).encode("utf-8")
+        etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        self._cache[key] = (now + self.ttl, etag, body)
+        self._cache.move_to_end(key)
+        while len(self._cache) > MAX_CACHED:
+            self._cache.popitem(last=False)
+        return etag, body
+
+    async def handle(self, request):
+        path = request.path.rstrip("/") or "/api"
+        route = self.routes.get(path)
+        if route is None:
+            return Response(404, b"Not Found")
+        if request.method != "GET":
+            return Response(405, b"Method Not Allowed", headers={"Allow": "GET"})
+
+        query = {key: request.query[key] for key in ("limit", "sensor") if key in request.query}
+        try:
+            etag, body = self._snapshot(route, path, query)
+        except ValueError:
+            return Response(400, b"Bad Request")
+
+        headers = {"ETag": etag, "Cache-Control": f"max-age={self.ttl:g}"}
+        match = request.headers.get("if-none-match", "")
+        if match.strip() == "*" or etag in (tag.strip().removeprefix("W/") for tag in match.split(",")):
+            return Response(304, b"", headers=headers)
+        return Response(200, body, content_type=JSON_TYPE, headers=headers)
+
+
+# Process-wide state fed by main.on_message
+live = LiveState(get_config().API_RECENT_DETECTIONS)
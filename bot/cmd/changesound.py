@@ -28,10 +28,11 @@ Copyright:
     along with this program. If not, see <https://www.gnu.org/licenses/>
 """
 
-import os, time, shutil
+import os, time, shutil, logging
 from telegram import Update
 from telegram.ext import CallbackContext
-from ..config import Config
+
+log = logging.getLogger(__name__)
 
 class changesound:
     """Handles the /changesound command for replacing alarm sound file."""
@@ -44,19 +45,15 @@ class changesound:
             handle_audio(update: Update, context: CallbackContext): Handles incoming audio/doc file.
     """
     
+    descriptions = {"id": "Mengganti file suara alarm"}
+    
     waiting_chats = set()
     accepted_formats = ('.wav', '.mp3', '.ogg', '.flac')
     
-    def __init__(self):
-        botconfig = Config()
-        self.table_name_chatID = botconfig.__dict__()["TABLE_NAME_CHATID"]
-    
-    
-    @staticmethod
-    async def command(update: Update, context: CallbackContext):
+    async def command(self, update: Update, context: CallbackContext):
         """Starts the sound change process by prompting user for file."""
         chat_id = update.message.chat_id
-        changesound.waiting_chats.add(chat_id)
+        self.waiting_chats.add(chat_id)
         await update.message.reply_text("Please send a sound file (.wav, .mp3, .ogg, or .flac) to replace the alarm.")
         
     @staticmethod    
@@ -66,16 +63,15 @@ class changesound:
                 os.remove(file_path)
                 return True
             except PermissionError:
-                print(f"[Retry {i+1}] File sedang digunakan. Menunggu...")
+                log.warning("[Retry %d] File sedang digunakan. Menunggu...", i + 1)
                 time.sleep(1)
-        print("Failed: Permission denied")
+        log.error("Failed: Permission denied")
         return False
         
-    @staticmethod
-    async def handle_audio(update: Update, context: CallbackContext):
+    async def handle_audio(self, update: Update, context: CallbackContext):
         """Receives and replaces the alarm sound file if valid format is sent."""
         chat_id = update.message.chat_id
-        if chat_id not in changesound.waiting_chats:
+        if chat_id not in self.waiting_chats:
             return # Ignore if not in waiting state
         
         audio = update.message.audio or update.message.document
@@ -83,7 +79,7 @@ class changesound:
             return
         
         file_name = audio.file_name
-        if not file_name.lower().endswith(changesound.accepted_formats):
+        if not file_name.lower().endswith(self.accepted_formats):
             await update.message.reply_text("Formats not supported. Please send .wav, .mp3, .ogg, or .flac files")
             return
         
@@ -101,5 +97,5 @@ class changesound:
             await update.message.reply_text(f"Failed to download sound: {e}")
             return
             
-        changesound.waiting_chats.remove(chat_id)
+        self.waiting_chats.remove(chat_id)
         await update.message.reply_text("🎵 Alarm sound changed successfully!")
\ No newline at end of file
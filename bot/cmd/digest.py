@@ -0,0 +1,70 @@
+"""
+file    : bot/cmd/digest.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Handles the /digest command, which turns the digest mode of the
+    current chat on or off:
+
+        /digest          show the current setting
+        /digest 15       first alert at once, then one summary per 15 minutes
+        /digest off      every alert as it happens
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+from telegram import Update
+from telegram.ext import CallbackContext
+from ..digest import digests, MIN_MINUTES, MAX_MINUTES
+from ..federation import replicate
+
+class digest:
+    """Sets the notification digest interval of this chat."""
+    
+    descriptions = {"id": "Mengatur ringkasan notifikasi untuk chat ini"}
+    
+    async def command(self, update: Update, context: CallbackContext):
+        chat_id = update.effective_chat.id
+        
+        if not context.args:
+            if not digests.loaded:
+                await digests.load()
+            minutes = digests.interval(chat_id)
+            if minutes:
+                text = f"📬 Digest mode is on: first alert at once, then one summary every {minutes} min."
+            else:
+                text = "📨 Digest mode is off: every alert is sent as it happens."
+            await update.message.reply_text(text + "\nUsage: /digest <minutes|off>")
+            return
+        
+        arg = context.args[0].lower()
+        if arg in ("off", "0"):
+            await digests.set_interval(chat_id, None)
+            await replicate(chat_id)
+            await digests.flush(chat_id)
+            await update.message.reply_text("📨 Digest mode turned off, every alert is sent as it happens.")
+            return
+        
+        try:
+            await digests.set_interval(chat_id, int(arg))
+        except ValueError:
+            await update.message.reply_text(f"⚠️ Usage: /digest <{MIN_MINUTES}-{MAX_MINUTES} minutes|off>")
+            return
+        await replicate(chat_id)
+        await update.message.reply_text(
+            f"📬 Digest mode is on: first alert at once, then one summary every {int(arg)} min."
+        )
@@ -30,8 +30,8 @@ Copyright:
 
 from telegram import Update
 from telegram.ext import CallbackContext
-from db import DBConnect
-from ..config import Config
+from ..config import get_config, get_async_db
+from ..federation import replicate
 
 class disablesendmsg:
     """Handles the /disablesendmsg command to stop the bot from sending automatic messages.
@@ -43,35 +43,41 @@ class disablesendmsg:
     - DATABASE_NAME: The name of the database to connect to.
     - TABLE_NAME_CHATID: The name of the table in which chat IDs are stored.
 
+    A single instance is created by the command registry and reused for every 
+    update; the attributes below always reflect the current configuration.
+
     Attributes:
-        db_name (str): The name of the database to connect to.
         table_name_chatID (str): The name of the table for storing chat IDs.
-        db (DBConnect): The database connection object used to interact with the database.
+        db (AsyncDB): The shared database used to interact with the database.
 
     Methods:
         remove_chatID(chat_id: str): Removes the given chat ID from the specified table.
         command(update: Update, context: CallbackContext): Handles the /disablesendmsg command 
             and removes the chat ID from the database.
     """
+    
+    descriptions = {"id": "Menghentikan pesan otomatis untuk chat ini"}
 
-    def __init__(self):
-        """Initializes the Disable class and loads environment variables."""
-        botconfig = Config()
-        self.table_name_chatID = botconfig.__dict__()["TABLE_NAME_CHATID"]
-        self.db_name = botconfig.__dict__()["DATABASE_NAME"]
-        
-        self.db = DBConnect(self.db_name)
+    @property
+    def table_name_chatID(self):
+        """The name of the table for storing chat IDs."""
+        return get_config().TABLE_NAME_CHATID
+
+    @property
+    def db(self):
+        """The shared database, awaitable and run off the event loop."""
+        return get_async_db()
 
-    def remove_chatID(self, chat_id: str):
+    async def remove_chatID(self, chat_id: str):
         """Removes the specified chat ID from the database.
         
         Args:
             chat_id (str): The chat ID to be removed from the database.
         """
-        self.db.remove_chatID(table_name=self.table_name_chatID, chat_id=chat_id)
+        await self.db.remove_chatID(table_name=self.table_name_chatID, chat_id=chat_id)
+        await replicate(chat_id)
 
-    @staticmethod
-    async def command(update: Update, context: CallbackContext):
+    async def command(self, update: Update, context: CallbackContext):
         """Handles the /disablesendmsg command to disable automatic message sending.
         
         This method removes the chat ID of the user from the database, 
@@ -83,7 +89,6 @@ class disablesendmsg:
             context (CallbackContext): The context object that contains 
                                        data related to the callback.
         """
-        remove_id = disablesendmsg()
         chat_id = update.message.chat_id
-        remove_id.remove_chatID(chat_id=chat_id)
+        await self.remove_chatID(chat_id=chat_id)
         await context.bot.send_message(chat_id=chat_id, text="🚫 Automatic message sending has been disabled for this chat.")
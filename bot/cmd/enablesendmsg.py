@@ -30,8 +30,8 @@ Copyright:
 
 from telegram import Update
 from telegram.ext import CallbackContext
-from db import DBConnect
-from ..config import Config
+from ..config import get_config, get_async_db
+from ..federation import replicate
 
 class enablesendmsg:
     """Handles the /enablesendmsg command to allow automatic message sending.
@@ -43,10 +43,12 @@ class enablesendmsg:
     - DATABASE_NAME: The name of the database to connect to.
     - TABLE_NAME_CHATID: The name of the table in which chat IDs are stored.
 
+    A single instance is created by the command registry and reused for every 
+    update; the attributes below always reflect the current configuration.
+
     Attributes:
-        db_name (str): The name of the database to connect to.
         table_name_chatID (str): The name of the table for storing chat IDs.
-        db (DBConnect): The database connection object used to interact with the database.
+        db (AsyncDB): The shared database used to interact with the database.
 
     Methods:
         store_chatID(chat_id: str): Stores the given chat ID in the specified table.
@@ -54,24 +56,28 @@ class enablesendmsg:
             and stores the chat ID in the database.
     """
     
-    def __init__(self):
-        """Initializes the Enable class and loads environment variables."""
-        botconfig = Config()
-        self.table_name_chatID = botconfig.__dict__()["TABLE_NAME_CHATID"]
-        self.db_name = botconfig.__dict__()["DATABASE_NAME"]
-        
-        self.db = DBConnect(self.db_name)
+    descriptions = {"id": "Mengaktifkan pesan otomatis untuk chat ini"}
+    
+    @property
+    def table_name_chatID(self):
+        """The name of the table for storing chat IDs."""
+        return get_config().TABLE_NAME_CHATID
+
+    @property
+    def db(self):
+        """The shared database, awaitable and run off the event loop."""
+        return get_async_db()
 
-    def store_chatID(self, chat_id: str):
+    async def store_chatID(self, chat_id: str):
         """Stores the specified chat ID in the database.
         
         Args:
             chat_id (str): The chat ID to be stored in the database.
         """
-        self.db.store_chatID(table_name=self.table_name_chatID, chat_id=chat_id)
+        await self.db.store_chatID(table_name=self.table_name_chatID, chat_id=chat_id)
+        await replicate(chat_id)
 
-    @staticmethod
-    async def command(update: Update, context: CallbackContext):
+    async def command(self, update: Update, context: CallbackContext):
         """Handles the /enablesendmsg command to enable automatic message sending.
         
         This method adds the chat ID of the user to the database, 
@@ -83,7 +89,6 @@ class enablesendmsg:
             context (CallbackContext): The context object that contains 
                                        data related to the callback.
         """
-        save_id = enablesendmsg()
         chat_id = update.message.chat_id
-        save_id.store_chatID(chat_id=chat_id)
+        await self.store_chatID(chat_id=chat_id)
         await context.bot.send_message(chat_id=chat_id, text="✅ Automatic message sending has been enabled for this chat.")
@@ -0,0 +1,125 @@
+"""
+file    : bot/cmd/export.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Handles the /export command, which sends the sensor log as a document
+    so it can be taken off the box without copying the SQLite file.
+
+    Usage: /export [from] [to] [sensor=N] [format=csv|parquet]
+    Dates are YYYY-MM-DD and inclusive. The log is streamed in chunks into
+    a gzip-compressed CSV file (or Parquet when pyarrow is installed) in a
+    temporary directory, in a worker thread so the bot keeps answering.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import os, tempfile
+from datetime import date, datetime
+from telegram import Update
+from telegram.ext import CallbackContext
+from db.export import iter_logs, write_csv_gz, write_parquet, parquet_available
+from ..config import get_config
+
+# Bots may upload documents up to 50 MB
+MAX_UPLOAD = 50 * 1024 * 1024
+
+class export:
+    """Sends the sensor log as a compressed CSV file, e.g. /export 2025-01-01 2025-01-31 sensor=2"""
+    
+    descriptions = {"id": "Mengirim log sensor sebagai file CSV terkompresi"}
+    blocking = ("write_export",)
+    timeout = 600  # A year of logs on an SD card
+    
+    @staticmethod
+    def parse_args(args: list):
+        """Parses the /export arguments.
+        
+        Returns:
+            dict: start, end, sensor and format.
+        
+        Raises:
+            ValueError: If a date or option is invalid.
+        """
+        options = {"start": None, "end": None, "sensor": None, "format": "csv"}
+        dates = []
+        for arg in args:
+            key, sep, value = arg.partition("=")
+            if sep and key.lower() == "sensor":
+                options["sensor"] = value
+            elif sep and key.lower() == "format":
+                if value.lower() not in ("csv", "parquet"):
+                    raise ValueError(f"Unknown format: {value}")
+                options["format"] = value.lower()
+            else:
+                dates.append(date.fromisoformat(arg).isoformat())
+        
+        if len(dates) > 2:
+            raise ValueError("At most two dates can be given")
+        if dates:
+            options["start"] = dates[0]
+            options["end"] = dates[1] if len(dates) > 1 else None
+        return options
+    
+    @staticmethod
+    def write_export(directory: str, options: dict):
+        """Writes the export file and returns (path, row count)."""
+        config = get_config()
+        chunks = iter_logs(
+            config.DATABASE_NAME, config.TABLE_NAME,
+            start=options["start"], end=options["end"], sensor=options["sensor"]
+        )
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        if options["format"] == "parquet":
+            path = os.path.join(directory, f"{config.TABLE_NAME}_{stamp}.parquet")
+            return path, write_parquet(chunks, path)
+        
+        path = os.path.join(directory, f"{config.TABLE_NAME}_{stamp}.csv.gz")
+        return path, write_csv_gz(chunks, path)
+    
+    async def command(self, update: Update, context: CallbackContext):
+        """Handles the /export command."""
+        try:
+            options = self.parse_args(context.args or [])
+        except ValueError as e:
+            await update.message.reply_text(f"⚠️ {e}\nUsage: /export [from] [to] [sensor=N] [format=csv|parquet]")
+            return
+        
+        if options["format"] == "parquet" and not parquet_available():
+            await update.message.reply_text("Parquet is not available on this box, sending CSV instead.")
+            options["format"] = "csv"
+        
+        with tempfile.TemporaryDirectory() as directory:
+            try:
+                path, rows = await self.write_export(directory, options)
+            except Exception as e:
+                await update.message.reply_text(f"⚠️ Export failed: {e}")
+                return
+            
+            if rows == 0:
+                await update.message.reply_text("No log rows match the filters.")
+                return
+            if os.path.getsize(path) > MAX_UPLOAD:
+                await update.message.reply_text("⚠️ Export is larger than 50 MB, please narrow the date range.")
+                return
+            
+            with open(path, "rb") as document:
+                await update.message.reply_document(
+                    document=document, filename=os.path.basename(path),
+                    caption=f"📄 {rows} log rows exported"
+                )
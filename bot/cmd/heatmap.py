@@ -0,0 +1,100 @@
+"""
+file    : bot/cmd/heatmap.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Handles the /heatmap command. It shows when monkeys raid: a day-of-week
+    x hour-of-day heatmap of the detections, the busiest time windows and
+    the week-over-week trend, as text and as a PNG image.
+
+    Usage: /heatmap [sensor|all] [days], by default all sensors over the
+    last 365 days.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import html, io, calendar
+from datetime import datetime
+from telegram import Update
+from telegram.ext import CallbackContext
+from utility import analytics
+from ..config import get_config
+from ..concurrency import executor
+
+class heatmap:
+    """Shows when monkeys raid, as an hour x weekday heatmap."""
+    
+    descriptions = {"id": "Menampilkan pola jam dan hari serangan monyet"}
+    cpu_bound = ("analyse",)  # numpy over up to a year of detections
+    
+    def analyse(self, sensor=None, days: int = 365):
+        """Runs the activity analysis.
+        
+        Returns:
+            dict: heatmap, peaks, trend and total, or None if there are no detections.
+        """
+        config = get_config()
+        # Log times are local wall-clock times, handled as UTC epoch seconds
+        now = calendar.timegm(datetime.now().timetuple())
+        timestamps, counts = analytics.load_detections(
+            config.DATABASE_NAME, config.TABLE_NAME, sensor=sensor, since=now - days * 86400
+        )
+        if not len(timestamps):
+            return None
+        
+        grid = analytics.activity_heatmap(timestamps, counts)
+        return {
+            "heatmap": grid,
+            "peaks": analytics.peak_windows(grid),
+            "trend": analytics.weekly_trend(timestamps, now, counts),
+            "total": int(counts.sum()),
+        }
+    
+    async def command(self, update: Update, context: CallbackContext):
+        """Handles the /heatmap command."""
+        args = context.args or []
+        sensor = args[0] if args and args[0].lower() != "all" else None
+        try:
+            days = int(args[1]) if len(args) > 1 else 365
+        except ValueError:
+            await update.message.reply_text("Usage: /heatmap [sensor|all] [days]")
+            return
+        
+        result = await self.analyse(sensor=sensor, days=days)
+        label = f"sensor {sensor}" if sensor else "all sensors"
+        if result is None:
+            await update.message.reply_text(f"No detections for {label} in the last {days} days.")
+            return
+        
+        text = f"<b>Activity of {html.escape(label)}, last {days} days ({result['total']} detections)</b>\n"
+        text += f"<pre>{analytics.render_text(result['heatmap'])}</pre>\n"
+        
+        if result["peaks"]:
+            text += "<b>Peak windows</b>\n"
+            for weekday, hour, count in result["peaks"]:
+                text += f"{analytics.DAYS[weekday]} {hour:02d}:00-{(hour + 2) % 24:02d}:00 ({count})\n"
+        
+        trend = result["trend"]
+        text += f"\n<b>Last 4 weeks</b>: {', '.join(str(count) for count in trend['counts'][-4:])}"
+        if trend["change"] is not None:
+            text += f" ({trend['change']:+.0f}% week over week)"
+        
+        await update.message.reply_text(text, parse_mode='HTML')
+        
+        image = io.BytesIO(await executor.run_cpu(analytics.render_png, result["heatmap"]))
+        image.name = "heatmap.png"
+        await update.message.reply_photo(photo=image, caption="Rows: Mon-Sun, columns: 00-23 h")
@@ -4,8 +4,8 @@ version : 1.0.0
 author  : basyair7
 date    : 2025
 description:
-    This module handles the /help command for the Telegram bot. It dynamically scans the "bot/cmd" directory for available command modules, imports them, and generates a list of available commands with their descriptions.
-    The descriptions are derived from the __doc__ string of the respective command classes.
+    This module handles the /help command for the Telegram bot. It reads the command manifest built from the "bot/cmd" directory and generates a list of available commands with their descriptions.
+    The descriptions are derived from the __doc__ string of the respective command classes, without importing their modules.
     
     This file ensures that when a user types /help in the bot, they receive a list of available commands and a brief description of each, with the descriptions being pulled dynamically from the classes defined in the command modules.
 
@@ -25,50 +25,34 @@ Copyright:
     along with this program. If not, see <https://www.gnu.org/licenses/>
 """
 
-import os, importlib, inspect
 from telegram import Update
 from telegram.ext import CallbackContext
+from ..registry import registry
 
 class help:
     """Handles the /help command and provides a list of available commands.
     
     This class is responsible for sending the list of available commands to the user when they type /help. 
-    It dynamically loads other command modules from the 'bot/cmd' directory, 
-    extracts the description from each module's class docstring, 
+    It reads the command manifest of the 'bot/cmd' directory, which holds the 
+    description from each module's class docstring, 
     and presents the user with a list of available commands and brief descriptions.
 
     Methods:
         command(update: Update, context: CallbackContext): 
-            Handles the /help command, dynamically loads all available commands, 
+            Handles the /help command, reads all available commands from the manifest, 
             and sends a list of commands with their descriptions to the user.
     """
     
+    descriptions = {"id": "Menampilkan daftar perintah yang tersedia"}
+    
     @staticmethod
     async def command(update: Update, context: CallbackContext):
         """Handles the /help command."""
         help_text = "Available commands:\n"
 
-        # Scan files in the bot/cmd folder and try to load them dynamically
-        cmd_folder = "bot/cmd"
-        for filename in os.listdir(cmd_folder):
-            if filename.endswith(".py"):
-                module_name = f"bot.cmd.{filename[:-3]}"  # Remove .py extension
-                try:
-                    # Dynamically import the module
-                    module = importlib.import_module(module_name)
-                    
-                    # Try to find the class within the module
-                    for name, obj in inspect.getmembers(module):
-                        if inspect.isclass(obj) and hasattr(obj, 'command'):
-                            command_class = obj
-                            command_name = name.lower()
-                            # Get the __doc__ for the command class
-                            doc = getattr(command_class, "__doc__", "No documentation available")
-                            # Use only the first line of the docstring
-                            doc_line = doc.splitlines()[0] if doc else "No description"
-                            help_text += f"/{command_name} - {doc_line}\n"
-                except Exception as e:
-                    print(f"Failed to load module {module_name}: {e}")
+        # Read the available commands from the cached manifest
+        for command_name, entry in registry.manifest().items():
+            help_text += f"/{command_name} - {entry['description']}\n"
 
         # Send the help message with proper HTML escape
         help_text = help_text.replace("<", "&lt;").replace(">", "&gt;")  # Escape angle brackets to avoid HTML parsing issues
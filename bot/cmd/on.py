@@ -30,10 +30,15 @@ from utility.sound_control import sound_control
 
 class on:
     """Handles the /on command to enable sound playback."""
-    @staticmethod
-    async def command(update: Update, context: CallbackContext):
-        # Create an instance of sound_control
-        sound_ctrl = sound_control()
+    
+    descriptions = {"id": "Menyalakan suara alarm"}
+    
+    def __init__(self):
+        # Shared sound_control instance, created once with the handler
+        self.sound_ctrl = sound_control()
+    
+    async def command(self, update: Update, context: CallbackContext):
+        sound_ctrl = self.sound_ctrl
         # Get the chat ID from the update
         chat_id = update.message.chat_id
         
@@ -0,0 +1,80 @@
+"""
+file    : bot/cmd/profile.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Handles the /profile command, which profiles the running program for a
+    while and replies with the report as a text file (see
+    utility/profiler.py). Only the chats and users listed in ADMIN_CHAT_IDS
+    may use it.
+
+        /profile         profile for 30 seconds
+        /profile 120     profile for 120 seconds
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import asyncio, io, logging
+from datetime import datetime
+from telegram import Update
+from telegram.ext import CallbackContext
+from utility.profiler import profiler, MIN_SECONDS, MAX_SECONDS
+from ..config import get_config
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SECONDS = 30
+
+class profile:
+    """Profiles the bot for a while and sends the report (admins only)."""
+
+    scopes = ("all_private_chats",)
+    descriptions = {"id": "Memprofilkan program dan mengirim laporannya (khusus admin)"}
+    timeout = MAX_SECONDS + 60  # Longer than the longest profile
+
+    async def command(self, update: Update, context: CallbackContext):
+        user_id = update.effective_user.id if update.effective_user else None
+        if not get_config().is_admin(update.effective_chat.id, user_id):
+            log.warning("/profile refused for chat %s", update.effective_chat.id)
+            await update.message.reply_text("⛔ This command is only available to administrators.")
+            return
+
+        try:
+            seconds = int(context.args[0]) if context.args else DEFAULT_SECONDS
+            if not MIN_SECONDS <= seconds <= MAX_SECONDS:
+                raise ValueError
+        except ValueError:
+            await update.message.reply_text(f"⚠️ Usage: /profile [{MIN_SECONDS}-{MAX_SECONDS} seconds]")
+            return
+
+        if profiler.busy:
+            await update.message.reply_text("⏳ A profile is already running, try again when it is done.")
+            return
+
+        await update.message.reply_text(f"🔬 Profiling for {seconds} s...")
+        try:
+            # Sampled from a worker thread, the event loop keeps serving updates meanwhile
+            report = await asyncio.to_thread(profiler.profile, seconds)
+        except RuntimeError as e:
+            await update.message.reply_text(f"⏳ {e}")
+            return
+
+        document = io.BytesIO(report.encode("utf-8"))
+        await update.message.reply_document(
+            document=document, filename=f"profile_{datetime.now():%Y%m%d_%H%M%S}.txt",
+            caption=f"🔬 Profile of {seconds} s"
+        )
@@ -0,0 +1,42 @@
+"""
+file    : bot/cmd/reload.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Handles the /reload command, which re-reads the .env file and replaces
+    the process-wide configuration without restarting the bot. Sending
+    SIGHUP to the process does the same.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+from telegram import Update
+from telegram.ext import CallbackContext
+from ..config import reload_config
+
+class reload:
+    """Reloads the bot configuration from the .env file."""
+    
+    descriptions = {"id": "Memuat ulang konfigurasi dari file .env"}
+    
+    async def command(self, update: Update, context: CallbackContext):
+        try:
+            reload_config()
+            text = "🔄 Configuration reloaded."
+        except ValueError as e:
+            text = f"⚠️ Configuration not reloaded: {e}"
+        await update.message.reply_text(text)
@@ -4,8 +4,15 @@ version : 1.0.0
 author  : basyair7
 date    : 2025
 description:
-    This module to handle setting bot commands dynamically by scanning the 'cmd' directory
-    for available command modules and registering them with the Telegram Bot API.
+    This module to handle setting bot commands dynamically by reading the command manifest
+    of the 'cmd' directory and registering the commands with the Telegram Bot API.
+
+    Command classes may declare the class attributes `scopes` (a tuple of scope
+    names from SCOPES, default ("default",)) and `descriptions` (a dict of
+    language code -> description). One command list is pushed per scope and
+    language through the bot's own async client, and only when the hash of the
+    computed command sets differs from the last successful push. The bot runs
+    the sync once at startup.
 
 Copyright:
     Copyright (C) 2025, basyair7
@@ -23,87 +30,149 @@ Copyright:
     along with this program. If not, see <https://www.gnu.org/licenses/>
 """
 
-import requests, os, importlib, inspect
-from ..config import Config  # Importing bot configuration
-from telegram import Update
+import hashlib, json, logging, os
+from telegram import Update, BotCommand, BotCommandScopeDefault, BotCommandScopeAllPrivateChats, \
+    BotCommandScopeAllGroupChats, BotCommandScopeAllChatAdministrators
 from telegram.ext import CallbackContext
+from ..registry import registry
+
+log = logging.getLogger(__name__)
+
+# Scope names usable in a command class `scopes` attribute
+SCOPES = {
+    "default": BotCommandScopeDefault,
+    "all_private_chats": BotCommandScopeAllPrivateChats,
+    "all_group_chats": BotCommandScopeAllGroupChats,
+    "all_chat_administrators": BotCommandScopeAllChatAdministrators,
+}
+
+# Where the hash of the last pushed command sets is kept
+STATE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".cmd_pushed.json")
 
 class setcommands:
-    def __init__(self):
+    """Publishes the bot command list to Telegram, use "/setcommands force" to push again."""
+    
+    scopes = ("all_private_chats", "all_chat_administrators")
+    descriptions = {"id": "Mengirim daftar perintah bot ke Telegram"}
+
+    @staticmethod
+    def create_command_sets(manifest: dict = None):
         """
-        Initializes the Setcmd class.
-        - Loads the bot token from the Config class.
-        - Sets the API endpoint for setting commands.
-        - Defines the directory path where command modules are stored.
+        Builds the command list of every scope and language from the command manifest,
+        without importing the command modules.
+        
+        A command declared for the "default" scope also appears in every more specific 
+        scope list, since Telegram shows a user only the most specific list that exists. 
+        Language lists fall back to the default description of untranslated commands.
+        
+        Returns:
+            dict: (scope, language_code) -> list of (command, description), with 
+                  language_code "" for the list without a language.
         """
-        botconfig = Config()
-        self.token = botconfig.__dict__()["TOKEN"]  # Retrieve the bot token from Config
-        self.api_url = f"https://api.telegram.org/bot{self.token}/setMyCommands"  # API URL for setting commands
-        self.command_dir = os.path.join(os.path.dirname(__file__), 'cmd')  # Path to command directory
+        manifest = registry.manifest() if manifest is None else manifest
+        scope_names = {"default"}
+        languages = {""}
+        for entry in manifest.values():
+            scope_names.update(scope for scope in entry.get("scopes", ()) if scope in SCOPES)
+            languages.update(entry.get("descriptions", {}))
+
+        command_sets = {}
+        for scope in sorted(scope_names):
+            for language in sorted(languages):
+                commands = []
+                for name, entry in manifest.items():
+                    entry_scopes = entry.get("scopes") or ["default"]
+                    if scope not in entry_scopes and "default" not in entry_scopes:
+                        continue
+                    description = entry.get("descriptions", {}).get(language, entry["description"])
+                    commands.append((name, description[:256]))
+                if commands:
+                    command_sets[(scope, language)] = commands
+        return command_sets
+
+    @staticmethod
+    def hash_command_sets(command_sets: dict):
+        """Returns a stable hash of the computed command sets."""
+        data = sorted([list(key), commands] for key, commands in command_sets.items())
+        return hashlib.sha256(json.dumps(data).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _load_state():
+        try:
+            with open(STATE_PATH, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _save_state(state: dict):
+        try:
+            with open(STATE_PATH, "w") as file:
+                json.dump(state, file)
+        except OSError as e:
+            log.warning("Could not save command state: %s", e)
 
-    def create_commands_payload(self):
+    @staticmethod
+    async def sync(bot, force: bool = False):
         """
-        Scans the 'cmd' directory for available command modules, dynamically loads them,
-        and extracts command names and descriptions.
+        Pushes the command sets with `bot.set_my_commands` if they changed since the last push.
         
+        Lists of scopes or languages that are no longer declared are deleted.
+
+        Args:
+            bot (telegram.Bot): An initialized bot.
+            force (bool): Push even if the hash did not change.
+
         Returns:
-            dict: A payload containing a list of bot commands in the required API format.
+            bool: True if the command sets were pushed, False if already up to date.
         """
-        commands = []  # List to store command information
-        
-        cmd_folder = "bot/cmd"  # Define the path to the command folder
-        for filename in os.listdir(cmd_folder):
-            if filename.endswith(".py"):  # Only process Python files
-                module_name = f"bot.cmd.{filename[:-3]}"  # Remove the ".py" extension from the filename
-                try:
-                    # Dynamically import the module
-                    module = importlib.import_module(module_name)
-
-                    # Iterate over members of the module to find classes with a 'command' attribute
-                    for name, obj in inspect.getmembers(module):
-                        if inspect.isclass(obj) and hasattr(obj, 'command'):
-                            command_class = obj  # Retrieve the class
-                            command_name = name.lower()  # Convert class name to lowercase as the command name
-                            
-                            # Get the documentation string (__doc__) for the command class
-                            doc = getattr(command_class, "__doc__", "No documentation available")
-                            doc_line = doc.splitlines()[0] if doc else "No description"  # Extract the first line of docstring
-
-                            # Append the command to the list in Telegram API format
-                            commands.append({'command': command_name, 'description': doc_line})
-
-                except Exception as e:
-                    print(f"Failed to load module {module_name}: {e}")  # Print error if module fails to load
-
-        return {'commands': commands}  # Return the command payload
+        command_sets = setcommands.create_command_sets()
+        digest = setcommands.hash_command_sets(command_sets)
+        state = setcommands._load_state()
+
+        if not force and state.get("bot_id") == bot.id and state.get("hash") == digest:
+            return False
+
+        for (scope, language), commands in command_sets.items():
+            await bot.set_my_commands(
+                [BotCommand(name, description) for name, description in commands],
+                scope=SCOPES[scope](),
+                language_code=language or None,
+            )
+
+        # Remove lists pushed previously that are no longer declared
+        for scope, language in state.get("keys", []) if state.get("bot_id") == bot.id else []:
+            if (scope, language) not in command_sets and scope in SCOPES:
+                await bot.delete_my_commands(scope=SCOPES[scope](), language_code=language or None)
+
+        setcommands._save_state({
+            "bot_id": bot.id,
+            "hash": digest,
+            "keys": [list(key) for key in command_sets],
+        })
+        return True
 
     @staticmethod
     async def command(update: Update, context: CallbackContext):
         """
         Handles the '/setcommands' command from a Telegram chat.
-        - Loads available commands.
-        - Sends a request to the Telegram API to update the bot's command list.
+        - Computes the command sets from the manifest.
+        - Pushes them with the bot's async client if they changed, or always with "force".
         - Responds to the user with the result.
 
         Args:
             update (Update): The Telegram update object containing user message data.
             context (CallbackContext): The Telegram callback context object.
         """
-        setCmd = setcommands()  # Initialize Setcmd instance
-        payload = setCmd.create_commands_payload()  # Create payload for setting commands
-
-        # Send a POST request to the Telegram API with the commands
-        response = requests.post(setCmd.api_url, json=payload)
+        force = bool(context.args) and context.args[0].lower() == "force"
 
-        # Process API response
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('ok'):
+        try:
+            if await setcommands.sync(context.bot, force=force):
                 res_txt = "Commands set successfully"  # Success message
             else:
-                res_txt = f"Failed to set commands: {data.get('description')}"  # API failure message
-        else:
-            res_txt = f"Error {response.status_code}: {response.text}"  # HTTP error message
+                res_txt = "Commands are already up to date"
+        except Exception as e:
+            res_txt = f"Failed to set commands: {e}"  # API failure message
 
         # Reply to the user with the result
         await update.message.reply_text(res_txt)
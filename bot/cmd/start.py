@@ -21,8 +21,8 @@ copyright:
 
 from telegram import Update
 from telegram.ext import CallbackContext
-from db import DBConnect
-from ..config import Config
+from ..config import get_config, get_async_db
+from ..federation import replicate
 
 class start:
     """Handles the /start command and stores chat IDs in the database.
@@ -34,38 +34,43 @@ class start:
     - DATABASE_NAME: The name of the database to connect to.
     - TABLE_NAME_CHATID: The name of the table in which chat IDs will be stored.
 
+    A single instance is created by the command registry and reused for every 
+    update; the attributes below always reflect the current configuration.
+
     Attributes:
-        db_name (str): The name of the database to connect to.
         table_name_chatID (str): The name of the table for storing chat IDs.
-        db (DBConnect): The database connection object used to interact with the database.
+        db (AsyncDB): The shared database used to interact with the database.
 
     Methods:
         store_chatID(chat_id: str): Stores the given chat ID in the specified table.
         command(update: Update, context: CallbackContext): Handles the /start command 
             and stores the chat ID in the database.
     """
-
-    def __init__(self):
-        """Initializes the Start class, loading environment variables and setting up 
-        database connection details."""
-        botconfig = Config()
-        self.table_name_chatID = botconfig.__dict__()["TABLE_NAME_CHATID"]
-        self.db_name = botconfig.__dict__()["DATABASE_NAME"]
-        
-        self.db = DBConnect(self.db_name)
     
-    def store_chatID(self, chat_id: str):
+    descriptions = {"id": "Mendaftarkan chat ini untuk menerima peringatan"}
+
+    @property
+    def table_name_chatID(self):
+        """The name of the table for storing chat IDs."""
+        return get_config().TABLE_NAME_CHATID
+
+    @property
+    def db(self):
+        """The shared database, awaitable and run off the event loop."""
+        return get_async_db()
+
+    async def store_chatID(self, chat_id: str):
         """Stores the chat ID in the database."""
-        self.db.store_chatID(table_name=self.table_name_chatID, chat_id=chat_id)
+        await self.db.store_chatID(table_name=self.table_name_chatID, chat_id=chat_id)
+        await replicate(chat_id)
         
-    @staticmethod
-    async def command(update: Update, context: CallbackContext):
+    async def command(self, update: Update, context: CallbackContext):
         """Handles the /start command.
         
         This method stores the chat ID of the user who sends the /start command
-        and sends a welcome message to the user.
+        and sends a welcome message to the user. A chat that was deactivated
+        because the bot could not reach it (blocked, kicked) is reactivated.
         """
-        save_id = start()
         chat_id = update.message.chat_id
-        save_id.store_chatID(chat_id=chat_id)
+        await self.store_chatID(chat_id=chat_id)
         await update.message.reply_text("Hello! Welcome to the bot. Type /help to see available commands.")
@@ -0,0 +1,81 @@
+"""
+file    : bot/cmd/stats.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Handles the /stats command. It reports the number of detections per
+    sensor in the last hour, today, the last 24 hours and the last 7 days,
+    plus the busiest hours of the week. The answer is read from the
+    precomputed rollup tables (db/rollup.py), so it takes the same time
+    whatever the size of the sensor log.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import html
+from datetime import datetime, timedelta
+from telegram import Update
+from telegram.ext import CallbackContext
+from db.rollup import RollupStore, HOURLY_TABLE, DAILY_TABLE, HOUR_FORMAT, DAY_FORMAT
+from ..config import get_config
+
+class stats:
+    """Shows detection counts per sensor from the rollups."""
+    
+    descriptions = {"id": "Menampilkan jumlah deteksi per sensor"}
+    blocking = ("stats",)
+    
+    def stats(self):
+        """Reads the detection counts per sensor for each reporting window.
+        
+        Returns:
+            tuple: (dict of sensor_id -> [last hour, today, 24 h, 7 days], busiest hours)
+        """
+        rollups = RollupStore(get_config().DATABASE_NAME)
+        now = datetime.now()
+        windows = [
+            rollups.counts(HOURLY_TABLE, now.strftime(HOUR_FORMAT)),
+            rollups.counts(DAILY_TABLE, now.strftime(DAY_FORMAT)),
+            rollups.counts(HOURLY_TABLE, (now - timedelta(hours=23)).strftime(HOUR_FORMAT)),
+            rollups.counts(DAILY_TABLE, (now - timedelta(days=6)).strftime(DAY_FORMAT)),
+        ]
+        
+        sensors = sorted(set().union(*windows))
+        table = {sensor: [window.get(sensor, 0) for window in windows] for sensor in sensors}
+        busiest = rollups.busiest_hours((now - timedelta(days=6)).strftime(DAY_FORMAT))
+        return table, busiest
+    
+    async def command(self, update: Update, context: CallbackContext):
+        """Handles the /stats command."""
+        table, busiest = await self.stats()
+        
+        if not table:
+            await update.message.reply_text("No detections recorded in the last 7 days.")
+            return
+        
+        text = "<b>Detections per sensor</b>\n"
+        text += "<pre>Sensor  1h   Today  24h   7d\n"
+        for sensor, (hour, today, day, week) in table.items():
+            text += f"{html.escape(sensor[:6].ljust(7))} {hour:<4} {today:<6} {day:<5} {week}\n"
+        text += "</pre>"
+        
+        if busiest:
+            text += "\n<b>Busiest hours (7 days)</b>\n"
+            for sensor, bucket, count in busiest:
+                text += f"Sensor {html.escape(sensor)}: {bucket}:00 ({count})\n"
+        
+        await update.message.reply_text(text, parse_mode='HTML')
@@ -28,10 +28,14 @@ Copyright:
     along with this program. If not, see <https://www.gnu.org/licenses/>
 """
 
-import os, platform, subprocess, re
+import os, platform, subprocess, re, html
 from datetime import datetime
 from telegram import Update
 from telegram.ext import CallbackContext
+from utility.readiness import readiness
+from utility import memory
+from ..connectivity import monitor
+from ..concurrency import command_stats
 
 class status:
     """Handles the /status command and provides system information.
@@ -50,6 +54,9 @@ class status:
                 and replies to the user with system information.
     """
     
+    descriptions = {"id": "Menampilkan informasi sistem"}
+    blocking = ("stats",)  # Waits for the ping, run in the command thread pool
+    
     def get_os(self):
         """Returns the operating system of the current system."""
         return platform.system()
@@ -116,8 +123,7 @@ class status:
             "ping": ping_result
         }
         
-    @staticmethod
-    async def command(update: Update, context: CallbackContext):
+    async def command(self, update: Update, context: CallbackContext):
         """Handles the /status command.
         
         This method fetches the system's status by calling the `stats()` 
@@ -129,9 +135,7 @@ class status:
             context (CallbackContext): The context object that contains 
                                        data related to the callback.
         """
-        # Create an instance of the Status class to access its methods
-        status_instance = status()
-        stats = status_instance.stats()  # Now we call stats() from the instance
+        stats = await self.stats()
         
         text = f"<b>System Information</b>\n"
         text += f"<pre>Name\t: MicroBox - Pengusir Hama Monyet\n"
@@ -140,6 +144,10 @@ class status:
         text += f"CPU\t: {stats['cpu_info']}\n"
         text += f"OS\t: {stats['os']}\n"
         text += f"Kernel\t: {stats['kernel']}\n"
-        text += f"Status\t: Online"
+        text += f"Status\t: Online\n"
+        text += f"Memory\t: {memory.summary()}\n"
+        text += f"\nStartup\t:\n{html.escape(readiness.summary())}"
+        text += f"\n{html.escape(monitor.summary())}"
+        text += f"\n\nCommands\t:\n{html.escape(command_stats.summary())}"
         text += f"\n<b>Ping</b>: {stats['ping']}</pre>"
         await update.message.reply_text(parse_mode='html', text=text)
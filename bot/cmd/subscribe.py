@@ -0,0 +1,118 @@
+"""
+file    : bot/cmd/subscribe.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Handles the /subscribe command, which sets which alerts the current
+    chat receives:
+
+        /subscribe                          show the current rule
+        /subscribe sensors=1,3              only alerts of sensors 1 and 3
+        /subscribe quiet=22-6               no alerts from 22:00 to 06:00
+        /subscribe burst=3                  only once 3 detections came in
+        /subscribe sensors=all quiet=off    options can be combined
+        /subscribe reset                    every alert again
+
+    Options not given keep their current value.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+from telegram import Update
+from telegram.ext import CallbackContext
+from ..config import get_config
+from ..routing import routing
+from ..federation import replicate
+
+USAGE = "Usage: /subscribe [sensors=1,2|all] [quiet=22-6|off] [burst=N] or /subscribe reset"
+
+class subscribe:
+    """Sets the sensors, quiet hours and minimum burst size of this chat."""
+    
+    descriptions = {"id": "Mengatur sensor, jam tenang dan ambang notifikasi chat ini"}
+    
+    @staticmethod
+    def parse(args, current):
+        """Merges the command options into the current rule.
+        
+        Returns:
+            tuple: (sensors, quiet_start, quiet_end, min_burst)
+        
+        Raises:
+            ValueError: If an option is malformed.
+        """
+        sensors, quiet_start, quiet_end, min_burst = current or (None, None, None, 1)
+        for arg in args:
+            key, sep, value = arg.lower().partition("=")
+            if not sep:
+                raise ValueError(f"Unknown option '{arg}'")
+            if key == "sensors":
+                sensors = None if value == "all" else [s for s in value.split(",") if s]
+                if sensors == []:
+                    raise ValueError("No sensor given")
+            elif key == "quiet":
+                if value == "off":
+                    quiet_start = quiet_end = None
+                else:
+                    start, _, end = value.partition("-")
+                    quiet_start, quiet_end = int(start), int(end)
+                    if not (0 <= quiet_start < 24 and 0 <= quiet_end < 24):
+                        raise ValueError("Quiet hours must be between 0 and 23")
+            elif key == "burst":
+                min_burst = int(value)
+                if min_burst < 1:
+                    raise ValueError("Burst must be at least 1")
+            else:
+                raise ValueError(f"Unknown option '{key}'")
+        return sensors, quiet_start, quiet_end, min_burst
+    
+    @staticmethod
+    def describe(rule):
+        """Formats a rule for the reply."""
+        if rule is None:
+            return "📨 This chat receives every alert."
+        sensors, quiet_start, quiet_end, min_burst = rule
+        lines = ["📋 Subscription of this chat:",
+                 f"• Sensors: {'all' if sensors is None else ', '.join(sensors)}",
+                 f"• Quiet hours: {'none' if quiet_start is None else f'{quiet_start:02d}:00 - {quiet_end:02d}:00'}",
+                 f"• Minimum burst: {min_burst} detection(s) in {get_config().SUBSCRIPTION_BURST_SECONDS // 60} min"]
+        return "\n".join(lines)
+    
+    async def command(self, update: Update, context: CallbackContext):
+        chat_id = str(update.effective_chat.id)
+        if not routing.loaded:
+            await routing.refresh()
+        
+        if not context.args:
+            await update.message.reply_text(self.describe(routing.rule(chat_id)) + "\n" + USAGE)
+            return
+        
+        if context.args[0].lower() == "reset":
+            await routing.update(chat_id, None)
+            await replicate(chat_id)
+            await update.message.reply_text(self.describe(None))
+            return
+        
+        try:
+            rule = self.parse(context.args, routing.rule(chat_id))
+        except ValueError as e:
+            await update.message.reply_text(f"⚠️ {e}\n{USAGE}")
+            return
+        
+        await routing.update(chat_id, rule)
+        await replicate(chat_id)
+        await update.message.reply_text(self.describe(routing.rule(chat_id)))
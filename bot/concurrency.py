@@ -0,0 +1,281 @@
+"""
+file    : bot/concurrency.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Concurrent, non-blocking execution of the bot commands.
+
+    A command class names the methods that would stall the event loop:
+
+        class status:
+            blocking = ("stats",)      # I/O, subprocesses: run in the thread pool
+            cpu_bound = ("analyse",)   # number crunching: run in the process pool
+            timeout = 30               # seconds, COMMAND_TIMEOUT when not set
+
+    The registry replaces those methods on the shared command object with
+    coroutines that run them in a bounded pool (COMMAND_THREADS threads,
+    COMMAND_PROCESSES processes), so the handler awaits them and the bot
+    keeps serving other chats meanwhile. A CPU-bound method runs on a fresh
+    object of the command class in a forked worker, so its arguments and
+    result must be picklable. With COMMAND_PROCESSES=0, or in the low-memory
+    profile, CPU-bound methods run in the thread pool instead.
+
+    The workers are forked once by executor.start(), which main.py calls in
+    single-process mode while the process still has a single thread: a fork
+    taken while the MQTT, database or logging threads run can copy a lock
+    one of them holds into the worker, which then deadlocks on it. The pool
+    is never forked later, so without start(), or once a worker died,
+    CPU-bound methods run in the thread pool too. So do they in the
+    supervised notifier, a daemonic process that may not have children.
+
+    Updates are processed concurrently, up to COMMAND_CONCURRENCY at a time,
+    while the updates of one chat are still handled one after the other in
+    the order they arrived. Every command runs under its timeout, and its
+    latency is recorded in `command_stats` (shown by /status).
+
+    A timeout only stops the handler coroutine. A pool call not started yet
+    is dropped, but one already running cannot be interrupted and keeps its
+    thread or process until it returns. Such calls are counted as "still
+    running" in `command_stats`; while they hold the pool, later blocking
+    calls of every command wait for a free worker. Commands that may run
+    long (e.g. /export) set their own, longer timeout.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import asyncio, logging, multiprocessing, threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from telegram.ext import BaseUpdateProcessor
+from .config import get_config
+
+log = logging.getLogger(__name__)
+
+# Latencies kept per command for the percentiles
+LATENCY_SAMPLES = 200
+
+
+def _call_method(command_class, name: str, args: tuple, kwargs: dict):
+    """Runs a method of a new command object, in a process pool worker."""
+    return getattr(command_class(), name)(*args, **kwargs)
+
+
+class CommandExecutor:
+    """Bounded thread and process pools for the blocking work of the commands."""
+
+    def __init__(self):
+        self._threads = None
+        self._processes = None
+        self._lock = threading.Lock()
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            with self._lock:
+                if self._threads is None:
+                    workers = max(1, get_config().COMMAND_THREADS)
+                    self._threads = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="command")
+                    log.debug("Command thread pool started with %d threads", workers)
+        return self._threads
+
+    def start(self):
+        """Forks the process pool workers; call while the process runs no other thread."""
+        config = get_config()
+        if config.LOW_MEMORY or config.COMMAND_PROCESSES < 1:
+            return
+        if multiprocessing.current_process().daemon:
+            log.info("Daemonic process, CPU-bound commands run in the thread pool")
+            return
+        with self._lock:
+            if self._processes is not None:
+                return
+            # fork, as the supervisor does: spawn would re-run main.py in every worker
+            pool = ProcessPoolExecutor(
+                max_workers=config.COMMAND_PROCESSES, mp_context=multiprocessing.get_context("fork")
+            )
+            pool.submit(int).result()  # The workers are forked on the first task
+            self._processes = pool
+        log.debug("Command process pool started with %d processes", config.COMMAND_PROCESSES)
+
+    def _process_pool(self):
+        """The process pool forked by start(); None when CPU-bound work uses threads."""
+        return self._processes
+
+    @staticmethod
+    async def _await(future):
+        """Awaits a pool future; when cancelled, counts the call if it cannot be stopped."""
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if not future.cancel() and not future.done():
+                command_stats.stray_started()
+                future.add_done_callback(lambda _: command_stats.stray_finished())
+            raise
+
+    async def run_blocking(self, func, *args, **kwargs):
+        """Runs func(*args, **kwargs) in the thread pool and returns its result."""
+        return await self._await(self._thread_pool().submit(func, *args, **kwargs))
+
+    async def run_cpu(self, func, *args, **kwargs):
+        """Runs func(*args, **kwargs) in the process pool; func, arguments and result must pickle."""
+        pool = self._process_pool()
+        if pool is None:
+            return await self.run_blocking(func, *args, **kwargs)
+        try:
+            return await self._await(pool.submit(func, *args, **kwargs))
+        except BrokenProcessPool:
+            # A worker died (e.g. killed by the OOM killer); forking a new pool now is not safe
+            log.error("Command process pool broke, CPU-bound commands now run in the thread pool")
+            with self._lock:
+                if self._processes is pool:
+                    self._processes = None
+            pool.shutdown(wait=False)
+            raise
+
+    def offload(self, instance, blocking=(), cpu_bound=()):
+        """Replaces the named methods of a command object with coroutines running them in the pools."""
+        command_class = type(instance)
+        for name in blocking:
+            method = getattr(instance, name)
+
+            async def run(*args, _method=method, **kwargs):
+                return await self.run_blocking(_method, *args, **kwargs)
+
+            setattr(instance, name, run)
+        for name in cpu_bound:
+            getattr(instance, name)  # Fail at load time on a misspelt name
+
+            async def run(*args, _name=name, **kwargs):
+                return await self.run_cpu(_call_method, command_class, _name, args, kwargs)
+
+            setattr(instance, name, run)
+
+    def shutdown(self):
+        """Stops the pools; work still queued is cancelled."""
+        with self._lock:
+            pools, self._threads, self._processes = (self._threads, self._processes), None, None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+
+class CommandStats:
+    """Latency of each command: calls, errors, timeouts and the recent percentiles."""
+
+    def __init__(self):
+        self._commands = {}
+        self.stray = 0  # Pool calls still running after their command stopped waiting
+        self._lock = threading.Lock()
+
+    def stray_started(self):
+        with self._lock:
+            self.stray += 1
+
+    def stray_finished(self):
+        with self._lock:
+            self.stray -= 1
+
+    def record(self, name: str, seconds: float, outcome: str = "ok"):
+        """Records one call; outcome is "ok", "error" or "timeout"."""
+        with self._lock:
+            entry = self._commands.get(name)
+            if entry is None:
+                entry = self._commands[name] = {
+                    "calls": 0, "errors": 0, "timeouts": 0, "max": 0.0,
+                    "recent": deque(maxlen=LATENCY_SAMPLES),
+                }
+            entry["calls"] += 1
+            if outcome != "ok":
+                entry[f"{outcome}s"] += 1
+            entry["max"] = max(entry["max"], seconds)
+            entry["recent"].append(seconds)
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+        dict: name -> {"calls", "errors", "timeouts", "p50", "p95", "max"}, times in seconds.
+        """
+        with self._lock:
+            commands = {name: (dict(entry), sorted(entry["recent"])) for name, entry in self._commands.items()}
+        result = {}
+        for name, (entry, recent) in commands.items():
+            result[name] = {
+                "calls": entry["calls"],
+                "errors": entry["errors"],
+                "timeouts": entry["timeouts"],
+                "p50": recent[int(0.50 * (len(recent) - 1))],
+                "p95": recent[int(0.95 * (len(recent) - 1))],
+                "max": entry["max"],
+            }
+        return result
+
+    def summary(self, top: int = 5) -> str:
+        """The slowest commands by p95, one per line."""
+        commands = sorted(self.snapshot().items(), key=lambda item: item[1]["p95"], reverse=True)
+        if not commands:
+            return "No commands handled yet"
+        lines = []
+        if self.stray:
+            lines.append(f"⚠️ {self.stray} pool calls still running after their command timed out")
+        for name, entry in commands[:top]:
+            line = (f"/{name}: {entry['calls']}x, p50 {entry['p50'] * 1000:.0f} ms, "
+                    f"p95 {entry['p95'] * 1000:.0f} ms, max {entry['max'] * 1000:.0f} ms")
+            if entry["errors"] or entry["timeouts"]:
+                line += f" ({entry['errors']} errors, {entry['timeouts']} timeouts)"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Processes updates concurrently, the updates of one chat in the order they arrived.
+
+    Pass it to Application.builder().concurrent_updates(). An update waiting
+    for an earlier one of its chat holds one of the max_concurrent_updates slots.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._chats = {}  # chat ID -> [lock, updates holding or waiting for it]
+
+    async def do_process_update(self, update, coroutine):
+        chat = getattr(update, "effective_chat", None)
+        if chat is None:
+            await coroutine
+            return
+        entry = self._chats.get(chat.id)
+        if entry is None:
+            entry = self._chats[chat.id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            # asyncio.Lock wakes its waiters first in, first out
+            async with entry[0]:
+                await coroutine
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._chats[chat.id]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+
+# Process-wide pools and statistics shared by the registry and the commands
+executor = CommandExecutor()
+command_stats = CommandStats()
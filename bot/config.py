@@ -1,22 +1,199 @@
-import os
-from dotenv import load_dotenv
+import os, threading, logging
+from dataclasses import dataclass, asdict, fields, MISSING
+from dotenv import dotenv_values
+from db import DBConnect
+from db.aio import AsyncDB
 
+# Environment variables whose name differs from the field name
+ENV_NAMES = {"TOKEN": "TELEGRAM_BOT_TOKEN"}
+
+log = logging.getLogger(__name__)
+
+def _convert(name: str, kind: type, raw: str):
+    """Converts an environment string to the type of a Config field."""
+    try:
+        if kind is bool:
+            return raw.lower() in ("1", "true", "yes", "on")
+        if kind in (int, float):
+            return kind(raw)
+        return raw
+    except ValueError:
+        raise ValueError(f"Invalid environment variable {name}={raw!r}")
+
+@dataclass(frozen=True)
 class Config:
-    def __init__(self):
-        load_dotenv()
-        
-        self.TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-        self.DATABASE_NAME = os.getenv("DATABASE_NAME")
-        self.TABLE_NAME = os.getenv("TABLE_NAME")
-        self.TABLE_NAME_CHATID = os.getenv("TABLE_NAME_CHATID")
-
-        if not all([self.TOKEN, self.DATABASE_NAME, self.TABLE_NAME, self.TABLE_NAME_CHATID]):
-            raise ValueError("Required environment variables are not set.")
-
-    def __dict__(self):
-        return ({
-            "TOKEN": self.TOKEN,
-            "DATABASE_NAME": self.DATABASE_NAME,
-            "TABLE_NAME": self.TABLE_NAME,
-            "TABLE_NAME_CHATID": self.TABLE_NAME_CHATID
-        })
\ No newline at end of file
+    """Immutable settings read from the environment and the .env file.
+
+    Use get_config() instead of building one directly, so the .env file is
+    read once per process. reload_config() swaps in a new instance.
+    """
+    TOKEN: str
+    DATABASE_NAME: str
+    TABLE_NAME: str
+    TABLE_NAME_CHATID: str
+
+    # Mosquitto MQTT
+    MQTT_BROKER: str = "localhost"
+    MQTT_PORT: int = 1883
+    MQTT_TOPIC: str = "esp8266/pub"
+    MQTT_CLIENT_ID: str = "raspberry_monyet"
+    MQTT_RECORD_FILE: str = ""  # Append every raw message here (utility/recorder.py), empty disables
+
+    # Telegram delivery, "polling" or "webhook"
+    TELEGRAM_MODE: str = "polling"
+    TELEGRAM_API_URL: str = ""  # Bot API server, e.g. a local fake for tests
+    WEBHOOK_URL: str = ""  # Public base URL Telegram posts to
+    WEBHOOK_PATH: str = "/telegram"
+    WEBHOOK_LISTEN: str = "0.0.0.0"
+    WEBHOOK_PORT: int = 8443
+    WEBHOOK_SECRET: str = ""  # Generated per run when empty
+
+    # "single" process, or "multi" for supervised ingest/audio/notifier processes
+    RUN_MODE: str = "single"
+    SUPERVISOR_HEARTBEAT_TIMEOUT: int = 30  # Seconds without a heartbeat before a restart
+
+    # Low-memory profile for small boards (see utility/memory.py): audio is set up on
+    # the first alarm instead of at startup and fewer database threads are kept
+    LOW_MEMORY: bool = False
+    AUDIO_IDLE_RELEASE: float = 0  # Seconds after an alarm the mixer is closed, 0 keeps it open
+
+    # Federation of several nodes behind one sender (see bot/federation.py), off when the
+    # node ID is empty; all nodes share the bot token and a bridged MQTT topic
+    FEDERATION_NODE_ID: str = ""
+    FEDERATION_TOPIC: str = "monyet/federation"
+    FEDERATION_LEASE_SECONDS: float = 15
+    FEDERATION_DEDUP_SECONDS: float = 120
+
+    # Graceful shutdown
+    SHUTDOWN_TIMEOUT: float = 10  # Seconds allowed to finish the sends in flight
+    OUTBOX_FILE: str = "data/outbox.jsonl"  # Alerts left unsent, replayed on the next start
+
+    # Log retention (see db/retention.py), 0 days keeps every row
+    RETENTION_DAYS: int = 90
+    RETENTION_INTERVAL_HOURS: float = 24
+    RETENTION_ARCHIVE_DIR: str = "archive"
+
+    # Hits that must correlate before an alarm (see utility/correlation.py), e.g.
+    # "2of1,2,3/30; 3x/60"; empty raises an alarm on every hit
+    CORRELATION_RULES: str = ""
+
+    # Bot command execution (see bot/concurrency.py)
+    COMMAND_CONCURRENCY: int = 8  # Updates handled at once, one chat's updates stay in order
+    COMMAND_THREADS: int = 4  # Pool for the blocking work of the commands
+    COMMAND_PROCESSES: int = 1  # Pool for CPU-bound work, 0 runs it in the thread pool
+    COMMAND_TIMEOUT: float = 120  # Seconds a command may take unless it sets its own, 0 for none
+
+    # Local read-only HTTP API for dashboards (see bot/api.py), single-process mode only
+    API_PORT: int = 0  # 0 disables the API
+    API_LISTEN: str = "127.0.0.1"  # 0.0.0.0 to serve the LAN
+    API_CACHE_SECONDS: float = 5  # Seconds a response is reused before it is built again
+    API_RECENT_DETECTIONS: int = 200  # Detections kept for /api/detections
+
+    # Subscription rules (see bot/routing.py)
+    SUBSCRIPTION_BURST_SECONDS: int = 300  # Window counted for a chat's minimum burst
+
+    # Logging (see utility/logger.py)
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""  # Per module, e.g. "db=WARNING,bot.telegram=DEBUG"
+    LOG_FILE: str = "logs/monyet.log"  # JSON lines, empty for console only
+    LOG_MAX_BYTES: int = 5 * 1024 * 1024
+    LOG_BACKUPS: int = 5
+    LOG_CONSOLE: bool = True
+
+    # Chats and users allowed to run admin commands such as /profile, comma separated
+    ADMIN_CHAT_IDS: str = ""
+
+    @classmethod
+    def from_env(cls):
+        """Builds a Config from the environment and the .env file.
+
+        Every field is read from the variable of the same name, except TOKEN
+        which is read from TELEGRAM_BOT_TOKEN. Empty variables keep the default.
+        A variable set in the real environment (systemd, run_app.sh) takes
+        precedence over the .env file, which is read again on every call
+        without touching os.environ, so a reload keeps those values.
+
+        Raises:
+            ValueError: If a required variable is missing or a value is malformed.
+        """
+        env = {name: value for name, value in dotenv_values().items() if value is not None}
+        env.update(os.environ)
+
+        values = {}
+        for field in fields(cls):
+            raw = env.get(ENV_NAMES.get(field.name, field.name))
+            if raw is None or raw.strip() == "":
+                if field.default is MISSING:
+                    raise ValueError("Required environment variables are not set.")
+                continue
+            values[field.name] = _convert(field.name, field.type, raw.strip())
+
+        return cls(**values)
+
+    def as_dict(self):
+        return asdict(self)
+
+    def is_admin(self, *ids) -> bool:
+        """True if any of the given chat or user IDs is listed in ADMIN_CHAT_IDS."""
+        admins = {value.strip() for value in self.ADMIN_CHAT_IDS.split(",") if value.strip()}
+        return any(str(value) in admins for value in ids if value is not None)
+
+
+_config = None
+_db = None
+_async_db = None
+_lock = threading.Lock()
+_listeners = []
+
+def get_config() -> Config:
+    """Returns the process-wide Config, loading it on first use."""
+    global _config
+    if _config is None:
+        with _lock:
+            if _config is None:
+                _config = Config.from_env()
+    return _config
+
+def get_db() -> DBConnect:
+    """Returns the process-wide DBConnect for the configured database."""
+    global _db
+    config = get_config()
+    if _db is None or _db.name_db != config.DATABASE_NAME:
+        _db = DBConnect(config.DATABASE_NAME)
+    return _db
+
+def get_async_db() -> AsyncDB:
+    """Returns the process-wide AsyncDB, running the shared DBConnect off the event loop."""
+    global _async_db
+    if _async_db is None:
+        readers = 1 if get_config().LOW_MEMORY else 2  # Not under _lock, get_config takes it
+        with _lock:
+            if _async_db is None:
+                _async_db = AsyncDB(get_db, readers=readers)
+    return _async_db
+
+def on_reload(callback):
+    """Registers callback(old, new) to run after the configuration is reloaded."""
+    _listeners.append(callback)
+
+def reload_config() -> Config:
+    """Re-reads the .env file and replaces the process-wide Config.
+
+    The previous Config stays active if the new one is invalid.
+
+    Raises:
+        ValueError: If the reloaded configuration is invalid.
+    """
+    global _config
+    with _lock:
+        old = _config
+        _config = Config.from_env()
+        new = _config
+
+    log.info("Configuration reloaded")
+    for callback in _listeners:
+        try:
+            callback(old, new)
+        except Exception as e:
+            log.exception("Error in config reload listener: %s", e)
+    return new
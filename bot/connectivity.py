@@ -0,0 +1,175 @@
+"""
+file    : bot/connectivity.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Async internet connectivity monitor for the Telegram bot.
+
+    A TCP connection to a reliable host is attempted on the bot's event
+    loop with a per-probe timeout, so no socket default timeout is changed
+    for the rest of the process. While online the host is probed at a fixed
+    interval; while offline the delay between probes doubles up to a cap.
+    Listeners are called on every online/offline transition and the
+    duration of past outages is kept for diagnostics.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import asyncio, logging, time
+from collections import deque
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+
+class ConnectivityMonitor:
+    """Watches internet connectivity and reports state changes."""
+
+    def __init__(self, host="8.8.8.8", port=53, timeout=3, interval=30,
+                 min_backoff=1, max_backoff=60, history=20):
+        """
+        Parameters:
+        host (str), port (int): Endpoint used for the TCP probe.
+        timeout (float): Seconds allowed for one probe.
+        interval (float): Seconds between probes while online.
+        min_backoff (float), max_backoff (float): Bounds of the delay between probes while offline.
+        history (int): Number of past outages kept.
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.interval = interval
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+
+        self.online = None  # Unknown until the first probe
+        self.changed_at = None
+        self.outages = deque(maxlen=history)  # (started datetime, seconds)
+        self._outage_started = None
+        self._listeners = []
+        self._online_event = None
+        self._wake = None
+
+    def on_change(self, callback):
+        """Registers callback(online: bool), sync or async, called on each transition."""
+        self._listeners.append(callback)
+
+    async def probe(self) -> bool:
+        """Returns True if a TCP connection to host:port succeeds within the timeout."""
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), timeout=self.timeout
+            )
+        except (OSError, asyncio.TimeoutError):
+            return False
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return True
+
+    async def wait_online(self):
+        """Waits until the monitor has seen the internet reachable."""
+        await self._events()[0].wait()
+
+    def check_now(self):
+        """Wakes the monitor to probe immediately, e.g. after a failed API call."""
+        if self._wake is not None:
+            self._wake.set()
+
+    def outage_seconds(self) -> float:
+        """Seconds the current outage has lasted, 0 while online."""
+        if self._outage_started is None:
+            return 0.0
+        return time.monotonic() - self._outage_started[1]
+
+    def summary(self) -> str:
+        """Short text description of the state and the last outages."""
+        if self.online is None:
+            state = "unknown"
+        elif self.online:
+            state = "online"
+        else:
+            state = f"offline for {self.outage_seconds():.0f} s"
+
+        lines = [f"Internet: {state}"]
+        for started, seconds in list(self.outages)[-3:]:
+            lines.append(f"Outage {started:%m/%d %H:%M:%S} lasted {seconds:.0f} s")
+        return "\n".join(lines)
+
+    def _events(self):
+        # Created lazily so they belong to the loop running the monitor
+        if self._online_event is None:
+            self._online_event = asyncio.Event()
+            self._wake = asyncio.Event()
+        return self._online_event, self._wake
+
+    async def _set_state(self, online: bool):
+        self.online = online
+        self.changed_at = datetime.now()
+        online_event, _ = self._events()
+
+        if online:
+            online_event.set()
+            if self._outage_started is not None:
+                started, started_mono = self._outage_started
+                seconds = time.monotonic() - started_mono
+                self.outages.append((started, seconds))
+                self._outage_started = None
+                log.info("Internet connection restored after %.0f seconds.", seconds, extra={"outage_seconds": round(seconds, 1)})
+            else:
+                log.info("Internet connection is available.")
+        else:
+            online_event.clear()
+            self._outage_started = (datetime.now(), time.monotonic())
+            log.warning("No internet connection.")
+
+        for callback in self._listeners:
+            try:
+                result = callback(online)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                log.exception("Error in connectivity listener: %s", e)
+
+    async def run(self):
+        """Probes forever; cancel the task to stop the monitor."""
+        _, wake = self._events()
+        backoff = self.min_backoff
+
+        while True:
+            online = await self.probe()
+            if online != self.online:
+                await self._set_state(online)
+
+            if online:
+                backoff = self.min_backoff
+                delay = self.interval
+            else:
+                delay = backoff
+                backoff = min(backoff * 2, self.max_backoff)
+
+            wake.clear()
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Process-wide monitor used by the bot and the /status command
+monitor = ConnectivityMonitor()
@@ -0,0 +1,183 @@
+"""
+file    : bot/digest.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Per-chat notification digests.
+
+    A chat in digest mode still gets the first detection after a quiet
+    period immediately. That alert opens a window of the chat's digest
+    interval; detections during the window are only counted, and when it
+    ends a task on the bot's event loop sends one summary with the count,
+    first and last time per sensor. The next detection after that is
+    again sent immediately. Chats that never chose an interval get every
+    alert as before.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import asyncio, logging
+from db.chat_settings import ChatSettingsStore
+from .config import get_config, get_async_db
+
+log = logging.getLogger(__name__)
+
+# Bounds of the interval a chat can choose, in minutes
+MIN_MINUTES = 1
+MAX_MINUTES = 24 * 60
+
+
+class DigestWindow:
+    """Detections held back for one chat until its window ends."""
+
+    def __init__(self, minutes: int):
+        self.minutes = minutes
+        self.detections = []  # (sensor_id, datetime)
+        self.task = None
+
+    def summary(self) -> str:
+        """Formats the held detections as one message, sensors in order of first detection."""
+        sensors = {}
+        for sensor_id, when in self.detections:
+            count, first, last = sensors.get(sensor_id, (0, when, when))
+            sensors[sensor_id] = (count + 1, min(first, when), max(last, when))
+
+        first = min(when for _, when in self.detections)
+        last = max(when for _, when in self.detections)
+        lines = [f"🐒 {len(self.detections)} more detections since the last alert "
+                 f"({first:%H:%M:%S} - {last:%H:%M:%S})"]
+        for sensor_id, (count, first, last) in sensors.items():
+            lines.append(f"• Sensor {sensor_id}: {count}x, first {first:%H:%M:%S}, last {last:%H:%M:%S}")
+        return "\n".join(lines)
+
+
+class DigestManager:
+    """Decides per chat whether an alert is sent now or held for the digest."""
+
+    def __init__(self):
+        self._intervals = None  # chat_id -> minutes, loaded on first use
+        self._windows = {}
+        self._sender = None
+
+    def set_sender(self, sender):
+        """Registers the coroutine sender(chat_id, text, detections) used to deliver summaries."""
+        self._sender = sender
+
+    @property
+    def store(self) -> ChatSettingsStore:
+        return ChatSettingsStore(get_config().DATABASE_NAME)
+
+    @property
+    def loaded(self) -> bool:
+        return self._intervals is not None
+
+    async def load(self):
+        """Reads the digest intervals on the database reader pool."""
+        self._intervals = await get_async_db().read(self.store.digest_intervals)
+
+    def interval(self, chat_id) -> int:
+        """Returns the digest interval of a chat in minutes, None if it is not in digest mode."""
+        if self._intervals is None:
+            self._intervals = self.store.digest_intervals()  # Blocking, only before load()
+        return self._intervals.get(str(chat_id))
+
+    async def set_interval(self, chat_id, minutes: int = None):
+        """Stores the digest interval of a chat on the database writer, None turns digest mode off.
+
+        Raises:
+            ValueError: If minutes is outside MIN_MINUTES..MAX_MINUTES.
+        """
+        if minutes is not None and not MIN_MINUTES <= minutes <= MAX_MINUTES:
+            raise ValueError(f"Interval must be between {MIN_MINUTES} and {MAX_MINUTES} minutes")
+        await get_async_db().write(self.store.set_digest_minutes, str(chat_id), minutes)
+        if self._intervals is None:
+            await self.load()
+        self.cache(chat_id, minutes)
+
+    def cache(self, chat_id, minutes: int = None):
+        """Updates the loaded interval of a chat whose setting was already stored."""
+        if self._intervals is None:
+            return  # Read from the database when loaded
+        if minutes is None:
+            self._intervals.pop(str(chat_id), None)
+        else:
+            self._intervals[str(chat_id)] = minutes
+
+    def hold(self, chat_id, detections: list) -> bool:
+        """Adds detections to the chat's open window.
+
+        Must be called on the bot's event loop. When the chat is in digest mode
+        and has no open window, a window is opened and False is returned, so the
+        caller sends this alert immediately.
+
+        Returns:
+            bool: True if the detections were held back for the digest.
+        """
+        chat_id = str(chat_id)
+        window = self._windows.get(chat_id)
+        if window is not None:
+            window.detections.extend(detections)
+            return True
+
+        minutes = self.interval(chat_id)
+        if minutes:
+            window = DigestWindow(minutes)
+            window.task = asyncio.create_task(self._flush_later(chat_id, window))
+            self._windows[chat_id] = window
+        return False
+
+    def pending(self) -> int:
+        """Number of detections held back across all chats."""
+        return sum(len(window.detections) for window in self._windows.values())
+
+    async def _flush_later(self, chat_id: str, window: DigestWindow):
+        await asyncio.sleep(window.minutes * 60)
+        if self._windows.get(chat_id) is window:  # Not already flushed by /digest off
+            await self.flush(chat_id)
+
+    async def flush(self, chat_id):
+        """Closes the chat's window and sends its summary if anything was held back."""
+        window = self._windows.pop(str(chat_id), None)
+        if window is None or not window.detections:
+            return
+        if self._sender is None:
+            log.warning("Digest of %d detections for %s dropped, no sender", len(window.detections), chat_id)
+            return
+        try:
+            await self._sender(str(chat_id), window.summary(), window.detections)
+        except Exception as e:
+            log.exception("Error while sending the digest to %s: %s", chat_id, e)
+
+    def take_all(self) -> list:
+        """Closes every window without sending it, e.g. when the bot stops.
+
+        Returns:
+            list: (chat_id, summary text, detections) of each window that held detections.
+        """
+        current = asyncio.current_task()
+        taken = []
+        for chat_id, window in list(self._windows.items()):
+            if window.task is not None and window.task is not current:
+                window.task.cancel()
+            del self._windows[chat_id]
+            if window.detections:
+                taken.append((chat_id, window.summary(), window.detections))
+        return taken
+
+
+# Process-wide digest state shared by the bot and the /digest command
+digests = DigestManager()
@@ -0,0 +1,435 @@
+"""
+file    : bot/federation.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Federation of several MicroBox nodes behind one Telegram sender.
+
+    Every node forwards its alerts to the bridge topic FEDERATION_TOPIC/alerts
+    (Mosquitto bridges the topic between the Pis) instead of sending them
+    itself. One node, the leader, delivers each distinct alert to the
+    subscribers, logs it and counts it in the rollups; the others only keep
+    track of it. Hits the correlation rules did not escalate are forwarded
+    the same way, marked "raw", and only logged and counted by the leader.
+
+    Subscribers: only the leader polls Telegram, so /start, /subscribe,
+    /digest and the chats deactivated while sending change its database
+    alone. After each change the leader publishes the chat's registration,
+    subscription rule and digest interval as the retained message of
+    FEDERATION_TOPIC/subscribers/<chat_id>, and every other node merges it
+    into its own tables. A node taking the lead publishes its active chats
+    no node published yet, so chats registered before federation was
+    turned on follow along. Whichever node leads then alerts the same chats.
+
+    Leader election uses a lease held in the retained message of
+    FEDERATION_TOPIC/leader. The leader republishes it every third of
+    FEDERATION_LEASE_SECONDS. When the lease expires or was cleared, the
+    other nodes claim it after a random delay. Two claims made
+    together are decided by the broker: every node takes the last retained
+    message it received, so they all agree on the same leader. A leader that
+    stops cleanly clears the lease, so another node takes over at once.
+
+    Deduplication: alerts are keyed by their ID and by their detections
+    (sensor and second), so the same detection forwarded by two nodes, or
+    redelivered by MQTT, is delivered once within FEDERATION_DEDUP_SECONDS.
+    The leader announces each delivered ID on FEDERATION_TOPIC/delivered.
+    Every node keeps the alerts not announced yet, so a node that becomes
+    leader after a failover delivers the alerts the old leader missed.
+
+    Run nodes without Telegram against a local broker to try it out:
+
+        python -m bot.federation --node a
+        python -m bot.federation --node b --publish 5
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import itertools, json, logging, random, threading, time
+from collections import OrderedDict
+from db.chat_settings import ChatSettingsStore
+from .outbox import alert_entry, entry_detections
+from .config import get_config, get_db, get_async_db
+from .routing import routing
+from .digest import digests
+
+log = logging.getLogger(__name__)
+
+# Most alerts kept for deduplication and failover
+MAX_TRACKED = 1000
+
+
+class Federation:
+    """Forwards alerts over the bridge topic and delivers them when this node leads."""
+
+    def __init__(self, client, node_id: str, topic: str, deliver, lease_seconds: float = 15,
+                 dedup_seconds: float = 120, record=None, merge=None):
+        """
+        Parameters:
+        client: Connected paho MQTT client shared with the rest of the program.
+        node_id (str): Unique name of this node.
+        topic (str): Base of the federation topics.
+        deliver (callable): deliver(text, sensor_active, detections) sends an alert,
+            called on the leader only, from the MQTT thread.
+        lease_seconds (float): How long a lease is valid without being renewed.
+        dedup_seconds (float): How long a delivered alert suppresses identical ones.
+        record (callable): record(detections) logs the hits forwarded with forward_raw(),
+            called on the leader only, from the MQTT thread.
+        merge (callable): merge(chat_id, state) applies a subscriber published by
+            another node (see subscriber_state()), called from the MQTT thread.
+        """
+        self.client = client
+        self.node_id = node_id
+        self.lease_topic = f"{topic}/leader"
+        self.alert_topic = f"{topic}/alerts"
+        self.delivered_topic = f"{topic}/delivered"
+        self.subscribers_topic = f"{topic}/subscribers"
+        self.deliver = deliver
+        self.record = record
+        self.merge = merge
+        self.lease_seconds = lease_seconds
+        self.dedup_seconds = dedup_seconds
+
+        self.leader = None  # Node holding the lease, None when unknown or cleared
+        self._lease_expires = 0.0
+        self._next_renew = 0.0
+        self._claim_at = None  # When this node claims the lease if it is still free
+        self._subscribed_at = None
+        self._resigned = False  # Set on shutdown, the node no longer claims the lease
+        self._listeners = []
+
+        self._ids = itertools.count(1)
+        self._boot = int(time.time())
+        self._seen = OrderedDict()  # alert ID or detection key -> monotonic time first seen
+        self._pending = OrderedDict()  # alert ID -> alert, not announced as delivered yet
+        self.replicated = set()  # Chat IDs with a published subscriber message
+        self._lock = threading.RLock()
+
+    @property
+    def is_leader(self) -> bool:
+        return self.leader == self.node_id
+
+    def on_leadership_change(self, callback):
+        """Registers callback(is_leader: bool), called when this node gains or loses the lead."""
+        self._listeners.append(callback)
+
+    def _set_leader(self, node: str):
+        was_leader = self.is_leader
+        self.leader = node
+        if was_leader == self.is_leader:
+            return
+        if self.is_leader:
+            log.info("🗳️ Node %s is now the federation leader", self.node_id)
+        else:
+            log.info("🗳️ Node %s is no longer the leader (leader: %s)", self.node_id, node or "none")
+        for callback in self._listeners:
+            try:
+                callback(self.is_leader)
+            except Exception as e:
+                log.exception("Error in leadership listener: %s", e)
+        if self.is_leader:
+            self._deliver_pending()
+
+    # MQTT side
+
+    def subscribe(self):
+        """Subscribes to the federation topics; call from on_connect."""
+        for topic in (self.lease_topic, self.alert_topic, self.delivered_topic, f"{self.subscribers_topic}/+"):
+            self.client.subscribe(topic, qos=1)
+        self._subscribed_at = time.monotonic()
+        log.info("📡 Federation node %s subscribed to %s/#", self.node_id, self.lease_topic.rsplit("/", 1)[0])
+
+    def handle(self, msg) -> bool:
+        """Handles a message of a federation topic; returns False for any other topic."""
+        if msg.topic == self.lease_topic:
+            self._on_lease(msg.payload)
+        elif msg.topic == self.alert_topic:
+            self._on_alert(msg.payload)
+        elif msg.topic == self.delivered_topic:
+            self._on_delivered(msg.payload)
+        elif msg.topic.startswith(self.subscribers_topic + "/"):
+            self._on_subscriber(msg.topic[len(self.subscribers_topic) + 1:], msg.payload)
+        else:
+            return False
+        return True
+
+    def _publish_lease(self):
+        lease = {"node": self.node_id, "lease": self.lease_seconds, "at": time.time()}
+        self.client.publish(self.lease_topic, json.dumps(lease), qos=1, retain=True)
+        self._next_renew = time.monotonic() + self.lease_seconds / 3
+
+    def _on_lease(self, payload: bytes):
+        with self._lock:
+            if not payload:
+                self._set_leader(None)  # Cleared by a leader that stopped
+                self._lease_expires = 0.0
+                return
+            try:
+                lease = json.loads(payload)
+                node, seconds = str(lease["node"]), float(lease.get("lease", self.lease_seconds))
+            except (ValueError, KeyError, TypeError):
+                log.warning("Ignoring malformed federation lease: %r", payload[:80])
+                return
+            # Expiry counted from when it arrived, so clocks of the nodes need not agree
+            self._lease_expires = time.monotonic() + seconds
+            self._claim_at = None
+            self._set_leader(node)
+
+    def tick(self):
+        """Renews or claims the lease when due; call about once a second."""
+        with self._lock:
+            now = time.monotonic()
+            if self._subscribed_at is None or self._resigned:
+                return
+            if self.is_leader:
+                if now >= self._lease_expires:
+                    # Our renewals stopped coming back, the broker is out of reach
+                    log.warning("🗳️ Lease renewals of %s not confirmed, stepping down", self.node_id)
+                    self._set_leader(None)
+                elif now >= self._next_renew:
+                    self._publish_lease()
+                return
+            if self.leader is not None and now < self._lease_expires:
+                return
+            if self.leader is not None:
+                log.warning("🗳️ Lease of %s expired", self.leader)
+                self._set_leader(None)
+            if self._claim_at is None:
+                # A retained lease arrives right after subscribing; after that, claim with jitter
+                self._claim_at = max(now, self._subscribed_at + 2) + random.uniform(0, self.lease_seconds / 3)
+            elif now >= self._claim_at:
+                log.info("🗳️ Node %s claims the federation lease", self.node_id)
+                self._claim_at = None
+                self._publish_lease()
+
+    def resign(self):
+        """Stops taking part in the election, clearing the lease if this node holds it
+        so another node takes over at once."""
+        with self._lock:
+            self._resigned = True
+            if self.is_leader:
+                self.client.publish(self.lease_topic, b"", qos=1, retain=True)
+                self._set_leader(None)
+
+    # Alerts
+
+    @staticmethod
+    def detection_key(alert: dict) -> str:
+        """Identity of an alert's detections, the same whichever node forwarded it."""
+        key = "|".join(sorted(f"{sensor_id}@{when}" for sensor_id, when in alert.get("detections", [])))
+        # Raw hits never suppress an alert of the same detections
+        return f"raw:{key}" if key and alert.get("raw") else key
+
+    def forward(self, text: str, sensor_active=None, detections: list = None, raw: bool = False):
+        """Publishes an alert of this node to the bridge topic; detections are (sensor_id, datetime)."""
+        alert = alert_entry(text, sensor_active, detections)
+        alert["id"] = f"{self.node_id}:{self._boot}:{next(self._ids)}"
+        alert["node"] = self.node_id
+        if raw:
+            alert["raw"] = True
+        self.client.publish(self.alert_topic, json.dumps(alert, ensure_ascii=False), qos=1)
+
+    def forward_raw(self, detections: list):
+        """Publishes hits that raised no alert, for the leader to log and count."""
+        self.forward("", None, detections, raw=True)
+
+    def _expire(self, now: float):
+        while self._seen and (len(self._seen) > 2 * MAX_TRACKED
+                              or now - next(iter(self._seen.values())) > self.dedup_seconds):
+            self._seen.popitem(last=False)
+        while len(self._pending) > MAX_TRACKED:
+            dropped, _ = self._pending.popitem(last=False)
+            log.warning("Federation dropped undelivered alert %s, too many pending", dropped)
+
+    def _on_alert(self, payload: bytes):
+        try:
+            alert = json.loads(payload)
+            alert_id = str(alert["id"])
+        except (ValueError, KeyError, TypeError):
+            log.warning("Ignoring malformed federation alert: %r", payload[:80])
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            key = self.detection_key(alert)
+            if alert_id in self._seen or (key and key in self._seen):
+                log.debug("Duplicate federation alert %s from %s", alert_id, alert.get("node"))
+                return
+            self._seen[alert_id] = now
+            if key:
+                self._seen[key] = now
+            self._pending[alert_id] = alert
+            if self.is_leader:
+                self._deliver(alert_id)
+
+    def _on_delivered(self, payload: bytes):
+        with self._lock:
+            self._pending.pop(payload.decode("utf-8", "replace"), None)
+
+    def _deliver(self, alert_id: str):
+        alert = self._pending.pop(alert_id)
+        try:
+            if not alert.get("raw"):
+                self.deliver(alert["text"], alert.get("sensor_active"), entry_detections(alert))
+            elif self.record is not None:
+                self.record(entry_detections(alert))
+        except Exception as e:
+            log.exception("Error delivering federation alert %s: %s", alert_id, e)
+        self.client.publish(self.delivered_topic, alert_id, qos=1)
+
+    def _deliver_pending(self):
+        if self._pending:
+            log.info("Delivering %d federation alerts the previous leader left", len(self._pending))
+        for alert_id in list(self._pending):
+            self._deliver(alert_id)
+
+    # Subscribers
+
+    def publish_subscriber(self, chat_id: str, state: dict):
+        """Publishes the subscriber state of a chat this node changed, retained for later nodes."""
+        message = dict(state, node=self.node_id, at=time.time())
+        self.client.publish(f"{self.subscribers_topic}/{chat_id}", json.dumps(message), qos=1, retain=True)
+        with self._lock:
+            self.replicated.add(str(chat_id))
+
+    def _on_subscriber(self, chat_id: str, payload: bytes):
+        try:
+            state = json.loads(payload)
+            node = str(state["node"])
+        except (ValueError, KeyError, TypeError):
+            log.warning("Ignoring malformed federation subscriber %s: %r", chat_id, payload[:80])
+            return
+        with self._lock:
+            self.replicated.add(chat_id)
+        if node == self.node_id or self.merge is None:
+            return  # Our own change, already in our tables
+        try:
+            self.merge(chat_id, state)
+        except Exception as e:
+            log.exception("Error merging federation subscriber %s: %s", chat_id, e)
+
+
+def subscriber_state(chat_id: str) -> dict:
+    """
+    Reads what the federation replicates of a chat; blocking, run on the database writer.
+
+    Returns:
+    dict: "active" (True, False when deactivated, None when not registered),
+        "reason", "rule" ([sensors, quiet_start, quiet_end, min_burst] or None)
+        and "digest" (minutes or None).
+    """
+    config = get_config()
+    store = ChatSettingsStore(config.DATABASE_NAME)
+    active, reason = get_db().chat_status(config.TABLE_NAME_CHATID, chat_id)
+    rules = {row[0]: list(row[1:]) for row in store.subscriptions()}
+    return {
+        "active": active,
+        "reason": reason,
+        "rule": rules.get(str(chat_id)),
+        "digest": store.digest_intervals().get(str(chat_id)),
+    }
+
+
+def merge_subscriber(chat_id: str, state: dict):
+    """
+    Applies a subscriber state published by another node to this node's tables
+    and routing; blocking, run on the database writer.
+    """
+    config = get_config()
+    db = get_db()
+    active = state.get("active")
+    if active:
+        db.store_chatID(config.TABLE_NAME_CHATID, chat_id)
+    elif active is None:
+        db.remove_chatID(config.TABLE_NAME_CHATID, chat_id)
+    else:
+        db.deactivate_chatID(config.TABLE_NAME_CHATID, chat_id, state.get("reason") or "deactivated on another node")
+
+    store = ChatSettingsStore(config.DATABASE_NAME)
+    if state.get("rule"):
+        store.set_subscription(chat_id, *state["rule"])
+    else:
+        store.remove_subscription(chat_id)
+    store.set_digest_minutes(chat_id, state.get("digest"))
+    routing.rebuild()
+    digests.cache(chat_id, state.get("digest"))
+    log.info("🗳️ Subscriber %s merged from node %s", chat_id, state.get("node"),
+             extra={"chat_id": chat_id})
+
+
+def publish_unreplicated():
+    """Publishes the active chats no node published yet; blocking, run when taking the lead."""
+    if node is None:
+        return
+    chat_ids = get_db().load_chat_ids(get_config().TABLE_NAME_CHATID) or set()
+    with node._lock:
+        missing = sorted(set(map(str, chat_ids)) - node.replicated)
+    for chat_id in missing:
+        node.publish_subscriber(chat_id, subscriber_state(chat_id))
+    if missing:
+        log.info("🗳️ Published %d subscribers registered before federation", len(missing))
+
+
+# Federation of this process, set by main.start_federation(); None when not federated
+node = None
+
+
+async def replicate(*chat_ids):
+    """Publishes the subscriber state of chats this node just changed; nothing when not federated."""
+    if node is None:
+        return
+    for chat_id in chat_ids:
+        # On the writer: after the change it follows, and chat_status() may migrate the table
+        state = await get_async_db().write(subscriber_state, str(chat_id))
+        node.publish_subscriber(str(chat_id), state)
+
+
+if __name__ == "__main__":
+    import argparse
+    import paho.mqtt.client as mqtt
+
+    parser = argparse.ArgumentParser(description="Run a federation node without Telegram")
+    parser.add_argument("--node", required=True, help="node ID")
+    parser.add_argument("--broker", default="localhost")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--topic", default="monyet/federation")
+    parser.add_argument("--lease", type=float, default=6, help="lease seconds")
+    parser.add_argument("--publish", type=int, default=0, help="alerts to forward, one per second")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    def deliver(text, sensor_active, detections):
+        print(f"[{args.node}] DELIVER {text} ({len(detections)} detections)", flush=True)
+
+    client = mqtt.Client(f"federation-{args.node}")
+    federation = Federation(client, args.node, args.topic, deliver, lease_seconds=args.lease)
+    client.on_connect = lambda client, userdata, flags, rc: federation.subscribe()
+    client.on_message = lambda client, userdata, msg: federation.handle(msg)
+    client.connect(args.broker, args.port, 60)
+    client.loop_start()
+
+    from datetime import datetime
+    try:
+        for i in itertools.count():
+            federation.tick()
+            if i < args.publish:
+                federation.forward(f"🐒 Test alert {i + 1} from {args.node}", 1, [(1, datetime.now())])
+            time.sleep(1)
+    except KeyboardInterrupt:
+        federation.resign()
+        client.disconnect()  # Sent after the queued lease reset
+        client.loop_stop()
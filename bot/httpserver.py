@@ -0,0 +1,140 @@
+"""
+file    : bot/httpserver.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Minimal HTTP/1.1 server running on the bot's asyncio event loop.
+
+    It only understands what the bot needs: a request line, headers and a
+    body with Content-Length, answered with one response per connection.
+    This keeps the webhook listener free of extra dependencies on the Pi.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import asyncio, logging
+from urllib.parse import urlsplit, parse_qs
+
+log = logging.getLogger(__name__)
+
+STATUS_TEXT = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class Request:
+    """A parsed HTTP request."""
+
+    def __init__(self, method: str, target: str, headers: dict, body: bytes):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = parts.path
+        self.query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self.headers = headers  # Lower-cased names
+        self.body = body
+
+
+class Response:
+    """An HTTP response to be written back to the client."""
+
+    def __init__(self, status: int = 200, body: bytes = b"", content_type: str = "text/plain; charset=utf-8", headers: dict = None):
+        self.status = status
+        self.body = body
+        self.headers = {"Content-Type": content_type, **(headers or {})}
+
+
+class HttpServer:
+    """Serves requests with an async handler(Request) -> Response."""
+
+    def __init__(self, handler, host: str = "127.0.0.1", port: int = 8080, max_body: int = 1 << 20, timeout: float = 10):
+        """
+        Parameters:
+        handler (coroutine function): Called with each Request, returns a Response.
+        host (str), port (int): Address to listen on.
+        max_body (int): Largest accepted request body in bytes.
+        timeout (float): Seconds allowed to receive a request.
+        """
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.max_body = max_body
+        self.timeout = timeout
+        self._server = None
+
+    async def start(self):
+        """Starts listening, raises OSError if the address cannot be bound."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        # Report the real port when 0 was requested
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _read_request(self, reader) -> Request:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        method, target, _ = request_line.split(" ", 2)
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1")
+            if line in ("\r\n", "\n", ""):
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+            if len(headers) > 100:
+                raise ValueError("Too many headers")
+
+        length = int(headers.get("content-length", 0))
+        if length > self.max_body:
+            raise OverflowError("Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return Request(method.upper(), target, headers, body)
+
+    async def _handle(self, reader, writer):
+        try:
+            try:
+                request = await asyncio.wait_for(self._read_request(reader), timeout=self.timeout)
+            except OverflowError:
+                response = Response(413, b"Payload Too Large")
+            except (ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                response = Response(400, b"Bad Request")
+            else:
+                try:
+                    response = await self.handler(request)
+                except Exception as e:
+                    log.exception("Error while handling %s %s: %s", request.method, request.path, e)
+                    response = Response(500, b"Internal Server Error")
+
+            head = [f"HTTP/1.1 {response.status} {STATUS_TEXT.get(response.status, '')}"]
+            headers = {**response.headers, "Content-Length": str(len(response.body)), "Connection": "close"}
+            head.extend(f"{name}: {value}" for name, value in headers.items())
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + response.body)
+            await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,106 @@
+"""
+file    : bot/outbox.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Alerts that could not be sent before the program stopped.
+
+    On shutdown, sends still in flight after the deadline are cancelled
+    and saved here as JSON lines; on the next start the bot replays them
+    once and clears the file. An alert is one object:
+
+        {"text": "...", "sensor_active": 2, "chat_id": null,
+         "detections": [["2", "2025-06-01T18:03:12"]], "queued_at": "..."}
+
+    chat_id is set for a digest summary of one chat and null for an alert
+    to every subscribed chat.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import json, logging, os, threading
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+
+def alert_detections(sensor_active=None, events: list = None) -> list:
+    """Returns the (sensor_id, datetime) pairs of an alert, one per event or one for now."""
+    if events:
+        return [(event.sensor_id, event.event_time()) for event in events]
+    return [(sensor_active, datetime.now())]
+
+
+def alert_entry(text: str, sensor_active=None, detections: list = None, chat_id: str = None) -> dict:
+    """Builds the outbox form of an alert; detections are (sensor_id, datetime) pairs."""
+    return {
+        "text": text,
+        "sensor_active": sensor_active,
+        "chat_id": chat_id,
+        "detections": [[str(sensor_id), when.isoformat(timespec="seconds")] for sensor_id, when in detections or []],
+        "queued_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def entry_detections(entry: dict) -> list:
+    """Returns the detections of an outbox entry as (sensor_id, datetime) pairs."""
+    return [(sensor_id, datetime.fromisoformat(when)) for sensor_id, when in entry.get("detections", [])]
+
+
+class Outbox:
+    """Append-only file of unsent alerts."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def save(self, entries: list) -> int:
+        """Appends entries to the file and syncs it to disk.
+
+        Returns:
+            int: Number of entries saved.
+        """
+        if not entries:
+            return 0
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as file:
+                for entry in entries:
+                    file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+        return len(entries)
+
+    def take(self) -> list:
+        """Reads and removes every saved entry; unreadable lines are skipped."""
+        with self._lock:
+            try:
+                with open(self.path, encoding="utf-8") as file:
+                    lines = file.readlines()
+            except FileNotFoundError:
+                return []
+            os.remove(self.path)
+
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                log.warning("Skipping unreadable outbox line: %r", line[:80])
+        return entries
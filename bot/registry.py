@@ -0,0 +1,250 @@
+"""
+file    : bot/registry.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Lazy registry of the bot commands found in the 'bot/cmd' directory.
+
+    Each command module is parsed with `ast` instead of being imported, so
+    the command names, descriptions and module paths are known without
+    paying for the imports of every handler at startup. The resulting
+    manifest is cached on disk and only the files whose mtime or size
+    changed are parsed again. A handler module is imported the first time
+    one of its commands is invoked, and its command class is constructed
+    once and reused for every later update.
+
+    The methods a command class declares `blocking` or `cpu_bound` are moved
+    to the bounded pools of bot/concurrency.py when the object is built, and
+    every invocation runs under the command's timeout with its latency
+    recorded.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import ast, asyncio, importlib, json, logging, os, time
+from .concurrency import executor, command_stats
+from .config import get_config
+
+log = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 2
+
+# Literal class attributes copied from a command class into its manifest entry
+MANIFEST_ATTRIBUTES = ("scopes", "descriptions")
+
+
+class CommandRegistry:
+    """Builds, caches and lazily resolves the command manifest of 'bot/cmd'."""
+
+    def __init__(self, cmd_dir: str = None, package: str = "bot.cmd", manifest_path: str = None):
+        """
+        Parameters:
+        cmd_dir (str): Directory holding the command modules.
+        package (str): Dotted package name of cmd_dir.
+        manifest_path (str): Where the cached manifest is stored.
+        """
+        here = os.path.dirname(__file__)
+        self.cmd_dir = cmd_dir or os.path.join(here, "cmd")
+        self.package = package
+        self.manifest_path = manifest_path or os.path.join(here, ".cmd_manifest.json")
+        self._manifest = None
+        self._instances = {}
+        self._handlers = {}
+
+    def _load_cache(self):
+        """Returns the cached per-file entries, or an empty dict if unusable."""
+        try:
+            with open(self.manifest_path, "r") as file:
+                data = json.load(file)
+            if data.get("version") == MANIFEST_VERSION:
+                return data.get("files", {})
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _save_cache(self, files: dict):
+        """Writes the per-file entries to disk, ignoring read-only installs."""
+        tmp_path = f"{self.manifest_path}.tmp"
+        try:
+            with open(tmp_path, "w") as file:
+                json.dump({"version": MANIFEST_VERSION, "files": files}, file, indent=1)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            log.warning("Could not write command manifest: %s", e)
+
+    def _parse(self, path: str, module_name: str):
+        """Extracts the command entry of one module without importing it.
+
+        The module must define a class named like the file that has a
+        `command` method, the same rule the bot always used to register commands.
+        """
+        with open(path, "r", encoding="utf-8") as file:
+            tree = ast.parse(file.read(), filename=path)
+
+        for node in tree.body:
+            if isinstance(node, ast.ClassDef) and node.name == module_name:
+                methods = {
+                    item.name for item in node.body
+                    if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))
+                }
+                if "command" not in methods:
+                    log.warning("%s does not contain a 'command' method.", module_name)
+                    return None
+
+                doc = ast.get_docstring(node)
+                entry = {
+                    "name": module_name.lower(),
+                    "module": f"{self.package}.{module_name}",
+                    "class": node.name,
+                    "description": doc.splitlines()[0] if doc else "No description",
+                }
+                entry.update(self._literal_attributes(node))
+                return entry
+
+        log.warning("%s.py has no class named %s", module_name, module_name)
+        return None
+
+    @staticmethod
+    def _literal_attributes(node):
+        """Reads the MANIFEST_ATTRIBUTES assigned as literals in a class body."""
+        attributes = {}
+        for item in node.body:
+            if not isinstance(item, ast.Assign):
+                continue
+            for target in item.targets:
+                if isinstance(target, ast.Name) and target.id in MANIFEST_ATTRIBUTES:
+                    try:
+                        value = ast.literal_eval(item.value)
+                    except ValueError:
+                        log.warning("%s.%s is not a literal, ignored.", node.name, target.id)
+                        continue
+                    attributes[target.id] = list(value) if isinstance(value, tuple) else value
+        return attributes
+
+    def manifest(self, refresh: bool = False) -> dict:
+        """
+        Returns the command manifest, keyed by command name.
+
+        Parameters:
+        refresh (bool): Re-check the file mtimes even if already loaded.
+
+        Returns:
+        dict: name -> {"name", "module", "class", "description"} plus the
+            optional "scopes" and "descriptions" declared by the class
+        """
+        if self._manifest is not None and not refresh:
+            return self._manifest
+
+        cached = self._load_cache()
+        files = {}
+        changed = False
+
+        for entry in sorted(os.scandir(self.cmd_dir), key=lambda e: e.name):
+            if not entry.name.endswith(".py") or not entry.is_file():
+                continue
+
+            stat = entry.stat()
+            key = [stat.st_mtime_ns, stat.st_size]
+            previous = cached.get(entry.name)
+            if previous and previous.get("key") == key:
+                files[entry.name] = previous
+                continue
+
+            try:
+                command = self._parse(entry.path, entry.name[:-3])
+            except (OSError, SyntaxError) as e:
+                log.error("Failed to parse command module '%s': %s", entry.name, e)
+                command = None
+            files[entry.name] = {"key": key, "command": command}
+            changed = True
+
+        if changed or set(files) != set(cached):
+            self._save_cache(files)
+
+        self._manifest = {
+            item["command"]["name"]: item["command"]
+            for item in files.values() if item.get("command")
+        }
+        return self._manifest
+
+    def instance(self, name: str):
+        """Imports the module of a command on first use and returns its shared handler object.
+
+        The command class is constructed once per process and reused for every update.
+        """
+        if name not in self._instances:
+            entry = self.manifest()[name]
+            module = importlib.import_module(entry["module"])
+            command_class = getattr(module, entry["class"])
+            instance = command_class()
+            executor.offload(instance, getattr(command_class, "blocking", ()), getattr(command_class, "cpu_bound", ()))
+            self._instances[name] = instance
+        return self._instances[name]
+
+    def resolve(self, name: str, attr: str = "command"):
+        """Returns the requested handler method of the shared command object."""
+        key = (name, attr)
+        if key not in self._handlers:
+            self._handlers[key] = getattr(self.instance(name), attr)
+        return self._handlers[key]
+
+    def lazy(self, name: str, attr: str = "command"):
+        """Returns an async callback that resolves the handler on its first invocation.
+
+        The handler is stopped after the `timeout` of its command class
+        (COMMAND_TIMEOUT when not set, 0 for none) and its latency is recorded.
+        A blocking call it was awaiting keeps running in its pool until it
+        returns (see bot/concurrency.py).
+        """
+        label = name if attr == "command" else f"{name}.{attr}"
+
+        async def callback(update, context):
+            handler = self.resolve(name, attr)
+            timeout = getattr(self.instance(name), "timeout", None)
+            if timeout is None:
+                timeout = get_config().COMMAND_TIMEOUT
+            started = time.monotonic()
+            outcome = "error"
+            try:
+                result = await asyncio.wait_for(handler(update, context), timeout or None)
+                outcome = "ok"
+                return result
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                log.warning("⌛ /%s timed out after %s s", label, timeout)
+                message = getattr(update, "effective_message", None)
+                if message is not None:
+                    await message.reply_text(f"⌛ /{name} took longer than {timeout:g} s and was stopped.")
+            finally:
+                seconds = time.monotonic() - started
+                command_stats.record(label, seconds, outcome)
+                log.debug("/%s handled in %.0f ms (%s)", label, seconds * 1000, outcome)
+
+        callback.__name__ = f"{name}_{attr}"
+        return callback
+
+    def register(self, app):
+        """Registers a lazy CommandHandler for every command of the manifest."""
+        from telegram.ext import CommandHandler
+
+        for name in self.manifest():
+            app.add_handler(CommandHandler(name, self.lazy(name)))
+            log.debug("Registered command: /%s", name)
+
+
+# Process-wide registry shared by the bot and the help/setcommands commands
+registry = CommandRegistry()
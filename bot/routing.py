@@ -0,0 +1,185 @@
+"""
+file    : bot/routing.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Routing of alerts to chats by their subscription rules.
+
+    The rules of db/chat_subscriptions are compiled into an index from
+    sensor ID to (chat, hour mask, minimum burst) entries, with one extra
+    list for chats subscribed to every sensor. The hour mask has bit h set
+    when the chat wants alerts during hour h, so quiet hours cost a single
+    AND. Routing an alert only visits the entries of the sensors it
+    contains; chats without a rule get every alert and are never looked
+    at individually.
+
+    A minimum burst of N means the chat is alerted once its sensors saw at
+    least N detections within the burst window (SUBSCRIPTION_BURST_SECONDS).
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from db.chat_settings import ChatSettingsStore
+from .config import get_config, get_async_db
+
+ALL_HOURS = (1 << 24) - 1
+
+
+def hour_mask(quiet_start: int = None, quiet_end: int = None) -> int:
+    """Returns the 24-bit mask of the hours outside [quiet_start, quiet_end), wrapping past midnight."""
+    if quiet_start is None or quiet_end is None or quiet_start == quiet_end:
+        return ALL_HOURS
+    mask = ALL_HOURS
+    hour = quiet_start
+    while hour != quiet_end:
+        mask &= ~(1 << hour)
+        hour = (hour + 1) % 24
+    return mask
+
+
+class RoutingIndex:
+    """Resolves the recipient chats of an alert from the compiled subscription rules."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_sensor = None  # sensor_id -> [(chat_id, mask, min_burst)], None until loaded
+        self._all_sensors = []  # Entries of chats subscribed to every sensor
+        self._rules = {}  # chat_id -> (sensors, quiet_start, quiet_end, min_burst)
+        self._recent = {}  # sensor_id -> deque of detection times, only with burst rules
+        self._burst_sensors = None  # Sensors whose detections must be kept, None for all
+        self._max_burst = 1  # Largest minimum burst, no deque holds more times than this
+
+    @property
+    def store(self) -> ChatSettingsStore:
+        return ChatSettingsStore(get_config().DATABASE_NAME)
+
+    @property
+    def loaded(self) -> bool:
+        return self._by_sensor is not None
+
+    def rebuild(self):
+        """Reads the rules from the database and recompiles the index; blocking."""
+        self._compile(self.store.subscriptions())
+
+    async def refresh(self):
+        """Reads the rules on the database reader pool and recompiles the index."""
+        self._compile(await get_async_db().read(self.store.subscriptions))
+
+    async def update(self, chat_id, rule: tuple = None):
+        """Stores the rule of a chat on the database writer, None removes it, then refreshes.
+
+        Parameters:
+        rule (tuple): (sensors, quiet_start, quiet_end, min_burst).
+        """
+        if rule is None:
+            await get_async_db().write(self.store.remove_subscription, str(chat_id))
+        else:
+            await get_async_db().write(self.store.set_subscription, str(chat_id), *rule)
+        await self.refresh()
+
+    def _compile(self, subscriptions: list):
+        rules = {chat_id: (sensors, quiet_start, quiet_end, min_burst or 1)
+                 for chat_id, sensors, quiet_start, quiet_end, min_burst in subscriptions}
+
+        by_sensor, all_sensors = {}, []
+        burst_sensors = set()
+        max_burst = max((rule[3] for rule in rules.values()), default=1)
+        for chat_id, (sensors, quiet_start, quiet_end, min_burst) in rules.items():
+            entry = (chat_id, hour_mask(quiet_start, quiet_end), min_burst)
+            if sensors is None:
+                all_sensors.append(entry)
+                if min_burst > 1:
+                    burst_sensors = None
+            else:
+                for sensor_id in sensors:
+                    by_sensor.setdefault(sensor_id, []).append(entry)
+                if min_burst > 1 and burst_sensors is not None:
+                    burst_sensors.update(sensors)
+
+        with self._lock:
+            self._rules = rules
+            self._by_sensor = by_sensor
+            self._all_sensors = all_sensors
+            self._burst_sensors = burst_sensors
+            self._max_burst = max_burst
+            self._recent = {}
+
+    def rule(self, chat_id):
+        """Returns (sensors, quiet_start, quiet_end, min_burst) of a chat, None if it has no rule."""
+        if self._by_sensor is None:
+            self.rebuild()
+        return self._rules.get(str(chat_id))
+
+    def _burst(self, chat_id: str, since: datetime) -> int:
+        """Number of recent detections of the chat's sensors."""
+        sensors = self._rules[chat_id][0]
+        recent = self._recent.values() if sensors is None else (self._recent.get(s, ()) for s in sensors)
+        return sum(sum(1 for when in times if when >= since) for times in recent)
+
+    def route(self, chat_ids, detections: list) -> list:
+        """
+        Returns the chats that should receive an alert.
+
+        Parameters:
+        chat_ids (iterable): Registered chat IDs.
+        detections (list): (sensor_id, datetime) pairs of the alert.
+
+        Returns:
+        list: The chat IDs, in the order given, whose rules accept the alert.
+        """
+        if self._by_sensor is None:
+            self.rebuild()
+
+        with self._lock:
+            if not self._rules:
+                return list(chat_ids)
+
+            window = timedelta(seconds=get_config().SUBSCRIPTION_BURST_SECONDS)
+            if self._burst_sensors is None or self._burst_sensors:
+                for sensor_id, when in detections:
+                    sensor_id = str(sensor_id)
+                    if self._burst_sensors is None or sensor_id in self._burst_sensors:
+                        # Counts only matter up to the largest minimum burst, so a flood
+                        # of detections keeps at most that many times per sensor
+                        times = self._recent.setdefault(sensor_id, deque(maxlen=self._max_burst))
+                        times.append(when)
+                        while times and times[0] < when - window:
+                            times.popleft()
+
+            accepted = set()
+            bursts = set()
+            for sensor_id, when in detections:
+                bit = 1 << when.hour
+                for entries in (self._by_sensor.get(str(sensor_id), ()), self._all_sensors):
+                    for chat_id, mask, min_burst in entries:
+                        if mask & bit:
+                            (accepted if min_burst <= 1 else bursts).add(chat_id)
+
+            if bursts:
+                since = max(when for _, when in detections) - window
+                accepted.update(chat_id for chat_id in bursts
+                                if self._burst(chat_id, since) >= self._rules[chat_id][3])
+
+            return [chat_id for chat_id in chat_ids
+                    if str(chat_id) not in self._rules or str(chat_id) in accepted]
+
+
+# Process-wide routing index shared by the bot and the /subscribe command
+routing = RoutingIndex()
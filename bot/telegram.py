@@ -19,30 +19,77 @@ copyright:
     along with this program. If not, see <https://www.gnu.org/licenses/>
 """
 
-import os, importlib, asyncio, time, socket
+import asyncio, logging, secrets
 from datetime import datetime
 from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, CallbackContext
-from db import DBConnect
-from .config import Config
-from .cmd.changesound import changesound
+from telegram.error import BadRequest, ChatMigrated, Forbidden, RetryAfter
+from telegram.ext import Application, MessageHandler, filters, CallbackContext
+from .config import get_config, get_async_db
+from .registry import registry
+from .concurrency import ChatOrderedUpdateProcessor, executor
+from .connectivity import monitor
+from .webhook import WebhookReceiver
+from .digest import digests
+from .routing import routing
+from .federation import replicate
+from .outbox import Outbox, alert_detections, alert_entry, entry_detections
+from utility.readiness import readiness
+
+log = logging.getLogger(__name__)
+
+# BadRequest messages meaning the chat is gone for good (lowercase)
+PERMANENT_BAD_REQUESTS = (
+    "chat not found",
+    "user not found",
+    "bot was kicked",
+    "bot is not a member",
+    "group chat was deactivated",
+    "user is deactivated",
+    "peer_id_invalid",
+)
+
+def permanent_error(error: Exception):
+    """Returns why a send can never succeed for this chat, or None if it may be retried."""
+    if isinstance(error, Forbidden):
+        # Blocked by the user, kicked from the group or channel, user deactivated
+        return f"forbidden: {error.message}"
+    if isinstance(error, BadRequest):
+        message = error.message.lower()
+        if any(text in message for text in PERMANENT_BAD_REQUESTS):
+            return f"bad request: {error.message}"
+    return None
 
 class TelegramBot:
     def __init__(self):
         """
         Initialize the bot with the API token from .env file.
+        
+        The token is read once; the database and table names are read from the 
+        process-wide config on use, so they follow /reload and SIGHUP.
         """
-        botconfig = Config()
-        self.token = botconfig.__dict__()["TOKEN"]
-        self.db_name = botconfig.__dict__()["DATABASE_NAME"]
-        self.table_name = botconfig.__dict__()["TABLE_NAME"]
-        self.table_name_chatID = botconfig.__dict__()["TABLE_NAME_CHATID"]
+        config = get_config()
+        self.token = config.TOKEN
+        self.loop = None  # Event loop of the running bot, set in post_init
+        self._polling_lock = None  # Created on the bot's event loop in serve()
+        self.mode = "polling"  # Delivery mode in use, see start_delivery()
+        self.webhook = None
+        self.stopping = False  # Set once shutdown started, later alerts go to the outbox
+        self.outbox = Outbox(config.OUTBOX_FILE)
+        self._in_flight = {}  # Send task -> outbox entry, see track()
+        self._serve_task = None
+        self._serve_loop = None
+        self.receive_updates = True  # False on a federation node that is not the leader
+        self.api = None  # Local dashboard API (bot/api.py), set by main in single-process mode
         
         # Create Application (replacing Updater)
-        self.app = Application.builder().token(self.token).build()
-        
-        # Initialize the database connection
-        self.db = DBConnect(self.db_name)
+        builder = Application.builder().token(self.token).post_init(self.post_init)
+        if config.TELEGRAM_API_URL:
+            # Custom Bot API server, e.g. a local fake Bot API for end-to-end tests
+            api_url = config.TELEGRAM_API_URL.rstrip("/")
+            builder = builder.base_url(f"{api_url}/bot").base_file_url(f"{api_url}/file/bot")
+        if config.COMMAND_CONCURRENCY > 1:
+            builder = builder.concurrent_updates(ChatOrderedUpdateProcessor(config.COMMAND_CONCURRENCY))
+        self.app = builder.build()
         
         # Register command handlers dynamically
         self.load_commands()
@@ -52,152 +99,427 @@ class TelegramBot:
         
         # Handler file audio/document audio
         self.app.add_handler(
-            MessageHandler(filters.AUDIO | filters.Document.AUDIO, changesound.handle_audio)
+            MessageHandler(filters.AUDIO | filters.Document.AUDIO, registry.lazy("changesound", "handle_audio"))
         )
 
 
     def load_commands(self):
         """
-        Dynamically loads command handlers from Python files located in the 'cmd' directory.
+        Registers the command handlers listed in the command manifest of the 'cmd' directory.
+        
+        The manifest is built by `CommandRegistry`, which parses each Python file in 
+        the 'cmd' directory for a class with the same name as the filename (without 
+        the `.py` extension) that contains a `command` method. The manifest is cached 
+        on disk keyed by file mtimes, and a command module is only imported the first 
+        time the command is invoked.
         
-        This function scans the 'cmd' directory for Python files and attempts to dynamically 
-        import each module. It then checks whether the module contains a class with the same 
-        name as the filename (without the `.py` extension). If the class exists and contains 
-        a `command` method, it registers the method as a Telegram bot command handler.
+        A command class may list the methods that block (`blocking`) or use the 
+        CPU for long (`cpu_bound`); they are run in the bounded thread and process 
+        pools of bot/concurrency.py, so one slow command does not hold up the other 
+        chats. Each command runs under its `timeout` (COMMAND_TIMEOUT by default) 
+        and its latency is recorded for /status.
 
         This approach allows the bot to automatically detect and register new commands 
-        without requiring manual updates to the codebase.
-
-        Raises:
-            ImportError: If a module fails to be imported.
-            AttributeError: If the expected class does not exist in the module.
+        without requiring manual updates to the codebase, and keeps startup free of the 
+        imports the handlers need.
         """
-        # Define the path to the command directory
-        cmd_dir = os.path.join(os.path.dirname(__file__), 'cmd')
-        print("\nInitializing Commands: ")
-
-        # Iterate through all files in the 'cmd' directory
-        for filename in os.listdir(cmd_dir):
-            if filename.endswith(".py"):  # Only process Python files
-                module_name = filename[:-3]  # Extract module name by removing '.py' extension
-                class_name = module_name  # Expect class name to match filename
-
-                try:
-                    # Dynamically import the module
-                    module = importlib.import_module(f'bot.cmd.{module_name}')
-                    print(f"Checking module: {module_name}, expected class: {class_name}")  # Debug log
-
-                    # Check if the module contains a class with the expected name
-                    if hasattr(module, class_name):
-                        command_class = getattr(module, class_name)
-
-                        # Ensure the class contains a 'command' method
-                        if hasattr(command_class, 'command'):
-                            command_method = getattr(command_class, 'command')
-
-                            # Register the command handler
-                            self.app.add_handler(CommandHandler(module_name, command_method))
-                            print(f"Registered command: /{module_name}")
-                        else:
-                            print(f"Warning: {class_name} does not contain a 'command' method.")
-                    else:
-                        print(f"Warning: {module_name}.py has no class named {class_name}")
-
-                except ImportError as e:
-                    print(f"Error: Failed to import module '{module_name}': {e}")
-                except AttributeError as e:
-                    print(f"Error: Module '{module_name}' is missing expected attributes: {e}")
-
-        print()  # Print an empty line for better output readability
+        log.info("Initializing Commands")
+        registry.register(self.app)
+        
+    @property
+    def db(self):
+        """The shared database, awaitable and run off the event loop (see db/aio.py)."""
+        return get_async_db()
+    
+    @property
+    def table_name(self):
+        return get_config().TABLE_NAME
+    
+    @property
+    def table_name_chatID(self):
+        return get_config().TABLE_NAME_CHATID
+        
+    async def post_init(self, application: Application) -> None:
+        """Runs once the bot is initialized and publishes the command list if it changed."""
+        # From now on notifications are scheduled on the bot's own event loop
+        self.loop = asyncio.get_running_loop()
+        readiness.mark_ready("telegram")
+        self.replay_outbox()
+        
+        try:
+            sync = registry.resolve("setcommands", "sync")
+            if await sync(application.bot):
+                log.info("Bot commands published to Telegram")
+            else:
+                log.info("Bot commands already up to date")
+        except Exception as e:
+            log.warning("Failed to publish bot commands: %s", e)
         
     async def handle_message(self, update: Update, context: CallbackContext) -> None:
         """Handles text messages sent by the user."""
         text = update.message.text
         await update.message.reply_text(f"You said: {text}, please send command /help")
         
-    async def send_message(self, text: str, sensor_active: int):
-        """Sends a message to all registered users concurrently and logs the status in the database."""
+    def log_rows(self, chat_id: str, status: str, detections: list):
+        """Builds one log row per (sensor_id, datetime) detection for one chat."""
+        return [{
+            "date": when.strftime("%m/%d/%Y"),
+            "time": when.strftime("%H:%M:%S"),
+            "chat_id": chat_id,
+            "sensor_active": sensor_id,
+            "status": status
+        } for sensor_id, when in detections]
+    
+    async def send_to_user(self, chat_id, text: str, max_retries: int = 5, retry_delay: int = 3):
+        """Sends a message to one chat with retries.
+        
+        Errors that will never go away (the bot was blocked or kicked, the chat
+        no longer exists) are not retried: the chat is deactivated so later alerts
+        skip it, until it sends /start again. A group upgraded to a supergroup is
+        moved to its new ID and the message is sent there.
+        
+        Returns:
+            str: "success", "failed" or "deactivated", the status written to the log table.
+        """
+        attempt = 0
+        status = "failed"  # Default status in case of failure
+        
+        while attempt < max_retries:
+            try:
+                # Check if chat_id is valid
+                if chat_id is not None and chat_id != "":  # Only attempt if the chat_id is not empty or None
+                    await self.app.bot.send_message(chat_id=chat_id, text=text)
+                    status = "success"
+                    break
+            
+            except ChatMigrated as e:
+                log.info("Chat %s migrated to %s", chat_id, e.new_chat_id, extra={"chat_id": chat_id})
+                await self.db.migrate_chatID(self.table_name_chatID, str(chat_id), str(e.new_chat_id))
+                await replicate(chat_id, e.new_chat_id)
+                chat_id = e.new_chat_id
+                continue
+            
+            except RetryAfter as e:
+                # Flood control, wait as long as Telegram asks without using up an attempt
+                retry_after = e.retry_after
+                if hasattr(retry_after, "total_seconds"):  # A timedelta in newer versions
+                    retry_after = retry_after.total_seconds()
+                log.warning("Flood control for %s, waiting %s seconds", chat_id, retry_after)
+                await asyncio.sleep(retry_after)
+                continue
+            
+            except Exception as e:
+                reason = permanent_error(e)
+                if reason:
+                    log.warning("Deactivating chat %s: %s", chat_id, reason, extra={"chat_id": chat_id})
+                    await self.db.deactivate_chatID(self.table_name_chatID, str(chat_id), reason)
+                    await replicate(chat_id)
+                    status = "deactivated"
+                    break
+                
+                attempt += 1
+                log.warning("[%d/%d] Failed to send message to %s: %s", attempt, max_retries, chat_id, e,
+                            extra={"chat_id": chat_id})
+                
+                if attempt < max_retries:
+                    log.info("Retrying in %s seconds...", retry_delay)
+                    await asyncio.sleep(retry_delay)
+                else:
+                    log.error("Message to %s failed after %d attempts", chat_id, max_retries,
+                              extra={"chat_id": chat_id})
+        
+        return status
+        
+    async def send_message(self, text: str, sensor_active: int, events: list = None, detections: list = None):
+        """Sends a message to all registered users concurrently and logs the status in the database.
+        
+        When events is given (a batch flushed by an edge node), the message is sent
+        once per chat and one log row is written per event and chat, all in a single
+        executemany. detections, (sensor_id, datetime) pairs, replaces events for
+        alerts replayed from the outbox.
+        
+        The recipients are the chats whose subscription rules accept the alert (see
+        bot/routing.py). Chats in digest mode (see bot/digest.py) only get the first
+        alert of each digest window; later alerts are held back and logged when the
+        summary is sent.
+        """
         # Create List for chat_ids
-        self.chat_ids = self.db.load_chat_ids(self.table_name_chatID)
-        max_retries = 5
-        retry_delay = 3
+        self.chat_ids = await self.db.load_chat_ids(self.table_name_chatID)
+        
+        if detections is None and events:
+            detections = [(event.sensor_id, event.event_time()) for event in events]
+        elif detections is None:
+            detections = [(sensor_active, datetime.now())]
         
         # Check if chat_ids is None (i.e., no chat IDs found in the database)
         if not self.chat_ids:
-            print("No chat IDs found. Skipping message send.")
-            self.db.insert_data(
-                table_name=self.table_name,
-                date=datetime.now().strftime("%m/%d/%Y"),
-                time=datetime.now().strftime("%H:%M:%S"),
-                chat_id="None",
-                sensor_active=sensor_active,
-                status="no_chat_ids"
-            )
+            log.warning("No chat IDs found. Skipping message send.")
+            await self.db.insert_many(self.table_name, self.log_rows("None", "no_chat_ids", detections))
             return  # Exit if no chat IDs exist
         
-        async def send_to_user(chat_id: int):
-            """ Helper function to send message with retries """
-            attempt = 0
-            status = "failed"  # Default status in case of failure
-            
-            while attempt < max_retries:
-                try:
-                    # Check if chat_id is valid
-                    if chat_id is not None and chat_id != "":  # Only attempt if the chat_id is not empty or None
-                        await self.app.bot.send_message(chat_id=chat_id, text=text)
-                        status = "success"
-                        break
-                
-                except Exception as e:
-                    attempt += 1
-                    print(f"[{attempt}/{max_retries}] Failed to send message to {chat_id}: {e}")
-                    
-                    if attempt < max_retries:
-                        print(f"Retrying in {retry_delay} seconds...")
-                        await asyncio.sleep(retry_delay)
-                    else:
-                        print(f"Message to {chat_id} failed after {max_retries} attempts")
-                        
-            # Save to database    
-            self.db.insert_data(
-                table_name=self.table_name,
-                date=datetime.now().strftime("%m/%d/%Y"),
-                time=datetime.now().strftime("%H:%M:%S"),
-                chat_id=str(chat_id),
-                sensor_active=sensor_active,
-                status=status
-            )
-
+        # Only the chats whose subscription rules accept this alert
+        chat_ids = routing.route(self.chat_ids, detections)
+        if not chat_ids:
+            log.info("No subscribed chat for this alert. Skipping message send.")
+            await self.db.insert_many(self.table_name, self.log_rows("None", "no_subscribers", detections))
+            return
+        
+        # Digest windows are flushed by tasks on the bot's loop, not a temporary one
+        if asyncio.get_running_loop() is self.loop:
+            chat_ids = [chat_id for chat_id in chat_ids if not digests.hold(chat_id, detections)]
+        
         # Send messages to all chat_ids in parallel
-        await asyncio.gather(*(send_to_user(chat_id) for chat_id in self.chat_ids))
+        statuses = await asyncio.gather(*(self.send_to_user(chat_id, text) for chat_id in chat_ids))
+        
+        # Save to database in one write
+        rows = []
+        for chat_id, status in zip(chat_ids, statuses):
+            rows.extend(self.log_rows(str(chat_id), status, detections))
+        await self.db.insert_many(self.table_name, rows)
+    
+    async def send_digest(self, chat_id: str, text: str, detections: list):
+        """Sends a digest summary to one chat and logs the detections it covers."""
+        status = await self.send_to_user(chat_id, text)
+        await self.db.insert_many(self.table_name, self.log_rows(chat_id, status, detections))
+        
+    def notify(self, text: str, sensor_active: int, events: list = None, detections: list = None):
+        """Sends a message to all registered users from any thread.
+        
+        Once the bot is running the send is scheduled on its event loop and this 
+        returns at once with a concurrent.futures.Future. Before that (the bot is 
+        still starting), the message is sent on a temporary event loop so early 
+        detections are still notified and logged. Once shutdown has started the
+        alert is saved to the outbox and sent on the next start.
+        
+        detections, (sensor_id, datetime) pairs, replaces events for alerts
+        forwarded by another node (see bot/federation.py).
+        """
+        if detections is None:
+            detections = alert_detections(sensor_active, events)
+        entry = alert_entry(text, sensor_active, detections)
         
-    def check_internet(self, host="8.8.8.8", port=53, timeout=3):
-        """Check if the internet connection is available by pinging a reliable host."""
+        if self.stopping:
+            self.outbox.save([entry])
+            log.warning("Shutting down, alert saved to the outbox")
+            return None
+        
+        coro = self.send_message(text, sensor_active=sensor_active, detections=detections)
+        if self.loop is not None and self.loop.is_running():
+            return asyncio.run_coroutine_threadsafe(self.track(entry, coro), self.loop)
+        asyncio.run(coro)
+        return None
+    
+    async def track(self, entry: dict, coro):
+        """Runs a send, keeping its outbox entry until it completes so shutdown can save it."""
+        task = asyncio.current_task()
+        self._in_flight[task] = entry
         try:
-            socket.setdefaulttimeout(timeout)
-            socket.socket(socket.AF_INET, socket.SOCK_STREAM).connect((host, port))
-            return True
+            return await coro
+        finally:
+            del self._in_flight[task]
+    
+    def replay_outbox(self):
+        """Schedules the alerts saved by the previous shutdown; runs on the bot's loop."""
+        entries = self.outbox.take()
+        for entry in entries:
+            detections = entry_detections(entry)
+            text = f"⏪ Delayed alert from {entry.get('queued_at', '?')}:\n{entry['text']}"
+            if entry.get("chat_id"):
+                coro = self.send_digest(entry["chat_id"], text, detections)
+            else:
+                coro = self.send_message(text, entry.get("sensor_active"), detections=detections)
+            asyncio.create_task(self.track(entry, coro))
+        if entries:
+            log.info("Replaying %d alerts saved at the last shutdown", len(entries))
+    
+    def request_stop(self):
+        """Starts a graceful shutdown; safe to call from a signal handler or any thread."""
+        self.stopping = True
+        if self._serve_loop is not None and self._serve_task is not None:
+            self._serve_loop.call_soon_threadsafe(self._serve_task.cancel)
+    
+    async def drain(self, timeout: float) -> dict:
+        """Waits for in-flight sends and pending digests, saving what is not sent in time.
+        
+        Returns:
+            dict: "drained" (sends completed) and "saved" (alerts written to the outbox).
+        """
+        self.stopping = True
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        
+        # Held digests are sent now instead of at the end of their window
+        for chat_id, text, detections in digests.take_all():
+            entry = alert_entry(text, detections=detections, chat_id=chat_id)
+            asyncio.create_task(self.track(entry, self.send_digest(chat_id, text, detections)))
+        await asyncio.sleep(0)  # Let the new tasks register themselves
+        
+        pending = dict(self._in_flight)
+        drained = 0
+        if pending:
+            log.info("Waiting up to %.0f s for %d sends in flight", timeout, len(pending))
+            done, not_done = await asyncio.wait(pending, timeout=max(0, deadline - loop.time()))
+            drained = len(done)
+            for task in not_done:
+                task.cancel()
+            saved = self.outbox.save([pending[task] for task in not_done])
+        else:
+            saved = 0
+        
+        log.info("Shutdown drained %d sends, %d unsent alerts saved to %s", drained, saved, self.outbox.path,
+                 extra={"drained": drained, "saved": saved})
+        return {"drained": drained, "saved": saved}
+        
+    async def resume_polling(self):
+        """Starts fetching updates, if the application is running and not already polling."""
+        async with self._polling_lock:
+            if self.receive_updates and self.app.running and not self.app.updater.running:
+                await self.app.updater.start_polling()
+                log.info("Telegram polling started.")
+    
+    async def pause_polling(self):
+        """Stops fetching updates without shutting the application down."""
+        async with self._polling_lock:
+            if self.app.updater.running:
+                await self.app.updater.stop()
+                log.info("Telegram polling paused.")
+    
+    def set_receiving(self, enabled: bool):
+        """Starts or stops polling for updates from any thread.
+        
+        Federation nodes share one bot token and Telegram allows a single
+        poller per token, so only the leader polls.
+        """
+        self.receive_updates = enabled
+        if self.loop is not None and self.loop.is_running():
+            coro = self.resume_polling() if enabled and monitor.online else self.pause_polling()
+            asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    async def start_webhook(self):
+        """Starts the local webhook listener and registers it with Telegram.
+        
+        Returns:
+            bool: True if webhook delivery is active, False if it could not be set up.
+        """
+        config = get_config()
+        if not config.WEBHOOK_URL:
+            log.warning("TELEGRAM_MODE=webhook but WEBHOOK_URL is not set.")
+            return False
+        
+        # Telegram accepts 1-256 characters A-Z, a-z, 0-9, _ and -
+        secret = config.WEBHOOK_SECRET or secrets.token_urlsafe(32)
+        url = config.WEBHOOK_URL.rstrip("/") + config.WEBHOOK_PATH
+        self.webhook = WebhookReceiver(
+            self.app, path=config.WEBHOOK_PATH, secret=secret,
+            host=config.WEBHOOK_LISTEN, port=config.WEBHOOK_PORT
+        )
+        try:
+            await self.webhook.start(url)
         except Exception as e:
+            log.error("Error while starting the webhook: %s", e)
+            self.webhook = None
             return False
         
-    def run(self):
-        """Start the bot and listen for incoming updates."""
-        print("Bot is running...")
+        log.info("Telegram webhook listening on %s:%d%s", config.WEBHOOK_LISTEN, self.webhook.server.port, config.WEBHOOK_PATH)
+        return True
+    
+    async def start_delivery(self):
+        """Starts receiving updates with the configured mode, falling back to polling."""
+        if get_config().TELEGRAM_MODE == "webhook":
+            if await self.start_webhook():
+                self.mode = "webhook"
+                return
+            log.warning("Falling back to polling.")
+        
+        # start_polling removes any webhook left registered with Telegram
+        self.mode = "polling"
+        if monitor.online:
+            await self.resume_polling()
+    
+    async def on_connectivity_change(self, online: bool):
+        """Pauses polling while offline and resumes it when the connection is back."""
+        if self.mode != "polling":
+            return  # Telegram retries webhook deliveries by itself
+        if online:
+            await self.resume_polling()
+        else:
+            await self.pause_polling()
+    
+    async def serve(self):
+        """Brings the Application up once and keeps it running across connectivity changes.
+        
+        request_stop() cancels this task; the sends in flight are then drained
+        within SHUTDOWN_TIMEOUT before the Application is stopped.
+        """
+        self._serve_loop = asyncio.get_running_loop()
+        self._serve_task = asyncio.current_task()
+        self._polling_lock = asyncio.Lock()
+        monitor.on_change(self.on_connectivity_change)
+        digests.set_sender(self.send_digest)
+        monitor_task = asyncio.create_task(monitor.run())
         
-        # Loop until internet is available
-        while True:
-            if self.check_internet():
-                print("Internet connection is available. Starting bot...")
+        # Load the chat settings off the loop, so routing an alert never reads SQLite here
+        try:
+            await routing.refresh()
+            await digests.load()
+        except Exception as e:
+            log.error("Error while loading the chat settings: %s", e)
+        
+        try:
+            # The LAN dashboard does not depend on Telegram, so it is served while offline too
+            if self.api is not None:
                 try:
-                    self.app.run_polling()
+                    await self.api.start()
+                    log.info("Dashboard API listening on %s:%d", self.api.server.host, self.api.server.port)
+                except OSError as e:
+                    log.error("Error while starting the dashboard API: %s", e)
+                    self.api = None
+            
+            # Initializing calls getMe, so retry with backoff until the Bot API answers
+            delay = monitor.min_backoff
+            while True:
+                await monitor.wait_online()
+                try:
+                    await self.app.initialize()
+                    break
                 except Exception as e:
-                    print(f"Error while running the bot: {e}")
-                    print("Restarting bot in 5 seconds...")
-                    time.sleep(5)
-            else:
-                print("No internet connection. Retrying in 5 seconds...")
-                time.sleep(5)
-        # loop = asyncio.new_event_loop()
-        # asyncio.set_event_loop(loop)
-        # loop.run_until_complete(self.app.run_polling())
-        # loop.run_forever()
+                    log.error("Error while initializing the bot: %s", e)
+                    log.info("Retrying in %s seconds...", delay)
+                    monitor.check_now()
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, monitor.max_backoff)
+            
+            if self.app.post_init:
+                await self.app.post_init(self.app)
+            await self.app.start()
+            
+            # Polling follows the connectivity monitor from here on
+            await self.start_delivery()
+            await asyncio.Event().wait()
+        
+        finally:
+            log.info("Bot shutting down...")
+            # No new updates first, then the sends already started
+            if self.webhook is not None:
+                await self.webhook.stop()
+            await self.pause_polling()
+            if self.api is not None:
+                await self.api.stop()
+            if self.app.running:
+                await self.drain(get_config().SHUTDOWN_TIMEOUT)
+            monitor_task.cancel()
+            if self.app.running:
+                await self.app.stop()
+            await self.app.shutdown()
+            executor.shutdown()
+            # Log rows of the drained sends are still queued for the database writer
+            await asyncio.to_thread(self.db.close, get_config().SHUTDOWN_TIMEOUT)
+        
+    def run(self):
+        """Start the bot and listen for incoming updates."""
+        log.info("Bot is running...")
+        try:
+            asyncio.run(self.serve())
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            pass
+        log.info("Bot stopped.")
@@ -0,0 +1,86 @@
+"""
+file    : bot/webhook.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Receives Telegram updates pushed to a webhook and hands them to the
+    same Application (and therefore the same handler registry) that
+    polling uses, by putting them on `app.update_queue`.
+
+    Every request must carry the secret token registered with setWebhook
+    in the X-Telegram-Bot-Api-Secret-Token header.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import hmac, json, logging
+from telegram import Update
+from .httpserver import HttpServer, Response
+
+log = logging.getLogger(__name__)
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+
+
+class WebhookReceiver:
+    """Local HTTP listener that feeds webhook updates into an Application."""
+
+    def __init__(self, app, path: str, secret: str, host: str = "0.0.0.0", port: int = 8443):
+        """
+        Parameters:
+        app (Application): The running bot application.
+        path (str): URL path Telegram posts updates to.
+        secret (str): Secret token registered with setWebhook.
+        host (str), port (int): Address of the local listener.
+        """
+        self.app = app
+        self.path = path
+        self.secret = secret
+        self.server = HttpServer(self.handle, host=host, port=port)
+        self.received = 0
+
+    async def handle(self, request):
+        if request.path != self.path:
+            return Response(404, b"Not Found")
+        if request.method != "POST":
+            return Response(405, b"Method Not Allowed")
+
+        token = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(token.encode(), self.secret.encode()):
+            log.warning("Webhook request with an invalid secret token rejected")
+            return Response(403, b"Forbidden")
+
+        try:
+            update = Update.de_json(json.loads(request.body), self.app.bot)
+        except (ValueError, TypeError, KeyError):
+            return Response(400, b"Bad Request")
+
+        await self.app.update_queue.put(update)
+        self.received += 1
+        return Response(200, b"OK")
+
+    async def start(self, url: str):
+        """Starts the listener and registers url with Telegram."""
+        await self.server.start()
+        try:
+            await self.app.bot.set_webhook(url=url, secret_token=self.secret, allowed_updates=Update.ALL_TYPES)
+        except Exception:
+            await self.server.stop()
+            raise
+
+    async def stop(self):
+        await self.server.stop()
@@ -20,8 +20,25 @@ copyright:
 """
 
 import os
+import logging
 import sqlite3
+import threading
 from pathlib import Path
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+# SQL expressions turning the TEXT date ("%m/%d/%Y") and time ("%H:%M:%S")
+# columns of the log table into sortable ISO strings
+LOG_DATE_ISO = "(substr(date, 7, 4) || '-' || substr(date, 1, 2) || '-' || substr(date, 4, 2))"
+LOG_DATETIME_ISO = f"({LOG_DATE_ISO} || ' ' || time)"
+
+# Soft-delete columns added to an existing chat ID table
+CHAT_COLUMNS = {
+    "active": "INTEGER NOT NULL DEFAULT 1",
+    "deactivated_at": "TEXT",
+    "reason": "TEXT",
+}
 
 class DBConnect:
     """
@@ -35,17 +52,27 @@ class DBConnect:
         name_db (str): Name of the SQLite database file.
         """
         if not name_db:
-            print("Information: Please insert database name file")
+            log.info("Please insert database name file")
             return
         
         self.name_db = name_db
+        self._chat_tables = set()  # Chat ID tables already created and migrated
+        self._chat_tables_lock = threading.Lock()
     
     def create(self):
         """
         Create or open the database file.
+        
+        The file is switched to WAL journaling, so reads are not blocked while a
+        write is in progress (the mode is stored in the file). A new file is
+        created with incremental auto-vacuum for db/retention.py; an existing
+        one can only be switched offline, see `python -m db.retention`.
         """
         connect = sqlite3.connect(self.name_db)
         cursor = connect.cursor()
+        # Only takes effect before the first table is created
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+        cursor.execute("PRAGMA journal_mode=WAL;")
         
         # Commit the connection to ensure database integrity
         connect.commit()
@@ -105,27 +132,34 @@ class DBConnect:
             connect.commit()
         
         except Exception as e:
-            print("Error: ", e)
+            log.error("Error: %s", e)
             
         finally:
             # Ensure the database connection is closed properly
             connect.close()
             
-    def store_chatID(self, table_name: str, chat_id: str):
+    def insert_many(self, table_name: str, rows: list):
         """
-        Store chat_id data into the specified table. If the table does not exist, it will be created.
+        Insert several log rows into the specified table with a single executemany.
+        If the table does not exist, it will be created.
         
         Parameters:
         table_name (str): Name of the table to insert data into.
-        chat_id(str): chat_id value (TEXT format).
+        rows (list): Dicts with the keys date, time, chat_id, sensor_active and status,
+            with the same meaning as the arguments of insert_data.
         """
+        connect = None
         try:
-            # Validate table name
+            # Validate the table name
             if not table_name:
                 raise ValueError("Please insert table name")
+            
             if not table_name.isidentifier():
                 raise ValueError("Invalid table name")
             
+            if not rows:
+                return
+            
             # Connect to the SQLite database
             connect = sqlite3.connect(self.name_db)
             cursor = connect.cursor()
@@ -133,31 +167,118 @@ class DBConnect:
             # Create table if it does not exist
             cursor.execute(f"""
                 CREATE TABLE IF NOT EXISTS "{table_name}" (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    chat_id TEXT UNIQUE
+                    date TEXT, 
+                    time TEXT,
+                    chat_id TEXT,
+                    sensor_active INTEGER,
+                    status TEXT
                 );
             """)
             
-            # Insert chat_id only if it doesn't already exist
+            # Insert all rows in one transaction
+            cursor.executemany(f"""
+                INSERT INTO "{table_name}" (date, time, chat_id, sensor_active, status) 
+                VALUES (:date, :time, :chat_id, :sensor_active, :status);
+            """, rows)
+            
+            connect.commit()
+        
+        except Exception as e:
+            log.error("Error: %s", e)
+            
+        finally:
+            # Ensure the database connection is closed properly
+            if connect is not None:
+                connect.close()
+            
+    def _prepare_chat_table(self, cursor, table_name: str):
+        """
+        Create the chat ID table, or add the soft-delete columns to an older one.
+        Done once per table for this object.
+        """
+        with self._chat_tables_lock:
+            if table_name in self._chat_tables:
+                return
+            self._migrate_chat_table(cursor, table_name)
+            self._chat_tables.add(table_name)
+    
+    def _migrate_chat_table(self, cursor, table_name: str):
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS "{table_name}" (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                chat_id TEXT UNIQUE,
+                active INTEGER NOT NULL DEFAULT 1,
+                deactivated_at TEXT,
+                reason TEXT
+            );
+        """)
+        cursor.execute(f'PRAGMA table_info("{table_name}");')
+        existing = {row[1] for row in cursor.fetchall()}
+        for column, definition in CHAT_COLUMNS.items():
+            if column not in existing:
+                cursor.execute(f'ALTER TABLE "{table_name}" ADD COLUMN {column} {definition};')
+    
+    def prepare_chat_table(self, table_name: str):
+        """
+        Create or migrate the chat ID table ahead of reads that must not write.
+        
+        Parameters:
+        table_name (str): The name of the table where chat IDs are stored.
+        """
+        if not table_name or not table_name.isidentifier():
+            raise ValueError("Invalid table name")
+        connect = sqlite3.connect(self.name_db)
+        try:
+            self._prepare_chat_table(connect.cursor(), table_name)
+            connect.commit()
+        finally:
+            connect.close()
+    
+    def store_chatID(self, table_name: str, chat_id: str):
+        """
+        Store chat_id data into the specified table. If the table does not exist, it will be created.
+        
+        Parameters:
+        table_name (str): Name of the table to insert data into.
+        chat_id(str): chat_id value (TEXT format).
+        """
+        try:
+            # Validate table name
+            if not table_name:
+                raise ValueError("Please insert table name")
+            if not table_name.isidentifier():
+                raise ValueError("Invalid table name")
+            
+            # Connect to the SQLite database
+            connect = sqlite3.connect(self.name_db)
+            cursor = connect.cursor()
+            
+            # Create table if it does not exist
+            self._prepare_chat_table(cursor, table_name)
+            
+            # Insert chat_id, or reactivate it if it was deactivated
             cursor.execute(f"""
-                INSERT OR IGNORE INTO "{table_name}" (chat_id) VALUES (?);
+                INSERT INTO "{table_name}" (chat_id) VALUES (?)
+                ON CONFLICT (chat_id) DO UPDATE SET active = 1, deactivated_at = NULL, reason = NULL;
             """, (chat_id,))
             
             connect.commit()
             
         except Exception as e:
-            print("Error: ", e)
+            log.error("Error: %s", e)
         
         finally:
             # Ensure the database connection is closed properly
             connect.close()
             
-    def load_chat_ids(self, table_name: str):
+    def load_chat_ids(self, table_name: str, prepare: bool = True):
         """
-        Load all chat IDs from the database.
+        Load the chat IDs of all active chats from the database.
         
         Parameters:
         table_name (str): The name of the table where chat IDs are stored.
+        prepare (bool): Create or migrate the table first; False for a read-only
+            call after prepare_chat_table().
         
         Returns:
         A set containing unique chat IDs
@@ -171,8 +292,10 @@ class DBConnect:
             connect = sqlite3.connect(self.name_db)
             cursor = connect.cursor()
 
-            # Retrieve all chat IDs from the table
-            cursor.execute(f"SELECT chat_id FROM {table_name}")
+            # Retrieve the chat IDs that were not deactivated
+            if prepare:
+                self._prepare_chat_table(cursor, table_name)
+            cursor.execute(f'SELECT chat_id FROM "{table_name}" WHERE active = 1')
             rows = cursor.fetchall()  # Fetch all query results
             
             if not rows:
@@ -185,7 +308,7 @@ class DBConnect:
             return chat_ids
 
         except Exception as e:
-            print(f"Error loading chat IDs: {e}")
+            log.error("Error loading chat IDs: %s", e)
             return set()  # Return an empty set if an error occurs
         
         finally:
@@ -225,9 +348,96 @@ class DBConnect:
             status = True
             
         except Exception as e:
-            print("Error: ", e)
+            log.error("Error: %s", e)
             status = False    
         
         finally:
             connect.close()
-            return status
\ No newline at end of file
+            return status
+    
+    def deactivate_chatID(self, table_name: str, chat_id: str, reason: str):
+        """
+        Mark a chat as inactive, e.g. after the user blocked the bot. The row is kept
+        and store_chatID (sent by /start) reactivates it.
+        
+        Parameters:
+        table_name (str): Name of the chat ID table.
+        chat_id (str): The chat_id to deactivate (TEXT format).
+        reason (str): Why the chat was deactivated.
+        """
+        connect = None
+        try:
+            if not table_name or not table_name.isidentifier():
+                raise ValueError("Invalid table name")
+            
+            connect = sqlite3.connect(self.name_db)
+            cursor = connect.cursor()
+            self._prepare_chat_table(cursor, table_name)
+            cursor.execute(f"""
+                UPDATE "{table_name}" SET active = 0, deactivated_at = ?, reason = ? WHERE chat_id = ?;
+            """, (datetime.now().isoformat(timespec="seconds"), reason, str(chat_id)))
+            connect.commit()
+        
+        except Exception as e:
+            log.error("Error: %s", e)
+        
+        finally:
+            if connect is not None:
+                connect.close()
+    
+    def migrate_chatID(self, table_name: str, old_chat_id: str, new_chat_id: str):
+        """
+        Replace the ID of a group that was upgraded to a supergroup.
+        
+        Parameters:
+        table_name (str): Name of the chat ID table.
+        old_chat_id (str), new_chat_id (str): The previous and the new chat ID.
+        """
+        connect = None
+        try:
+            if not table_name or not table_name.isidentifier():
+                raise ValueError("Invalid table name")
+            
+            connect = sqlite3.connect(self.name_db)
+            cursor = connect.cursor()
+            self._prepare_chat_table(cursor, table_name)
+            
+            # The new ID may already be registered, e.g. by /start in the supergroup
+            cursor.execute(f'INSERT OR IGNORE INTO "{table_name}" (chat_id) VALUES (?);', (str(new_chat_id),))
+            cursor.execute(f'DELETE FROM "{table_name}" WHERE chat_id = ?;', (str(old_chat_id),))
+            connect.commit()
+        
+        except Exception as e:
+            log.error("Error: %s", e)
+        
+        finally:
+            if connect is not None:
+                connect.close()
+    
+    def chat_status(self, table_name: str, chat_id: str):
+        """
+        Read the registration of one chat. Like the other chat ID methods it
+        creates or migrates the table first, so run it as a write.
+        
+        Parameters:
+        table_name (str): Name of the chat ID table.
+        chat_id (str): The chat_id to look up (TEXT format).
+        
+        Returns:
+        (active, reason): active is True or False, or None if the chat is not registered.
+        """
+        if not table_name or not table_name.isidentifier():
+            raise ValueError("Invalid table name")
+        
+        connect = sqlite3.connect(self.name_db)
+        try:
+            cursor = connect.cursor()
+            self._prepare_chat_table(cursor, table_name)
+            connect.commit()
+            cursor.execute(f'SELECT active, reason FROM "{table_name}" WHERE chat_id = ?;', (str(chat_id),))
+            row = cursor.fetchone()
+            if row is None:
+                return None, None
+            return bool(row[0]), row[1]
+        finally:
+            connect.close()
@@ -0,0 +1,134 @@
+"""_summary_
+file    : db/aio.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Awaitable access to DBConnect, or any other store, for code running on
+    an event loop.
+
+    Every write is queued to one writer thread, so writes are serialised
+    in the order they were made and never run on the event loop. Reads
+    run on a small thread pool next to it; with the database in WAL mode
+    (see DBConnect.create) they do not wait for the writer. Each call
+    returns a future the coroutine awaits while the loop keeps serving
+    other updates. Readers never change the schema: a chat ID table is
+    created or migrated once on the writer before it is first read.
+
+        adb = AsyncDB(get_db)
+        chat_ids = await adb.load_chat_ids("chat_ids")
+        await adb.insert_many("sensor_logs", rows)
+        rules = await adb.read(store.subscriptions)
+
+copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import asyncio, logging, queue, threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+class AsyncDB:
+    """Runs DBConnect methods off the event loop: writes on one thread, reads on a pool."""
+
+    def __init__(self, get_db, readers: int = 2):
+        """
+        Parameters:
+        get_db (callable): Returns the DBConnect to use, called for each operation
+            so a reloaded database name is followed.
+        readers (int): Number of threads serving reads.
+        """
+        self.get_db = get_db
+        self._writes = queue.SimpleQueue()
+        self._writer = None
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-read")
+        self._lock = threading.Lock()
+        self._prepared = set()  # (database name, table) prepared on the writer
+
+    def _target(self, method):
+        """A bound method as given, or the named DBConnect method."""
+        return method if callable(method) else getattr(self.get_db(), method)
+
+    def _write_loop(self):
+        while True:
+            item = self._writes.get()
+            if item is None:
+                break
+            future, method, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._target(method)(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+
+    def submit_write(self, method, *args, **kwargs) -> Future:
+        """Queues a write for the writer thread; callable from any thread.
+
+        method is the name of a DBConnect method, or a callable such as the
+        bound method of another store.
+        """
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="db-writer", daemon=True)
+                self._writer.start()
+        future = Future()
+        self._writes.put((future, method, args, kwargs))
+        return future
+
+    async def write(self, method, *args, **kwargs):
+        """Runs a write method on the writer thread and returns its result."""
+        return await asyncio.wrap_future(self.submit_write(method, *args, **kwargs))
+
+    async def read(self, method, *args, **kwargs):
+        """Runs a read-only method on the reader pool and returns its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, lambda: self._target(method)(*args, **kwargs))
+
+    async def load_chat_ids(self, table_name: str):
+        key = (self.get_db().name_db, table_name)
+        if key not in self._prepared:
+            await self.write("prepare_chat_table", table_name)
+            self._prepared.add(key)
+        return await self.read("load_chat_ids", table_name, prepare=False)
+
+    async def insert_many(self, table_name: str, rows: list):
+        return await self.write("insert_many", table_name, rows)
+
+    async def store_chatID(self, table_name: str, chat_id: str):
+        return await self.write("store_chatID", table_name, chat_id)
+
+    async def remove_chatID(self, table_name: str, chat_id: str):
+        return await self.write("remove_chatID", table_name, chat_id)
+
+    async def deactivate_chatID(self, table_name: str, chat_id: str, reason: str):
+        return await self.write("deactivate_chatID", table_name, chat_id, reason)
+
+    async def migrate_chatID(self, table_name: str, old_chat_id: str, new_chat_id: str):
+        return await self.write("migrate_chatID", table_name, old_chat_id, new_chat_id)
+
+    def close(self, timeout: float = None):
+        """Finishes the queued writes and stops the writer thread; blocks until done or timeout.
+
+        A later write starts the writer again, so alerts sent after shutdown are still logged.
+        """
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._writes.put(None)
+            writer.join(timeout)
+            if writer.is_alive():
+                log.warning("Database writer still busy after %s seconds", timeout)
@@ -0,0 +1,171 @@
+"""_summary_
+file    : db/chat_settings.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Per-chat notification settings, one row per chat that changed a
+    default. A chat without a row gets every alert as it happens.
+
+    chat_settings holds the digest interval (bot/digest.py) and
+    chat_subscriptions the subscription rule of a chat (bot/routing.py):
+    sensors as a comma separated list (NULL for all), quiet hours as a
+    start and end hour (the end is excluded, 22-6 wraps past midnight)
+    and the minimum burst size.
+
+copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import sqlite3
+
+SETTINGS_TABLE = "chat_settings"
+SUBSCRIPTIONS_TABLE = "chat_subscriptions"
+
+
+class ChatSettingsStore:
+    """
+    Reads and writes the chat_settings and chat_subscriptions tables.
+    """
+    def __init__(self, name_db: str):
+        """
+        Parameters:
+        name_db (str): Name of the SQLite database file.
+        """
+        self.name_db = name_db
+
+    @staticmethod
+    def create_tables(cursor):
+        """
+        Create the settings tables if they do not exist.
+        """
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS "{SETTINGS_TABLE}" (
+                chat_id TEXT PRIMARY KEY,
+                digest_minutes INTEGER
+            );
+        """)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS "{SUBSCRIPTIONS_TABLE}" (
+                chat_id TEXT PRIMARY KEY,
+                sensors TEXT,
+                quiet_start INTEGER,
+                quiet_end INTEGER,
+                min_burst INTEGER NOT NULL DEFAULT 1
+            );
+        """)
+
+    @staticmethod
+    def _has_table(cursor, table: str) -> bool:
+        """
+        The readers never create tables, so they can share a read-only pool.
+        """
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?;", (table,))
+        return cursor.fetchone() is not None
+
+    def set_digest_minutes(self, chat_id: str, minutes: int = None):
+        """
+        Set the digest interval of a chat.
+
+        Parameters:
+        chat_id (str): Telegram chat ID.
+        minutes (int): Digest interval, None to send every alert immediately.
+        """
+        connect = sqlite3.connect(self.name_db)
+        try:
+            cursor = connect.cursor()
+            self.create_tables(cursor)
+            cursor.execute(f"""
+                INSERT INTO "{SETTINGS_TABLE}" (chat_id, digest_minutes) VALUES (?, ?)
+                ON CONFLICT (chat_id) DO UPDATE SET digest_minutes = excluded.digest_minutes;
+            """, (str(chat_id), minutes))
+            connect.commit()
+        finally:
+            connect.close()
+
+    def digest_intervals(self) -> dict:
+        """
+        Returns the digest interval of every chat in digest mode.
+
+        Returns:
+        dict: chat_id (str) -> minutes
+        """
+        connect = sqlite3.connect(self.name_db)
+        try:
+            cursor = connect.cursor()
+            if not self._has_table(cursor, SETTINGS_TABLE):
+                return {}
+            cursor.execute(f'SELECT chat_id, digest_minutes FROM "{SETTINGS_TABLE}" WHERE digest_minutes > 0;')
+            return dict(cursor.fetchall())
+        finally:
+            connect.close()
+
+    def set_subscription(self, chat_id: str, sensors: list = None, quiet_start: int = None,
+                         quiet_end: int = None, min_burst: int = 1):
+        """
+        Store the subscription rule of a chat, replacing any previous one.
+
+        Parameters:
+        chat_id (str): Telegram chat ID.
+        sensors (list): Sensor IDs to notify about, None for all sensors.
+        quiet_start (int), quiet_end (int): Hours without alerts, None for none.
+        min_burst (int): Minimum number of detections before the chat is alerted.
+        """
+        connect = sqlite3.connect(self.name_db)
+        try:
+            cursor = connect.cursor()
+            self.create_tables(cursor)
+            cursor.execute(f"""
+                INSERT OR REPLACE INTO "{SUBSCRIPTIONS_TABLE}" (chat_id, sensors, quiet_start, quiet_end, min_burst)
+                VALUES (?, ?, ?, ?, ?);
+            """, (str(chat_id), None if sensors is None else ",".join(map(str, sensors)),
+                  quiet_start, quiet_end, min_burst))
+            connect.commit()
+        finally:
+            connect.close()
+
+    def remove_subscription(self, chat_id: str):
+        """
+        Remove the subscription rule of a chat, so it gets every alert again.
+        """
+        connect = sqlite3.connect(self.name_db)
+        try:
+            cursor = connect.cursor()
+            self.create_tables(cursor)
+            cursor.execute(f'DELETE FROM "{SUBSCRIPTIONS_TABLE}" WHERE chat_id = ?;', (str(chat_id),))
+            connect.commit()
+        finally:
+            connect.close()
+
+    def subscriptions(self) -> list:
+        """
+        Returns every subscription rule.
+
+        Returns:
+        list: (chat_id, sensors list or None, quiet_start, quiet_end, min_burst) tuples
+        """
+        connect = sqlite3.connect(self.name_db)
+        try:
+            cursor = connect.cursor()
+            if not self._has_table(cursor, SUBSCRIPTIONS_TABLE):
+                return []
+            cursor.execute(f"""
+                SELECT chat_id, sensors, quiet_start, quiet_end, min_burst FROM "{SUBSCRIPTIONS_TABLE}";
+            """)
+            return [(chat_id, None if sensors is None else [s for s in sensors.split(",") if s],
+                     quiet_start, quiet_end, min_burst)
+                    for chat_id, sensors, quiet_start, quiet_end, min_burst in cursor.fetchall()]
+        finally:
+            connect.close()
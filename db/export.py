@@ -0,0 +1,127 @@
+"""_summary_
+file    : db/export.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Streams rows of the sensor log table out of SQLite and writes them to a
+    gzip-compressed CSV file, or to Parquet when pyarrow is installed.
+    Rows travel through a generator in fixed-size chunks, so memory use
+    stays the same whatever the number of rows exported.
+
+copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import csv, gzip, importlib.util, sqlite3
+from . import LOG_DATE_ISO
+
+COLUMNS = ("date", "time", "chat_id", "sensor_active", "status")
+
+
+def parquet_available() -> bool:
+    """
+    Returns True if pyarrow is installed and Parquet export can be used.
+    """
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def iter_logs(name_db: str, table_name: str, start: str = None, end: str = None, sensor=None, chunk: int = 5000):
+    """
+    Yield the rows of the log table in chunks, oldest first.
+
+    Parameters:
+    name_db (str): Name of the SQLite database file.
+    table_name (str): Name of the sensor log table.
+    start (str), end (str): Inclusive ISO date bounds ("YYYY-MM-DD"), optional.
+    sensor: Only rows of this sensor when given.
+    chunk (int): Number of rows per yielded list.
+    """
+    if not table_name or not table_name.isidentifier():
+        raise ValueError("Invalid table name")
+
+    query = f'SELECT {", ".join(COLUMNS)} FROM "{table_name}" WHERE 1 = 1'
+    params = []
+    if start:
+        query += f" AND {LOG_DATE_ISO} >= ?"
+        params.append(start)
+    if end:
+        query += f" AND {LOG_DATE_ISO} <= ?"
+        params.append(end)
+    if sensor is not None:
+        query += " AND CAST(sensor_active AS TEXT) = ?"
+        params.append(str(sensor))
+    query += " ORDER BY rowid"
+
+    connect = sqlite3.connect(name_db)
+    try:
+        cursor = connect.cursor()
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk)
+            if not rows:
+                break
+            yield rows
+    finally:
+        connect.close()
+
+
+def write_csv_gz(chunks, path: str, append: bool = False) -> int:
+    """
+    Write row chunks to a gzip-compressed CSV file with a header line.
+
+    Parameters:
+    chunks (iterable): Lists of rows in COLUMNS order.
+    path (str): Output file path.
+    append (bool): Add a new gzip member to an existing file, without a header.
+
+    Returns:
+    int: Number of rows written.
+    """
+    count = 0
+    with gzip.open(path, "at" if append else "wt", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        if not append:
+            writer.writerow(COLUMNS)
+        for rows in chunks:
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+
+def write_parquet(chunks, path: str) -> int:
+    """
+    Write row chunks to a Parquet file, one row group per chunk.
+
+    Returns:
+    int: Number of rows written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("date", pa.string()),
+        ("time", pa.string()),
+        ("chat_id", pa.string()),
+        ("sensor_active", pa.string()),
+        ("status", pa.string()),
+    ])
+    count = 0
+    with pq.ParquetWriter(path, schema, compression="snappy") as writer:
+        for rows in chunks:
+            columns = [[None if row[i] is None else str(row[i]) for row in rows] for i in range(len(COLUMNS))]
+            writer.write_table(pa.Table.from_arrays([pa.array(column, pa.string()) for column in columns], schema=schema))
+            count += len(rows)
+    return count
@@ -0,0 +1,243 @@
+"""_summary_
+file    : db/retention.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Retention of the sensor log table.
+
+    Rows older than the retention period are appended to compressed
+    monthly archive files (archive/<table>-YYYY-MM.csv.gz, one gzip member
+    per run) and then deleted from SQLite in small batches, each in its own
+    short transaction so alert writes are never blocked for long. The
+    rollup tables are not touched, so /stats and /heatmap keep the full
+    history. Free pages are returned to the file system with
+    PRAGMA incremental_vacuum in small steps, followed by PRAGMA optimize.
+
+    Incremental vacuum needs auto_vacuum=INCREMENTAL, which new databases
+    get when they are created. An older database has to be switched with a
+    full VACUUM, which holds the write lock for as long as it takes, so it
+    is never done by the running service. Stop the service and run once:
+
+        python -m db.retention --enable-incremental-vacuum
+
+copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import logging, os, sqlite3, time
+from datetime import datetime, timedelta
+from . import LOG_DATE_ISO
+from .export import COLUMNS, write_csv_gz
+
+log = logging.getLogger(__name__)
+
+# SQLite value of PRAGMA auto_vacuum for INCREMENTAL
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+class RetentionManager:
+    """
+    Archives and deletes old log rows and compacts the database in small steps.
+    """
+    def __init__(self, name_db: str, table_name: str, days: int = 90, archive_dir: str = "archive",
+                 batch_size: int = 500, vacuum_pages: int = 200, pause: float = 0.05):
+        """
+        Parameters:
+        name_db (str): Name of the SQLite database file.
+        table_name (str): Name of the sensor log table.
+        days (int): Rows older than this many days are archived.
+        archive_dir (str): Directory of the monthly archive files.
+        batch_size (int): Rows archived and deleted per transaction.
+        vacuum_pages (int): Pages freed per incremental_vacuum step.
+        pause (float): Seconds to sleep between steps, leaving room for alert writes.
+        """
+        if not table_name or not table_name.isidentifier():
+            raise ValueError("Invalid table name")
+
+        self.name_db = name_db
+        self.table_name = table_name
+        self.days = days
+        self.archive_dir = archive_dir
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self.pause = pause
+
+    def _connect(self):
+        # A short busy timeout: a step waits for an alert write instead of failing
+        return sqlite3.connect(self.name_db, timeout=5)
+
+    def enable_incremental_vacuum(self) -> bool:
+        """
+        Switch the database to auto_vacuum=INCREMENTAL.
+
+        An existing database only changes mode after a full VACUUM, which is run
+        here and blocks every writer until it is done: only call it with the
+        service stopped.
+
+        Returns:
+        bool: True if the mode had to be changed.
+        """
+        connect = self._connect()
+        try:
+            mode = connect.execute("PRAGMA auto_vacuum;").fetchone()[0]
+            if mode == AUTO_VACUUM_INCREMENTAL:
+                return False
+            log.info("🗜️ Switching database to incremental auto-vacuum (one-time full VACUUM)")
+            connect.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL};")
+            connect.execute("VACUUM;")
+            return True
+        finally:
+            connect.close()
+
+    def incremental_vacuum_enabled(self) -> bool:
+        """
+        Returns True if the database uses auto_vacuum=INCREMENTAL.
+        """
+        connect = self._connect()
+        try:
+            return connect.execute("PRAGMA auto_vacuum;").fetchone()[0] == AUTO_VACUUM_INCREMENTAL
+        finally:
+            connect.close()
+
+    def archive_path(self, month: str) -> str:
+        """
+        Returns the archive file of a month ("YYYY-MM").
+        """
+        return os.path.join(self.archive_dir, f"{self.table_name}-{month}.csv.gz")
+
+    def archive_batch(self, cutoff: str) -> int:
+        """
+        Move one batch of rows dated before cutoff into the monthly archives.
+
+        The rows are written to the archive files before they are deleted, so an
+        interruption can at worst archive a row twice, never lose it.
+
+        Parameters:
+        cutoff (str): ISO date ("YYYY-MM-DD"); older rows are archived.
+
+        Returns:
+        int: Number of rows moved.
+        """
+        connect = self._connect()
+        try:
+            cursor = connect.cursor()
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?;", (self.table_name,))
+            if cursor.fetchone() is None:
+                return 0
+
+            cursor.execute(f"""
+                SELECT rowid, {", ".join(COLUMNS)}, substr({LOG_DATE_ISO}, 1, 7) AS month
+                FROM "{self.table_name}" WHERE {LOG_DATE_ISO} < ?
+                ORDER BY rowid LIMIT ?;
+            """, (cutoff, self.batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                return 0
+
+            by_month = {}
+            for row in rows:
+                by_month.setdefault(row[-1], []).append(row[1:-1])
+
+            os.makedirs(self.archive_dir, exist_ok=True)
+            for month, month_rows in by_month.items():
+                path = self.archive_path(month)
+                write_csv_gz([month_rows], path, append=os.path.exists(path))
+
+            cursor.executemany(f'DELETE FROM "{self.table_name}" WHERE rowid = ?;', [(row[0],) for row in rows])
+            connect.commit()
+            return len(rows)
+        finally:
+            connect.close()
+
+    def vacuum_step(self) -> int:
+        """
+        Free up to vacuum_pages unused pages.
+
+        Returns:
+        int: Number of free pages left in the database file.
+        """
+        connect = self._connect()
+        try:
+            connect.execute(f"PRAGMA incremental_vacuum({self.vacuum_pages});")
+            return connect.execute("PRAGMA freelist_count;").fetchone()[0]
+        finally:
+            connect.close()
+
+    def optimize(self):
+        """
+        Let SQLite refresh the statistics it needs for its query plans.
+        """
+        connect = self._connect()
+        try:
+            connect.execute("PRAGMA optimize;")
+        finally:
+            connect.close()
+
+    def run(self, max_seconds: float = 60) -> dict:
+        """
+        Run one retention pass in small steps.
+
+        Parameters:
+        max_seconds (float): Stop starting new steps after this time; the rest is
+            done on the next pass.
+
+        Returns:
+        dict: archived (rows), free_pages (left, None without incremental vacuum)
+            and seconds taken.
+        """
+        started = time.monotonic()
+        cutoff = (datetime.now() - timedelta(days=self.days)).strftime("%Y-%m-%d")
+        archived = 0
+
+        while time.monotonic() - started < max_seconds:
+            moved = self.archive_batch(cutoff)
+            archived += moved
+            if moved < self.batch_size:
+                break
+            time.sleep(self.pause)
+
+        # Without incremental auto-vacuum the free pages are reused by later inserts
+        free_pages = None
+        if self.incremental_vacuum_enabled():
+            free_pages = self.vacuum_step()
+            while free_pages and time.monotonic() - started < max_seconds:
+                time.sleep(self.pause)
+                free_pages = self.vacuum_step()
+
+        self.optimize()
+        return {"archived": archived, "free_pages": free_pages, "seconds": time.monotonic() - started}
+
+
+if __name__ == "__main__":
+    import argparse
+    from bot.config import get_config
+
+    parser = argparse.ArgumentParser(description="Archive old log rows and compact the database")
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="switch the database to incremental auto-vacuum with a full VACUUM "
+                             "(stop the service first, it locks the database until done)")
+    args = parser.parse_args()
+
+    config = get_config()
+    retention = RetentionManager(config.DATABASE_NAME, config.TABLE_NAME, days=config.RETENTION_DAYS,
+                                 archive_dir=config.RETENTION_ARCHIVE_DIR)
+    if args.enable_incremental_vacuum:
+        if retention.enable_incremental_vacuum():
+            print("Switched the database to incremental auto-vacuum")
+        else:
+            print("The database already uses incremental auto-vacuum")
+    result = retention.run(max_seconds=float("inf"))
+    print(f"Archived {result['archived']} rows older than {config.RETENTION_DAYS} days in {result['seconds']:.1f}s")
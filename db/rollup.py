@@ -0,0 +1,278 @@
+"""_summary_
+file    : db/rollup.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Precomputed detection counts per sensor per hour and per day.
+
+    The rollup tables are updated with one upsert per detection as events
+    are ingested, so statistics never need to scan the log table. The log
+    table stores one row per chat per alert, so the backfill counts each
+    distinct (date, time, sensor) once. Run the backfill by hand with:
+
+        python -m db.rollup backfill
+
+copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import logging, sqlite3
+from datetime import datetime
+from . import LOG_DATE_ISO, LOG_DATETIME_ISO
+
+log = logging.getLogger(__name__)
+
+HOURLY_TABLE = "detection_rollup_hourly"
+DAILY_TABLE = "detection_rollup_daily"
+META_TABLE = "rollup_meta"
+
+HOUR_FORMAT = "%Y-%m-%d %H"
+DAY_FORMAT = "%Y-%m-%d"
+
+
+class RollupStore:
+    """
+    Maintains and queries the hourly and daily detection rollups.
+    """
+    def __init__(self, name_db: str):
+        """
+        Parameters:
+        name_db (str): Name of the SQLite database file.
+        """
+        self.name_db = name_db
+
+    @staticmethod
+    def create_tables(cursor):
+        """
+        Create the rollup tables if they do not exist.
+        """
+        for table in (HOURLY_TABLE, DAILY_TABLE):
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS "{table}" (
+                    sensor_id TEXT,
+                    bucket TEXT,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (sensor_id, bucket)
+                );
+            """)
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS "{table}_bucket" ON "{table}" (bucket);')
+
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS "{META_TABLE}" (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+
+    def record(self, detections: list):
+        """
+        Add detections to the rollups with a single transaction.
+
+        Parameters:
+        detections (list): (sensor_id, datetime) pairs, one per detection.
+        """
+        if not detections:
+            return
+
+        hourly, daily = {}, {}
+        for sensor_id, when in detections:
+            hour_key = (str(sensor_id), when.strftime(HOUR_FORMAT))
+            day_key = (str(sensor_id), when.strftime(DAY_FORMAT))
+            hourly[hour_key] = hourly.get(hour_key, 0) + 1
+            daily[day_key] = daily.get(day_key, 0) + 1
+
+        connect = None
+        try:
+            connect = sqlite3.connect(self.name_db)
+            cursor = connect.cursor()
+            self.create_tables(cursor)
+
+            for table, counts in ((HOURLY_TABLE, hourly), (DAILY_TABLE, daily)):
+                cursor.executemany(f"""
+                    INSERT INTO "{table}" (sensor_id, bucket, count) VALUES (?, ?, ?)
+                    ON CONFLICT (sensor_id, bucket) DO UPDATE SET count = count + excluded.count;
+                """, [(sensor, bucket, count) for (sensor, bucket), count in counts.items()])
+
+            connect.commit()
+
+        except Exception as e:
+            log.error("Error: %s", e)
+
+        finally:
+            if connect is not None:
+                connect.close()
+
+    def is_backfilled(self) -> bool:
+        """
+        Returns True once the rollups were rebuilt from the log table.
+        """
+        connect = sqlite3.connect(self.name_db)
+        try:
+            cursor = connect.cursor()
+            self.create_tables(cursor)
+            cursor.execute(f'SELECT value FROM "{META_TABLE}" WHERE key = ?;', ("backfilled_at",))
+            return cursor.fetchone() is not None
+        finally:
+            connect.close()
+
+    def backfill(self, log_table: str, until: str = None, once: bool = False):
+        """
+        Rebuild the rollups from the log table in one transaction.
+
+        The rollup rows of every bucket present in the log are replaced, so running
+        the backfill again does not double count. The check and the counts run in
+        one transaction holding the write lock, so two processes never both backfill.
+        Detections recorded after `until` must be added with record() afterwards,
+        as the replaced rows would lose them.
+
+        Parameters:
+        log_table (str): Name of the sensor log table.
+        until (str): Only count log rows before this "YYYY-MM-DD HH:MM:SS" time,
+            e.g. the start of the process recording the newer detections.
+        once (bool): Do nothing if the rollups were already backfilled.
+
+        Returns:
+        int: Number of distinct detections found in the log, None if skipped.
+        """
+        if not log_table or not log_table.isidentifier():
+            raise ValueError("Invalid table name")
+
+        connect = sqlite3.connect(self.name_db)
+        try:
+            cursor = connect.cursor()
+            self.create_tables(cursor)
+            cursor.execute("BEGIN IMMEDIATE;")
+
+            if once:
+                cursor.execute(f'SELECT value FROM "{META_TABLE}" WHERE key = ?;', ("backfilled_at",))
+                if cursor.fetchone() is not None:
+                    connect.rollback()
+                    return None
+
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?;", (log_table,))
+            if cursor.fetchone() is None:
+                total = 0
+            else:
+                # One alert is logged once per chat, count each (date, time, sensor) once
+                alerts = f"""
+                    SELECT DISTINCT CAST(sensor_active AS TEXT) AS sensor_id,
+                        {LOG_DATE_ISO} AS day, substr(time, 1, 2) AS hour, time
+                    FROM "{log_table}"
+                    WHERE sensor_active IS NOT NULL
+                """
+                params = ()
+                if until is not None:
+                    alerts += f" AND {LOG_DATETIME_ISO} < ?"
+                    params = (until,)
+                cursor.execute(f"""
+                    INSERT OR REPLACE INTO "{HOURLY_TABLE}" (sensor_id, bucket, count)
+                    SELECT sensor_id, day || ' ' || hour, COUNT(*) FROM ({alerts})
+                    GROUP BY sensor_id, day, hour;
+                """, params)
+                cursor.execute(f"""
+                    INSERT OR REPLACE INTO "{DAILY_TABLE}" (sensor_id, bucket, count)
+                    SELECT sensor_id, day, COUNT(*) FROM ({alerts})
+                    GROUP BY sensor_id, day;
+                """, params)
+                cursor.execute(f"SELECT COALESCE(SUM(count), 0) FROM \"{DAILY_TABLE}\";")
+                total = cursor.fetchone()[0]
+
+            cursor.execute(f'INSERT OR REPLACE INTO "{META_TABLE}" (key, value) VALUES (?, ?);',
+                           ("backfilled_at", datetime.now().isoformat(timespec="seconds")))
+            connect.commit()
+            return total
+        finally:
+            connect.close()
+
+    def counts(self, table: str, since: str, until: str = None) -> dict:
+        """
+        Sum the detections per sensor for buckets in [since, until).
+
+        Parameters:
+        table (str): HOURLY_TABLE or DAILY_TABLE.
+        since (str), until (str): Bucket bounds in the table's format.
+
+        Returns:
+        dict: sensor_id -> count
+        """
+        connect = sqlite3.connect(self.name_db)
+        try:
+            cursor = connect.cursor()
+            self.create_tables(cursor)
+            query = f'SELECT sensor_id, SUM(count) FROM "{table}" WHERE bucket >= ?'
+            params = [since]
+            if until is not None:
+                query += " AND bucket < ?"
+                params.append(until)
+            cursor.execute(query + " GROUP BY sensor_id;", params)
+            return dict(cursor.fetchall())
+        finally:
+            connect.close()
+
+    def buckets(self, table: str, since: str) -> list:
+        """
+        Returns the rows of the buckets since the given one.
+
+        Parameters:
+        table (str): HOURLY_TABLE or DAILY_TABLE.
+        since (str): First bucket, in the table's format.
+
+        Returns:
+        list: (sensor_id, bucket, count) tuples, oldest bucket first.
+        """
+        connect = sqlite3.connect(self.name_db)
+        try:
+            cursor = connect.cursor()
+            self.create_tables(cursor)
+            cursor.execute(f"""
+                SELECT sensor_id, bucket, count FROM "{table}"
+                WHERE bucket >= ? ORDER BY bucket, sensor_id;
+            """, (since,))
+            return cursor.fetchall()
+        finally:
+            connect.close()
+
+    def busiest_hours(self, since: str, limit: int = 3) -> list:
+        """
+        Returns the hourly buckets with the most detections since the given hour.
+
+        Returns:
+        list: (sensor_id, bucket, count) tuples, busiest first.
+        """
+        connect = sqlite3.connect(self.name_db)
+        try:
+            cursor = connect.cursor()
+            self.create_tables(cursor)
+            cursor.execute(f"""
+                SELECT sensor_id, bucket, count FROM "{HOURLY_TABLE}"
+                WHERE bucket >= ? ORDER BY count DESC LIMIT ?;
+            """, (since, limit))
+            return cursor.fetchall()
+        finally:
+            connect.close()
+
+
+if __name__ == "__main__":
+    import sys
+    from bot.config import get_config
+
+    if sys.argv[1:] != ["backfill"]:
+        print("Usage: python -m db.rollup backfill")
+        sys.exit(1)
+
+    config = get_config()
+    total = RollupStore(config.DATABASE_NAME).backfill(config.TABLE_NAME)
+    print(f"Backfilled rollups from {config.TABLE_NAME}: {total} detections")
@@ -1,131 +1,646 @@
-import asyncio
-import os
-import threading
-import time
-import pygame
-import json
-import paho.mqtt.client as mqtt
-from bot.telegram import TelegramBot
-from utility.sound_control import sound_control
-
-# Mosquitto MQTT Config
-MQTT_BROKER = "localhost"
-MQTT_PORT = 1883
-CLIENT_ID = "raspberry_monyet"
-TOPIC = "esp8266/pub"
-
-# Try to initialize pygame.mixer with retries
-def init_audio_with_retry(retries=5, delay=5):
-    for i in range(retries):
-        try:
-            pygame.mixer.init()
-            print("🔊 Audio initialized successfully")
-            return True
-        except pygame.error as e:
-            print(f"⚠️ Audio init failed (attempt {i+1}/{retries}): {e}")
-            time.sleep(delay)
-    print("❌ Audio init failed after all retries")
-    return False
-
-audio_ready = init_audio_with_retry()
-
-# Telegram Bot
-bot = TelegramBot()
-
-# Sound control instance
-sound_ctrl = sound_control()
-
-# Play sound one time
-def play_sound_once():
-    # Check if audio is ready
-    if not audio_ready:
-        print("🔇 Skipping sound playback, audio device not ready")
-        return
-    
-    # Check if sound is enabled
-    if not sound_ctrl.is_sound_enabled():
-        print("🔇 Sound is disabled, skipping playback")
-        return
-
-    try:
-        # Check for various alarm file formats
-        alarm_files = ["alarm/alarm.wav", "alarm/alarm.mp3", "alarm/alarm.ogg", "alarm/alarm.flac"]
-        sound_file = "example.mp3"  # Default fallback
-        
-        # Find the first existing sound file
-        for file in alarm_files:
-            if os.path.exists(file):
-                sound_file = file
-                break
-        
-        # Load and play the sound
-        pygame.mixer.music.load(sound_file)
-        pygame.mixer.music.play() # Play once
-        print("🔊 Alarm playing once")
-        # Wait for the sound to finish
-        while pygame.mixer.music.get_busy():
-            time.sleep(0.1)
-        print("🔇 Alarm finished")
-    except Exception as e:
-        print(f"⚠️ Error playing sound: {e}")
-
-# MQTT callbacks
-def on_connect(client, userdata, flags, rc):
-    if rc == 0:
-        print("✅ Connected to MQTT broker!")
-        client.subscribe(TOPIC)
-        print(f"📡 Subscribed to topic '{TOPIC}'")
-    else:
-        print(f"❌ Failed to connect, return code {rc}")
-
-def on_message(client, userdata, msg):
-    message = msg.payload.decode()
-    print(f"📩 Received MQTT message from '{msg.topic}': {message}")
-
-    # threading.Thread(target=play_sound_once, daemon=True).start()
-    # asyncio.run(bot.send_message("🐒 MQTT message received", sensor_active=True))
-    
-    try:
-        data = json.loads(message)
-        motion = data.get("motion")
-        sensor_id = data.get("sensorid")
-        timestamp = data.get("time")
-        core = data.get("core")
-        sensitivity = data.get("sensitivity")
-        
-        print(f"📊 Parsed data - Motion: {motion}, Sensor ID: {sensor_id}, Time: {timestamp}, Core: {core}, Sensitivity: {sensitivity}")
-        
-        if (motion):
-            play_sound_once()
-            asyncio.run(bot.send_message(f"🐒 Motion detected by sensor {sensor_id} at {timestamp}", sensor_active=sensor_id))
-        
-    except json.JSONDecodeError:
-        print("⚠️ Invalid JSON received, ignoring message")
-
-# MQTT Client Setup
-client = mqtt.Client(CLIENT_ID)
-client.on_connect = on_connect # Set connect callback
-client.on_message = on_message # Set message callback
-
-# Async main
-async def main():
-    print(f"🔌 Connecting to Mosquitto broker at {MQTT_BROKER}:{MQTT_PORT}...")
-    client.connect(MQTT_BROKER, MQTT_PORT, 60)
-    client.loop_start()
-
-    try:
-        while True:
-            await asyncio.sleep(1)
-    except KeyboardInterrupt:
-        print("🔌 Disconnecting...")
-        client.loop_stop() # Stop the MQTT loop
-        client.disconnect() # Disconnect from the broker
-        print("🚫 Disconnected.")
-
-if __name__ == "__main__":
-    # Run MQTT client in a separate thread
-    mqtt_thread = threading.Thread(target=lambda: asyncio.run(main()), daemon=True) 
-    mqtt_thread.start()  # Start MQTT client in a background thread
-    print("🐒 MQTT client started in background thread")
-    
-    bot.run()  # Start Telegram bot in the main thread
+import os
+import signal
+import threading
+import time
+import queue
+import asyncio
+import concurrent.futures
+import multiprocessing
+from multiprocessing.managers import SyncManager
+import json
+import logging
+from datetime import datetime
+import paho.mqtt.client as mqtt
+from bot.telegram import TelegramBot
+from bot.federation import Federation, merge_subscriber, publish_unreplicated
+from bot import federation as federation_node
+from bot.outbox import alert_detections
+from bot.api import DashboardApi, live
+from bot.concurrency import executor
+from bot.config import get_config, get_db, get_async_db, on_reload, reload_config
+from utility.sound_control import sound_control
+from utility.events import parse_payload, summarise_batch
+from utility.readiness import readiness
+from db.rollup import RollupStore
+from db.retention import RetentionManager
+from utility.logger import setup_logging, setup_worker_logging, apply_levels
+from utility.supervisor import Supervisor, beat
+from utility import memory
+from utility.recorder import Recorder
+from utility.correlation import Correlator
+
+log = logging.getLogger("main")
+
+# Mosquitto MQTT Config, read once from .env (see bot/config.py)
+config = get_config()
+
+# Fork the command workers while this is still the only thread (see bot/concurrency.py).
+# Supervised workers are daemonic and may not have children, so in multi-process
+# mode CPU-bound commands run in the notifier's thread pool
+if __name__ == "__main__" and config.RUN_MODE != "multi":
+    executor.start()
+
+# Structured logging to the console and logs/, see utility/logger.py
+setup_logging(config.LOG_LEVEL, config.LOG_LEVELS, file=config.LOG_FILE, max_bytes=config.LOG_MAX_BYTES,
+              backups=config.LOG_BACKUPS, console=config.LOG_CONSOLE)
+
+# Try to initialize pygame.mixer with retries; pygame is only imported here and in
+# play_sound_once, so the notifier and ingest processes never load it
+def init_audio_with_retry(retries=5, delay=5):
+    import pygame
+    for i in range(retries):
+        try:
+            pygame.mixer.init()
+            log.info("🔊 Audio initialized successfully")
+            return True
+        except pygame.error as e:
+            log.warning("⚠️ Audio init failed (attempt %d/%d): %s", i + 1, retries, e)
+            time.sleep(delay)
+    log.error("❌ Audio init failed after all retries")
+    return False
+
+# Startup of each subsystem, run concurrently (see utility/readiness.py)
+def start_audio():
+    if config.LOW_MEMORY:
+        # The mixer is opened by the first alarm, see play_sound_once
+        log.info("🔊 Low-memory mode, audio is initialized on the first alarm")
+        readiness.mark_ready("audio")
+    elif init_audio_with_retry():
+        readiness.mark_ready("audio")
+    else:
+        readiness.mark_failed("audio", "no audio device")
+
+# Detections of this run are held back until the one-time rollup backfill is done, which
+# counts the log rows from before STARTED_AT only, so none is lost or counted twice
+STARTED_AT = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+rollup_lock = threading.Lock()
+rollup_backlog = []
+rollups_ready = threading.Event()
+
+def record_rollups(detections):
+    with rollup_lock:
+        if not rollups_ready.is_set():
+            rollup_backlog.extend(detections)
+            return
+    RollupStore(get_config().DATABASE_NAME).record(detections)
+
+def start_db():
+    try:
+        get_db().create()
+        
+        # Build the detection rollups from existing logs once
+        rollups = RollupStore(get_config().DATABASE_NAME)
+        if not rollups.is_backfilled():
+            total = rollups.backfill(get_config().TABLE_NAME, until=STARTED_AT, once=True)
+            if total is not None:
+                log.info("📈 Rollups backfilled from %d logged detections", total)
+        
+        readiness.mark_ready("db")
+    except Exception as e:
+        readiness.mark_failed("db", e)
+    finally:
+        with rollup_lock:
+            backlog = rollup_backlog[:]
+            rollup_backlog.clear()
+            rollups_ready.set()
+        RollupStore(get_config().DATABASE_NAME).record(backlog)
+
+def start_retention():
+    # Runs after the database is ready, then once per interval in small steps
+    readiness.wait("db")
+    first = True
+    while True:
+        config = get_config()
+        if config.RETENTION_DAYS > 0:
+            try:
+                retention = RetentionManager(config.DATABASE_NAME, config.TABLE_NAME,
+                                             days=config.RETENTION_DAYS, archive_dir=config.RETENTION_ARCHIVE_DIR)
+                # Switching an existing database needs a full VACUUM, which is left to an offline run
+                if first and not retention.incremental_vacuum_enabled():
+                    log.info("🗜️ Database has no incremental auto-vacuum, free pages are only reused; "
+                             "stop the service and run 'python -m db.retention --enable-incremental-vacuum'")
+                first = False
+                result = retention.run()
+                if result["archived"]:
+                    log.info("🗄️ Archived %d log rows older than %d days", result["archived"], config.RETENTION_DAYS)
+            except Exception as e:
+                log.exception("⚠️ Log retention failed: %s", e)
+        time.sleep(config.RETENTION_INTERVAL_HOURS * 3600)
+
+def log_memory_baseline(*names):
+    # Resident memory once the subsystems of this process are up, see utility/memory.py
+    for name in names:
+        readiness.wait(name, timeout=120)
+    log.info("🧠 Memory baseline: %s%s", memory.summary(), " (low-memory mode)" if config.LOW_MEMORY else "",
+             extra={"rss_kib": memory.rss_kib()})
+
+def start_mqtt():
+    log.info("🔌 Connecting to Mosquitto broker at %s:%d...", config.MQTT_BROKER, config.MQTT_PORT)
+    # connect_async returns at once, the network loop connects and reconnects in background
+    client.connect_async(config.MQTT_BROKER, config.MQTT_PORT, 60)
+    client.loop_start()
+
+# Telegram Bot
+bot = TelegramBot()
+
+# Sound control instance
+sound_ctrl = sound_control()
+
+# Close the mixer once no alarm played for AUDIO_IDLE_RELEASE seconds
+audio_lock = threading.Lock()
+audio_release_timer = None
+
+def release_audio():
+    import pygame
+    with audio_lock:
+        if pygame.mixer.get_init() and not pygame.mixer.music.get_busy():
+            pygame.mixer.quit()
+            log.info("🔇 Audio released after %s s idle", get_config().AUDIO_IDLE_RELEASE)
+
+def schedule_audio_release():
+    global audio_release_timer
+    idle = get_config().AUDIO_IDLE_RELEASE
+    if audio_release_timer is not None:
+        audio_release_timer.cancel()
+    if idle > 0:
+        audio_release_timer = threading.Timer(idle, release_audio)
+        audio_release_timer.daemon = True
+        audio_release_timer.start()
+
+# Play sound one time
+def play_sound_once():
+    # Check if audio is ready, events before that are still logged and notified
+    if not readiness.is_ready("audio"):
+        log.info("🔇 Skipping sound playback, audio device not ready")
+        return
+    
+    # Check if sound is enabled
+    if not sound_ctrl.is_sound_enabled():
+        log.info("🔇 Sound is disabled, skipping playback")
+        return
+
+    try:
+        # Check for various alarm file formats
+        alarm_files = ["alarm/alarm.wav", "alarm/alarm.mp3", "alarm/alarm.ogg", "alarm/alarm.flac"]
+        sound_file = "example.mp3"  # Default fallback
+        
+        # Find the first existing sound file
+        for file in alarm_files:
+            if os.path.exists(file):
+                sound_file = file
+                break
+        
+        import pygame
+        with audio_lock:
+            # Opened lazily in low-memory mode or again after an idle release
+            if not pygame.mixer.get_init() and not init_audio_with_retry(retries=1):
+                return
+            
+            # Load and play the sound
+            pygame.mixer.music.load(sound_file)
+            pygame.mixer.music.play() # Play once
+            log.info("🔊 Alarm playing once")
+            # Wait for the sound to finish
+            while pygame.mixer.music.get_busy():
+                time.sleep(0.1)
+            log.debug("🔇 Alarm finished")
+            if config.LOW_MEMORY:
+                pygame.mixer.music.unload()  # Free the decoded stream until the next alarm
+    except Exception as e:
+        log.warning("⚠️ Error playing sound: %s", e)
+    finally:
+        schedule_audio_release()
+
+# MQTT callbacks
+def on_connect(client, userdata, flags, rc):
+    if rc == 0:
+        log.info("✅ Connected to MQTT broker!")
+        readiness.mark_ready("mqtt")
+        topic = get_config().MQTT_TOPIC
+        client.subscribe(topic)
+        log.info("📡 Subscribed to topic '%s'", topic)
+        if federation is not None:
+            federation.subscribe()
+    else:
+        log.error("❌ Failed to connect, return code %s", rc)
+
+# Raw traffic recorder for utility/replay.py, enabled by MQTT_RECORD_FILE
+recorder = Recorder(config.MQTT_RECORD_FILE) if config.MQTT_RECORD_FILE else None
+
+def on_message(client, userdata, msg):
+    if federation is not None and federation.handle(msg):
+        return
+    # A replayed message carries the epoch time it was recorded at, a live one does not
+    received_at = getattr(msg, "received_at", None)
+    if recorder is not None:
+        recorder.record(msg.topic, msg.payload, received_at)
+    message = msg.payload.decode()
+    log.debug("📩 Received MQTT message from '%s': %s", msg.topic, message, extra={"topic": msg.topic})
+
+    # threading.Thread(target=play_sound_once, daemon=True).start()
+    # asyncio.run(bot.send_message("🐒 MQTT message received", sensor_active=True))
+    
+    try:
+        events = parse_payload(message, datetime.fromtimestamp(received_at) if received_at is not None else None)
+    except (json.JSONDecodeError, ValueError):
+        log.warning("⚠️ Invalid JSON received, ignoring message", extra={"payload": message})
+        return
+    
+    for event in events:
+        log.info("📊 Parsed data - Motion: %s, Sensor ID: %s, Time: %s, Core: %s, Sensitivity: %s",
+                 event.motion, event.sensor_id, event.timestamp, event.core, event.sensitivity,
+                 extra={"sensor_id": event.sensor_id, "motion": event.motion})
+    live.observe(events)
+    
+    # A batch is coalesced into one alarm and one notification
+    motions = [event for event in events if event.motion]
+    if not motions:
+        return
+    
+    # Only correlated hits sound the alarm and notify, the others are only logged
+    motions, uncorrelated = correlator.split(motions)
+    live.record(motions, uncorrelated)
+    if uncorrelated:
+        log_raw(uncorrelated)
+    if motions:
+        dispatch(motions)
+
+# Rollups and the Telegram notification of one MQTT message
+def notify_motions(motions):
+    # Count every detection in the per-sensor hourly/daily rollups; federated, the leader counts them
+    if federation is None:
+        record_rollups([(event.sensor_id, event.event_time()) for event in motions])
+    
+    if len(motions) == 1:
+        event = motions[0]
+        # With the event, the log records the same node time the rollups count
+        send_alert(f"🐒 Motion detected by sensor {event.sensor_id} at {event.timestamp}", sensor_active=event.sensor_id,
+                   events=[event])
+    else:
+        log.info("📦 Batch of %d motion events, sending one summary", len(motions))
+        send_alert(summarise_batch(motions), sensor_active=motions[0].sensor_id, events=motions)
+
+# A federated node forwards the alert, the elected leader sends it (see bot/federation.py)
+def send_alert(text, sensor_active, events=None):
+    if federation is None:
+        bot.notify(text, sensor_active=sensor_active, events=events)
+    else:
+        federation.forward(text, sensor_active, alert_detections(sensor_active, events))
+
+# Hits the correlation rules did not escalate: counted in the rollups and logged, no alert
+def record_raw(motions):
+    detections = [(event.sensor_id, event.event_time()) for event in motions]
+    if federation is None:
+        log_uncorrelated(detections)
+    else:
+        federation.forward_raw(detections)  # Logged and counted once, by the leader
+    log.info("🍃 %d uncorrelated hits logged without alarm", len(motions),
+             extra={"sensor_ids": sorted({str(event.sensor_id) for event in motions})})
+
+def log_uncorrelated(detections):
+    record_rollups(detections)
+    get_async_db().submit_write("insert_many", get_config().TABLE_NAME, bot.log_rows("None", "uncorrelated", detections))
+
+# Single-process mode handles the motions on the MQTT thread
+def alert(motions):
+    play_sound_once()
+    notify_motions(motions)
+
+# Where on_message hands the motions over, replaced in the ingest process
+dispatch = alert
+log_raw = record_raw
+
+# Correlation of hits before any alarm (see utility/correlation.py)
+def build_correlator(spec):
+    correlator = Correlator.from_spec(spec)
+    if correlator.rules:
+        log.info("🔗 Correlation rules: %s", "; ".join(map(repr, correlator.rules)))
+    return correlator
+
+try:
+    correlator = build_correlator(config.CORRELATION_RULES)
+except ValueError as e:
+    log.error("❌ %s, every hit raises an alarm", e)
+    correlator = Correlator([])
+
+# MQTT Client Setup
+client = mqtt.Client(config.MQTT_CLIENT_ID)
+client.on_connect = on_connect # Set connect callback
+client.on_message = on_message # Set message callback
+
+# Federation, set up by start_federation() in single-process mode
+federation = None
+
+def deliver_federated(text, sensor_active, detections):
+    record_rollups(detections)
+    bot.notify(text, sensor_active=sensor_active, detections=detections)
+
+# Subscriber changes made on the leader, merged on the database writer off the MQTT thread
+def merge_federated(chat_id, state):
+    get_async_db().submit_write(merge_subscriber, chat_id, state)
+
+def on_federation_lead(leader):
+    bot.set_receiving(leader)
+    if leader:
+        get_async_db().submit_write(publish_unreplicated)
+
+def start_federation():
+    global federation
+    federation = Federation(client, config.FEDERATION_NODE_ID, config.FEDERATION_TOPIC, deliver_federated,
+                            lease_seconds=config.FEDERATION_LEASE_SECONDS,
+                            dedup_seconds=config.FEDERATION_DEDUP_SECONDS,
+                            record=log_uncorrelated, merge=merge_federated)
+    federation_node.node = federation
+    # Only the leader polls Telegram, the nodes share one bot token
+    bot.receive_updates = False
+    federation.on_leadership_change(on_federation_lead)
+    
+    def renew():
+        while True:
+            federation.tick()
+            time.sleep(1)
+    
+    threading.Thread(target=renew, name="federation", daemon=True).start()
+    log.info("🗳️ Federation node %s started on '%s'", config.FEDERATION_NODE_ID, config.FEDERATION_TOPIC)
+
+# Apply reloaded MQTT settings
+def on_config_reload(old, new):
+    global correlator
+    if old is None:
+        return
+    if (old.LOG_LEVEL, old.LOG_LEVELS) != (new.LOG_LEVEL, new.LOG_LEVELS):
+        apply_levels(new.LOG_LEVELS, new.LOG_LEVEL)
+    if old.CORRELATION_RULES != new.CORRELATION_RULES:
+        try:
+            correlator = build_correlator(new.CORRELATION_RULES)
+        except ValueError as e:
+            log.warning("⚠️ Correlation rules not changed: %s", e)
+    if old.MQTT_TOPIC != new.MQTT_TOPIC:
+        client.unsubscribe(old.MQTT_TOPIC)
+        client.subscribe(new.MQTT_TOPIC)
+        log.info("📡 Subscribed to topic '%s'", new.MQTT_TOPIC)
+    if (old.MQTT_BROKER, old.MQTT_PORT, old.MQTT_CLIENT_ID) != (new.MQTT_BROKER, new.MQTT_PORT, new.MQTT_CLIENT_ID):
+        log.warning("⚠️ MQTT broker settings changed, restart the program to apply them")
+
+on_reload(on_config_reload)
+
+# Reload the configuration on SIGHUP
+def handle_sighup(signum, frame):
+    try:
+        reload_config()
+    except ValueError as e:
+        log.warning("⚠️ Configuration not reloaded: %s", e)
+
+# Graceful shutdown on SIGTERM/SIGINT: stop MQTT intake, let the bot drain the sends
+# in flight within SHUTDOWN_TIMEOUT and save the rest to the outbox for the next start
+shutdown_requested = threading.Event()
+
+def handle_shutdown(signum, frame):
+    if shutdown_requested.is_set():
+        log.warning("⚠️ Second stop signal, exiting without draining")
+        os._exit(1)
+    shutdown_requested.set()
+    log.info("🛑 %s received, shutting down...", signal.Signals(signum).name)
+    if federation is not None:
+        federation.resign()  # Sent before the disconnect, another node takes over at once
+    client.disconnect()  # No new MQTT messages; the one being handled finishes
+    bot.request_stop()
+
+def install_shutdown_handlers(handler):
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, handler)
+
+# Multi-process mode (RUN_MODE=multi): ingest, audio and notifier run as separate
+# processes watched by utility/supervisor.py, so a slow bot or a hung audio device
+# never delays the alarm. Workers are forked from this process and log through it.
+HEARTBEAT_INTERVAL = 2
+NOTIFY_QUEUE_SIZE = 1000
+
+# Raised by the queue proxies when the manager process is gone
+QUEUE_ERRORS = (OSError, EOFError)
+QUEUE_POLL = 0.05  # Seconds between polls of a manager queue
+
+def queue_get(q, timeout):
+    # Polls instead of get(timeout): a blocking get stays pending in the manager after
+    # its worker died and would take the next item there, which is then lost
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return q.get_nowait()
+        except queue.Empty:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(QUEUE_POLL)
+
+def init_worker(records):
+    setup_worker_logging(records, config.LOG_LEVEL, config.LOG_LEVELS)
+    # The supervisor's SIGHUP forwarding is inherited by fork, reload only this process
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, handle_sighup)
+    # Ctrl+C reaches every process, the supervisor stops the workers in order
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+def ingest_worker(heartbeat, records, audio_queue, notify_queue):
+    init_worker(records)
+    
+    def enqueue(motions):
+        try:
+            audio_queue.put_nowait(time.time())
+        except queue.Full:
+            pass  # An alarm is already pending
+        except QUEUE_ERRORS as e:
+            log.error("❌ Audio queue unavailable, alarm not played: %s", e)
+        try:
+            notify_queue.put_nowait((motions, True))
+        except queue.Full:
+            log.error("❌ Notifier queue full, %d motion events dropped", len(motions))
+        except QUEUE_ERRORS as e:
+            log.error("❌ Notifier queue unavailable, %d motion events dropped: %s", len(motions), e)
+    
+    def enqueue_raw(motions):
+        try:
+            notify_queue.put_nowait((motions, False))
+        except queue.Full:
+            log.error("❌ Notifier queue full, %d uncorrelated hits not logged", len(motions))
+        except QUEUE_ERRORS as e:
+            log.error("❌ Notifier queue unavailable, %d uncorrelated hits not logged: %s", len(motions), e)
+    
+    global dispatch, log_raw
+    dispatch = enqueue
+    log_raw = enqueue_raw
+    signal.signal(signal.SIGTERM, lambda signum, frame: shutdown_requested.set())
+    readiness.begin("mqtt")
+    threading.Thread(target=log_memory_baseline, args=("mqtt",), name="memory", daemon=True).start()
+    start_mqtt()
+    while not shutdown_requested.is_set():
+        beat(heartbeat)
+        shutdown_requested.wait(HEARTBEAT_INTERVAL)
+    
+    # The last events were handed over by put_nowait, the manager holds them
+    client.disconnect()
+    client.loop_stop()
+    log.info("Ingest stopped")
+
+def audio_worker(heartbeat, records, audio_queue):
+    init_worker(records)
+    readiness.begin("audio")
+    threading.Thread(target=start_audio, name="audio-init", daemon=True).start()
+    threading.Thread(target=log_memory_baseline, args=("audio",), name="memory", daemon=True).start()
+    beat(heartbeat)
+    while True:
+        try:
+            queue_get(audio_queue, HEARTBEAT_INTERVAL)
+        except queue.Empty:
+            beat(heartbeat)
+            continue
+        except QUEUE_ERRORS as e:
+            # No beat, the supervisor restarts the worker with a backoff
+            log.error("❌ Audio queue unavailable: %s", e)
+            time.sleep(HEARTBEAT_INTERVAL)
+            continue
+        # No beat while playing, a playback that hangs gets the process restarted
+        play_sound_once()
+        beat(heartbeat)
+        # Alarms requested during playback were covered by it
+        try:
+            while True:
+                audio_queue.get_nowait()
+        except queue.Empty:
+            pass
+        except QUEUE_ERRORS:
+            pass
+
+def handle_queued(item):
+    motions, escalated = item
+    if escalated:
+        notify_motions(motions)
+    else:
+        record_raw(motions)
+
+def notifier_worker(heartbeat, records, notify_queue):
+    init_worker(records)
+    
+    def consume():
+        while True:
+            try:
+                handle_queued(queue_get(notify_queue, HEARTBEAT_INTERVAL))
+            except queue.Empty:
+                pass
+            except QUEUE_ERRORS as e:
+                # No beat, the supervisor restarts the worker with a backoff
+                log.error("❌ Notifier queue unavailable: %s", e)
+                time.sleep(HEARTBEAT_INTERVAL)
+                continue
+            except Exception as e:
+                log.exception("Error while notifying: %s", e)
+            
+            # Only beat while the bot's event loop still answers
+            if bot.loop is not None and bot.loop.is_running():
+                probe = asyncio.run_coroutine_threadsafe(asyncio.sleep(0), bot.loop)
+                try:
+                    probe.result(timeout=HEARTBEAT_INTERVAL)
+                except concurrent.futures.TimeoutError:
+                    log.warning("⚠️ Bot event loop did not answer within %d s", HEARTBEAT_INTERVAL)
+                    continue
+            beat(heartbeat)
+    
+    signal.signal(signal.SIGTERM, lambda signum, frame: bot.request_stop())
+    readiness.begin("db", "telegram")
+    threading.Thread(target=start_db, name="db-init", daemon=True).start()
+    threading.Thread(target=start_retention, name="retention", daemon=True).start()
+    threading.Thread(target=consume, name="notifier", daemon=True).start()
+    threading.Thread(target=log_memory_baseline, args=("db", "telegram"), name="memory", daemon=True).start()
+    bot.run()
+    
+    # Events still queued go to the outbox, the bot is stopping
+    saved = 0
+    try:
+        while True:
+            handle_queued(notify_queue.get_nowait())
+            saved += 1
+    except queue.Empty:
+        pass
+    except QUEUE_ERRORS as e:
+        log.error("❌ Notifier queue unavailable, queued alerts lost: %s", e)
+    log.info("Notifier stopped, %d queued alerts saved to the outbox", saved)
+
+# A stop signal sent to the whole process group (systemd, Ctrl+C) must not end the
+# manager before the notifier drained its queue; it is shut down after the workers
+def ignore_stop_signals():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+def run_multiprocess():
+    context = multiprocessing.get_context("fork")
+    # The queues between the workers live in a manager process. A multiprocessing.Queue
+    # reader holds a lock shared with every later reader while it waits, and a worker
+    # that exits or is killed during get() never releases it, so its replacement would
+    # never receive anything. Started first, while this process has no other thread.
+    manager = SyncManager(ctx=context)
+    manager.start(ignore_stop_signals)
+    audio_queue = manager.Queue(maxsize=1)
+    notify_queue = manager.Queue(maxsize=NOTIFY_QUEUE_SIZE)
+    
+    records = context.Queue()
+    setup_logging(config.LOG_LEVEL, config.LOG_LEVELS, file=config.LOG_FILE, max_bytes=config.LOG_MAX_BYTES,
+                  backups=config.LOG_BACKUPS, console=config.LOG_CONSOLE, records=records)
+    supervisor = Supervisor(context, heartbeat_timeout=config.SUPERVISOR_HEARTBEAT_TIMEOUT,
+                            stop_grace=config.SHUTDOWN_TIMEOUT + 5)
+    supervisor.add("ingest", ingest_worker, records, audio_queue, notify_queue)
+    supervisor.add("audio", audio_worker, records, audio_queue)
+    supervisor.add("notifier", notifier_worker, records, notify_queue)
+    
+    # Each worker reloads its own configuration on SIGHUP
+    def forward_sighup(signum, frame):
+        handle_sighup(signum, frame)
+        for _, pid, _, _ in supervisor.status():
+            if pid is not None:
+                os.kill(pid, signal.SIGHUP)
+    
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, forward_sighup)
+    # Workers are stopped in order: ingest first, so its last events reach the notifier
+    install_shutdown_handlers(lambda signum, frame: supervisor.request_stop())
+    
+    log.info("🐒 Supervisor started in multi-process mode")
+    try:
+        supervisor.run()  # Returns once every worker was stopped and joined
+    finally:
+        manager.shutdown()
+    log.info("Supervisor stopped.")
+
+if __name__ == "__main__":
+    # SIGHUP is not available on Windows
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, handle_sighup)
+    
+    if config.RUN_MODE == "multi":
+        if config.FEDERATION_NODE_ID:
+            log.warning("⚠️ Federation needs RUN_MODE=single, FEDERATION_NODE_ID is ignored")
+        if config.API_PORT:
+            log.warning("⚠️ The dashboard API needs RUN_MODE=single, API_PORT is ignored")
+        run_multiprocess()
+        raise SystemExit
+    
+    # Bring up all subsystems concurrently, each reports its own readiness
+    readiness.begin("audio", "mqtt", "db", "telegram")
+    threading.Thread(target=start_audio, name="audio-init", daemon=True).start()
+    threading.Thread(target=start_db, name="db-init", daemon=True).start()
+    threading.Thread(target=start_retention, name="retention", daemon=True).start()
+    threading.Thread(target=log_memory_baseline, args=("audio", "mqtt", "db", "telegram"),
+                     name="memory", daemon=True).start()
+    if config.FEDERATION_NODE_ID:
+        start_federation()
+    if config.API_PORT:
+        bot.api = DashboardApi(live, host=config.API_LISTEN, port=config.API_PORT, ttl=config.API_CACHE_SECONDS)
+    start_mqtt()
+    log.info("🐒 MQTT client started in background thread")
+    
+    install_shutdown_handlers(handle_shutdown)
+    bot.run()  # Start Telegram bot in the main thread, returns once drained
+    
+    # Wait for the MQTT thread, an alert it is still handling goes to the outbox
+    client.disconnect()
+    client.loop_stop()
+    log.info("🐒 Shutdown complete")
@@ -1,6 +1,6 @@
 #!/bin/bash
 cd /home/pi/Desktop/Project-Pengusir-Hama-Monyet
 source ./venv/bin/activate
-python main.py 2>&1 | while IFS= read -r line; do
-    echo "$(date '+%Y-%m-%d %H:%M:%S') $line"
-done >> /home/pi/Desktop/log.txt
+# The program writes its own rotated JSON log to logs/monyet.log (see utility/logger.py),
+# only output from before logging is set up (e.g. a crash on import) reaches stderr
+LOG_CONSOLE=false exec python main.py
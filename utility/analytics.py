@@ -0,0 +1,242 @@
+"""
+file    : utility/analytics.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Activity analysis of the detection history: when do the monkeys raid.
+
+    Detections are streamed out of SQLite in chunks straight into NumPy
+    arrays of timestamps and counts; SQLite converts the TEXT date/time
+    columns to epoch seconds. When the hourly rollups (db/rollup.py) are
+    available they are read instead of the raw log: a year is at most
+    8760 rows per sensor whatever the number of alerts, which keeps the
+    analysis well under a second on a Pi 3. Everything else (hour-of-day x
+    day-of-week histogram, weekly trend, moving average, peak windows) is
+    computed on whole arrays.
+
+    Timestamps are the local wall-clock time written in the log, handled
+    as if they were UTC so that hour and weekday come out unchanged.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import sqlite3, struct, zlib
+import numpy as np
+from db import LOG_DATETIME_ISO
+from db.rollup import RollupStore, HOURLY_TABLE
+
+DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+HOURS_PER_WEEK = 7 * 24
+SECONDS_PER_WEEK = 7 * 86400
+
+# 1970-01-01 was a Thursday, day 3 when Monday is 0
+EPOCH_WEEKDAY = 3
+
+# Characters from no activity to the busiest cell
+SHADES = " .:-=+*#%@"
+
+
+def iter_detections(name_db: str, table: str, sensor=None, since: int = None, chunk: int = 20000):
+    """
+    Yields the detection timestamps of the log table as int64 arrays, chunk by chunk.
+
+    One alert is logged once per chat, so each distinct (date, time, sensor) is
+    yielded once.
+
+    Parameters:
+    name_db (str): Name of the SQLite database file.
+    table (str): Name of the sensor log table.
+    sensor: Only detections of this sensor when given.
+    since (int): Only detections at or after this epoch second when given.
+    chunk (int): Rows fetched per round trip.
+    """
+    if not table or not table.isidentifier():
+        raise ValueError("Invalid table name")
+
+    # Deduplicate on the raw columns first, converting only one row per alert
+    alerts = f"""
+        SELECT DISTINCT date, time, sensor_active
+        FROM "{table}" WHERE sensor_active IS NOT NULL
+    """
+    params = []
+    if sensor is not None:
+        alerts += " AND CAST(sensor_active AS TEXT) = ?"
+        params.append(str(sensor))
+
+    # Malformed dates convert to NULL and come out as -1, dropped below
+    query = f"SELECT COALESCE(CAST(strftime('%s', {LOG_DATETIME_ISO}) AS INTEGER), -1) FROM ({alerts})"
+
+    connect = sqlite3.connect(name_db)
+    try:
+        cursor = connect.cursor()
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk)
+            if not rows:
+                break
+            timestamps = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+            yield timestamps[timestamps >= (0 if since is None else since)]
+    finally:
+        connect.close()
+
+
+def iter_hourly_counts(name_db: str, sensor=None, since: int = None, chunk: int = 20000):
+    """
+    Yields (hour start epoch seconds, detection count) int64 array pairs from the hourly rollup.
+
+    Parameters are the same as iter_detections.
+    """
+    query = f"""
+        SELECT CAST(strftime('%s', bucket || ':00:00') AS INTEGER) AS ts, SUM(count)
+        FROM "{HOURLY_TABLE}"
+    """
+    params = []
+    if sensor is not None:
+        query += " WHERE sensor_id = ?"
+        params.append(str(sensor))
+    query += " GROUP BY bucket"
+
+    connect = sqlite3.connect(name_db)
+    try:
+        cursor = connect.cursor()
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk)
+            if not rows:
+                break
+            data = np.array(rows, dtype=np.int64).reshape(-1, 2)
+            if since is not None:
+                data = data[data[:, 0] >= since - 3599]
+            yield data[:, 0], data[:, 1]
+    finally:
+        connect.close()
+
+
+def load_detections(name_db: str, table: str, sensor=None, since: int = None):
+    """
+    Returns the detection history as sorted timestamps and per-timestamp counts.
+
+    The hourly rollups are used once they have been backfilled from the log,
+    otherwise each distinct alert of the log counts once.
+
+    Returns:
+    tuple: (timestamps int64 array, counts int64 array of the same length)
+    """
+    if RollupStore(name_db).is_backfilled():
+        chunks = list(iter_hourly_counts(name_db, sensor=sensor, since=since))
+    else:
+        chunks = [(timestamps, np.ones(len(timestamps), dtype=np.int64))
+                  for timestamps in iter_detections(name_db, table, sensor=sensor, since=since)]
+
+    if not chunks:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    timestamps = np.concatenate([timestamps for timestamps, _ in chunks])
+    counts = np.concatenate([counts for _, counts in chunks])
+    order = np.argsort(timestamps, kind="stable")
+    return timestamps[order], counts[order]
+
+
+def activity_heatmap(timestamps: np.ndarray, counts: np.ndarray = None) -> np.ndarray:
+    """Counts detections per day-of-week (rows, Monday first) and hour-of-day (columns)."""
+    hour = (timestamps // 3600) % 24
+    weekday = (timestamps // 86400 + EPOCH_WEEKDAY) % 7
+    heatmap = np.bincount(weekday * 24 + hour, weights=counts, minlength=HOURS_PER_WEEK)
+    return heatmap.astype(np.int64).reshape(7, 24)
+
+
+def weekly_trend(timestamps: np.ndarray, end: int, counts: np.ndarray = None, weeks: int = 12, window: int = 4) -> dict:
+    """
+    Detections per week for the last weeks before end, with a moving average.
+
+    Returns:
+    dict: "counts" (oldest week first), "moving_average" (same length, NaN until
+        window weeks are available) and "change" (last week over the previous one, in
+        percent, None if the previous week had no detections).
+    """
+    start = end - weeks * SECONDS_PER_WEEK
+    mask = (timestamps >= start) & (timestamps < end)
+    weights = None if counts is None else counts[mask]
+    per_week = np.bincount((timestamps[mask] - start) // SECONDS_PER_WEEK, weights=weights, minlength=weeks)
+    counts = per_week[:weeks].astype(np.int64)
+
+    moving = np.full(weeks, np.nan)
+    if weeks >= window:
+        moving[window - 1:] = np.convolve(counts, np.ones(window) / window, mode="valid")
+
+    change = None
+    if weeks >= 2 and counts[-2]:
+        change = float((counts[-1] - counts[-2]) / counts[-2] * 100)
+    return {"counts": counts, "moving_average": moving, "change": change}
+
+
+def peak_windows(heatmap: np.ndarray, width: int = 2, top: int = 3) -> list:
+    """
+    Finds the busiest windows of width consecutive hours in the week.
+
+    Windows wrap around midnight and Sunday to Monday and do not overlap.
+
+    Returns:
+    list: (weekday index, start hour, count) tuples, busiest first.
+    """
+    flat = heatmap.reshape(-1)
+    wrapped = np.concatenate([flat, flat[:width - 1]])
+    sums = np.convolve(wrapped, np.ones(width, dtype=np.int64), mode="valid")[:HOURS_PER_WEEK]
+
+    peaks = []
+    taken = np.zeros(HOURS_PER_WEEK, dtype=bool)
+    for start in np.argsort(sums, kind="stable")[::-1]:
+        if len(peaks) == top or sums[start] == 0:
+            break
+        span = (start + np.arange(width)) % HOURS_PER_WEEK
+        if taken[span].any():
+            continue
+        taken[span] = True
+        peaks.append((int(start // 24), int(start % 24), int(sums[start])))
+    return peaks
+
+
+def render_text(heatmap: np.ndarray) -> str:
+    """Renders the heatmap as one line of shade characters per weekday."""
+    peak = heatmap.max()
+    levels = np.zeros_like(heatmap) if peak == 0 else np.ceil(heatmap / peak * (len(SHADES) - 1)).astype(int)
+
+    lines = ["    " + "".join(str(hour // 10) if hour % 6 == 0 else " " for hour in range(24)),
+             "    " + "".join(str(hour % 10) if hour % 6 == 0 else " " for hour in range(24))]
+    for day, row in zip(DAYS, levels):
+        lines.append(f"{day} " + "".join(SHADES[level] for level in row))
+    return "\n".join(lines)
+
+
+def render_png(heatmap: np.ndarray, cell: int = 12) -> bytes:
+    """Renders the heatmap as a PNG image, pale yellow (quiet) to dark red (busy)."""
+    peak = heatmap.max() or 1
+    ratio = (heatmap / peak)[..., None]
+    quiet = np.array([255, 250, 220], dtype=float)
+    busy = np.array([150, 0, 0], dtype=float)
+    rgb = (quiet + (busy - quiet) * ratio).astype(np.uint8)
+
+    # Scale each cell up and add the PNG filter byte (0, none) in front of each row
+    image = np.repeat(np.repeat(rgb, cell, axis=0), cell, axis=1)
+    height, width, _ = image.shape
+    raw = np.concatenate([np.zeros((height, 1), dtype=np.uint8), image.reshape(height, -1)], axis=1)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)) + chunk(b"IEND", b""))
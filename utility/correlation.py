@@ -0,0 +1,170 @@
+"""
+file    : utility/correlation.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Correlation of PIR hits, so a single trigger from wind or heat does not
+    sound the alarm or reach Telegram.
+
+    CORRELATION_RULES lists the rules separated by ";":
+
+        2of1,2,3/30     at least 2 of the sensors 1, 2 and 3 within 30 seconds
+        3x/60           3 hits from the same sensor within 60 seconds
+        3x4,5/60        the same, for sensors 4 and 5 only
+
+    A hit escalates when a rule covering its sensor is met at that hit.
+    Sensors no rule covers escalate on every hit, and an empty
+    CORRELATION_RULES escalates every hit, as before. The hits that do not
+    escalate are still counted and logged.
+
+    Each rule keeps a sliding window updated as hits arrive, so a hit costs
+    O(1) amortised per rule: a repeat rule keeps a deque of the last hit
+    times per sensor (at most its count), a group rule keeps the last hit
+    time per sensor ordered by time and drops the stale ones from the
+    front. Times are the event times reported by the nodes; a hit older
+    than one already seen is taken as happening at the newest time seen.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import re
+from collections import OrderedDict, deque
+
+GROUP_RULE = re.compile(r"^(\d+)\s*of\s*([\w\s,-]+?)\s*/\s*(\d+(?:\.\d+)?)\s*s?$", re.IGNORECASE)
+REPEAT_RULE = re.compile(r"^(\d+)\s*x\s*([\w\s,-]*?)\s*/\s*(\d+(?:\.\d+)?)\s*s?$", re.IGNORECASE)
+
+
+class RepeatRule:
+    """At least `count` hits from one sensor within `seconds`."""
+
+    def __init__(self, count: int, seconds: float, sensors=None):
+        self.count = count
+        self.seconds = seconds
+        self.sensors = sensors  # frozenset of sensor IDs, None for every sensor
+        self._hits = {}  # sensor_id -> deque of the last `count` hit times
+
+    def covers(self, sensor_id: str) -> bool:
+        return self.sensors is None or sensor_id in self.sensors
+
+    def hit(self, sensor_id: str, when: float) -> bool:
+        """Adds a hit and returns True if the rule is met."""
+        hits = self._hits.get(sensor_id)
+        if hits is None:
+            hits = self._hits[sensor_id] = deque(maxlen=self.count)
+        if hits and when < hits[-1]:
+            when = hits[-1]
+        hits.append(when)
+        return len(hits) == self.count and when - hits[0] <= self.seconds
+
+    def __repr__(self):
+        sensors = "" if self.sensors is None else ",".join(sorted(self.sensors))
+        return f"{self.count}x{sensors}/{self.seconds:g}"
+
+
+class GroupRule:
+    """At least `count` distinct sensors of a group hit within `seconds`."""
+
+    def __init__(self, count: int, sensors, seconds: float):
+        self.count = count
+        self.sensors = frozenset(sensors)
+        self.seconds = seconds
+        self._last = OrderedDict()  # sensor_id -> last hit time, oldest first
+        self._latest = float("-inf")
+
+    def covers(self, sensor_id: str) -> bool:
+        return sensor_id in self.sensors
+
+    def hit(self, sensor_id: str, when: float) -> bool:
+        """Adds a hit and returns True if the rule is met."""
+        when = self._latest = max(when, self._latest)
+        self._last[sensor_id] = when
+        self._last.move_to_end(sensor_id)
+        # Sensors whose last hit left the window
+        while next(iter(self._last.values())) < when - self.seconds:
+            self._last.popitem(last=False)
+        return len(self._last) >= self.count
+
+    def __repr__(self):
+        return f"{self.count}of{','.join(sorted(self.sensors))}/{self.seconds:g}"
+
+
+def parse_rules(spec: str) -> list:
+    """
+    Parses CORRELATION_RULES.
+
+    Returns:
+    list: RepeatRule and GroupRule objects, empty for an empty spec.
+
+    Raises:
+    ValueError: If a rule is malformed.
+    """
+    rules = []
+    for text in filter(None, (part.strip() for part in (spec or "").split(";"))):
+        group = GROUP_RULE.match(text)
+        repeat = REPEAT_RULE.match(text)
+        if group:
+            count, sensors, seconds = group.groups()
+            sensors = [s.strip() for s in sensors.split(",") if s.strip()]
+            if not 1 <= int(count) <= len(sensors):
+                raise ValueError(f"Rule {text!r} needs more sensors than it lists")
+            rules.append(GroupRule(int(count), sensors, float(seconds)))
+        elif repeat:
+            count, sensors, seconds = repeat.groups()
+            sensors = frozenset(s.strip() for s in sensors.split(",") if s.strip()) or None
+            if int(count) < 1:
+                raise ValueError(f"Rule {text!r} needs a count of at least 1")
+            rules.append(RepeatRule(int(count), float(seconds), sensors))
+        else:
+            raise ValueError(f"Invalid correlation rule {text!r}, expected e.g. 2of1,2,3/30 or 3x/60")
+    return rules
+
+
+class Correlator:
+    """Splits motion events into the ones that escalate and the raw hits that do not."""
+
+    def __init__(self, rules: list):
+        self.rules = rules
+
+    @classmethod
+    def from_spec(cls, spec: str):
+        """Builds a Correlator from CORRELATION_RULES; raises ValueError if malformed."""
+        return cls(parse_rules(spec))
+
+    def hit(self, sensor_id, when: float) -> bool:
+        """Feeds one hit to every rule covering its sensor; True if it escalates."""
+        sensor_id = str(sensor_id)
+        covered = escalate = False
+        for rule in self.rules:
+            if rule.covers(sensor_id):
+                covered = True
+                # Every covering rule sees the hit, even once one is met
+                escalate = rule.hit(sensor_id, when) or escalate
+        return escalate or not covered
+
+    def split(self, events: list) -> tuple:
+        """
+        Returns (escalated, suppressed) lists of the events, in order.
+        """
+        if not self.rules:
+            return list(events), []
+        escalated, suppressed = [], []
+        for event in events:
+            if self.hit(event.sensor_id, event.event_time().timestamp()):
+                escalated.append(event)
+            else:
+                suppressed.append(event)
+        return escalated, suppressed
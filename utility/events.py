@@ -0,0 +1,145 @@
+"""
+file    : utility/events.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Parses the MQTT payloads published by the ESP8266/ESP32 edge nodes.
+
+    A node normally publishes one JSON object per PIR trigger. While it is
+    offline it buffers triggers and flushes them on reconnect as a single
+    array payload, either as a bare list of event objects or as a node
+    object carrying an "events" list. Node level fields (sensorid, core,
+    sensitivity) are inherited by every buffered event that omits them.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import json
+from datetime import datetime
+
+# Fields a buffered event inherits from the node object that wraps it
+NODE_FIELDS = ("sensorid", "core", "sensitivity")
+
+# Epoch values below this are uptime counters from nodes without NTP
+MIN_EPOCH = 1_000_000_000
+
+
+class MotionEvent:
+    """A single PIR event reported by an edge node."""
+
+    # No per-instance __dict__, a burst of buffered events stays small
+    __slots__ = ("motion", "sensor_id", "timestamp", "core", "sensitivity", "received_at")
+
+    def __init__(self, motion, sensor_id, timestamp=None, core=None, sensitivity=None, received_at=None):
+        self.motion = motion
+        self.sensor_id = sensor_id
+        self.timestamp = timestamp
+        self.core = core
+        self.sensitivity = sensitivity
+        self.received_at = received_at or datetime.now()
+
+    @classmethod
+    def from_dict(cls, data: dict, received_at=None):
+        """Builds an event from one decoded JSON object."""
+        return cls(
+            motion=data.get("motion"),
+            sensor_id=data.get("sensorid"),
+            timestamp=data.get("time"),
+            core=data.get("core"),
+            sensitivity=data.get("sensitivity"),
+            received_at=received_at,
+        )
+
+    def event_time(self) -> datetime:
+        """Returns the time the node saw the event, falling back to the receive time.
+
+        Accepts epoch seconds or milliseconds, ISO 8601 strings and plain
+        "HH:MM:SS" strings (taken as today). Anything else, including uptime
+        counters from nodes that never synced NTP, falls back to the time the
+        broker message was received.
+        """
+        ts = self.timestamp
+        try:
+            if isinstance(ts, (int, float)) and not isinstance(ts, bool):
+                if ts > MIN_EPOCH * 1000:
+                    ts = ts / 1000
+                if ts >= MIN_EPOCH:
+                    return datetime.fromtimestamp(ts)
+            elif isinstance(ts, str) and ts:
+                try:
+                    return datetime.fromisoformat(ts)
+                except ValueError:
+                    clock = datetime.strptime(ts, "%H:%M:%S").time()
+                    return datetime.combine(self.received_at.date(), clock)
+        except (ValueError, OverflowError, OSError):
+            pass
+        return self.received_at
+
+    def __repr__(self):
+        return (f"MotionEvent(motion={self.motion!r}, sensor_id={self.sensor_id!r}, "
+                f"timestamp={self.timestamp!r})")
+
+
+def parse_payload(message: str, received_at=None) -> list:
+    """Decodes an MQTT payload into a list of MotionEvent.
+
+    Parameters:
+    message (str): Raw payload, a JSON object, a JSON array of objects, or
+        a JSON object with an "events" array.
+    received_at (datetime): Time the payload was received, defaults to now.
+
+    Returns:
+    list: The events in the order the node sent them.
+
+    Raises:
+    json.JSONDecodeError: If the payload is not valid JSON.
+    ValueError: If the payload is valid JSON but not an event shape.
+    """
+    received_at = received_at or datetime.now()
+    data = json.loads(message)
+
+    node = {}
+    if isinstance(data, dict) and isinstance(data.get("events"), list):
+        node = {key: data[key] for key in NODE_FIELDS if key in data}
+        items = data["events"]
+    elif isinstance(data, dict):
+        items = [data]
+    elif isinstance(data, list):
+        items = data
+    else:
+        raise ValueError(f"Unsupported payload type: {type(data).__name__}")
+
+    events = []
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError(f"Unsupported event type: {type(item).__name__}")
+        events.append(MotionEvent.from_dict({**node, **item}, received_at=received_at))
+    return events
+
+
+def summarise_batch(events: list) -> str:
+    """Builds one notification text describing a batch of motion events."""
+    times = sorted(event.event_time() for event in events)
+    sensors = sorted({str(event.sensor_id) for event in events})
+    first = times[0].strftime("%H:%M:%S")
+    last = times[-1].strftime("%H:%M:%S")
+
+    label = "sensor" if len(sensors) == 1 else "sensors"
+    text = f"🐒 {len(events)} motion events detected by {label} {', '.join(sensors)}"
+    if first == last:
+        return f"{text} at {first}"
+    return f"{text} between {first} and {last}"
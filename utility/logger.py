@@ -0,0 +1,205 @@
+"""
+file    : utility/logger.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Logging setup of the whole program.
+
+    Every module logs with logging.getLogger(__name__). The root logger
+    only holds a QueueHandler, so a log call on a hot path (MQTT callback,
+    alert sending) just puts the record on an in-memory queue; a single
+    listener thread formats the records and writes them to the console
+    and to a size-rotated file of JSON lines, one object per record:
+
+        {"time": "2025-06-01T18:03:12.481+07:00", "level": "INFO",
+         "logger": "main", "message": "...", "sensor_id": 2}
+
+    Fields passed with extra={...} are added to the JSON object. Levels
+    are set per module with a spec like "INFO,db=WARNING,bot.telegram=DEBUG"
+    (the first item without "=" is the root level).
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import atexit, copy, json, logging, os, queue, sys
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Attributes every LogRecord has, anything else came from extra={...}
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+CONSOLE_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+CONSOLE_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_listener = None
+_configured_loggers = set()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.fromtimestamp(record.created).astimezone().isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread.
+
+    The stock prepare() formats the whole record into msg on the caller's
+    thread; here only the message is merged with its args and a traceback
+    is turned into text, so extra fields and the exception reach the JSON
+    formatter separately.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def parse_levels(spec: str, default: str = "INFO") -> dict:
+    """
+    Parses a level spec like "INFO,db=WARNING,bot.telegram=DEBUG".
+
+    Returns:
+    dict: logger name ("" for the root) -> level name
+
+    Raises:
+    ValueError: If a level name is unknown.
+    """
+    levels = {"": default.upper()}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, _, level = item.rpartition("=")
+        level = level.strip().upper()
+        if not isinstance(logging.getLevelName(level), int):
+            raise ValueError(f"Unknown log level {level!r}")
+        levels[name.strip()] = level
+    return levels
+
+
+def apply_levels(spec: str, default: str = "INFO"):
+    """
+    Sets the level of the root logger and of each module named in spec.
+
+    Modules set by an earlier call but missing from spec go back to
+    inheriting the root level, so this can be called again on reload.
+    """
+    levels = parse_levels(spec, default)
+    for name in _configured_loggers - set(levels):
+        logging.getLogger(name).setLevel(logging.NOTSET)
+    for name, level in levels.items():
+        logging.getLogger(name or None).setLevel(level)
+    _configured_loggers.clear()
+    _configured_loggers.update(name for name in levels if name)
+
+
+def setup_logging(level: str = "INFO", levels: str = "", file: str = "", max_bytes: int = 5 * 1024 * 1024,
+                  backups: int = 5, console: bool = True, records=None):
+    """
+    Routes all logging through a queue to the console and a rotating JSON file.
+
+    Safe to call more than once; the previous listener is stopped first.
+
+    Parameters:
+    level (str): Root level.
+    levels (str): Per-module levels, see parse_levels.
+    file (str): Path of the JSON log file, no file when empty.
+    max_bytes (int): Size at which the file is rotated.
+    backups (int): Number of rotated files kept (log.1 ... log.N).
+    console (bool): Also write readable lines to stderr.
+    records: Queue the records travel through, a multiprocessing queue when
+        worker processes log through this listener (see setup_worker_logging).
+    """
+    global _listener
+    stop_logging()
+
+    handlers = []
+    if console:
+        stream = logging.StreamHandler(sys.stderr)
+        stream.setFormatter(logging.Formatter(CONSOLE_FORMAT, CONSOLE_DATE_FORMAT))
+        handlers.append(stream)
+    if file:
+        directory = os.path.dirname(file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        rotating = RotatingFileHandler(file, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        rotating.setFormatter(JsonFormatter())
+        handlers.append(rotating)
+
+    # Unbounded, a log call must never block the caller
+    if records is None:
+        records = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_QueueHandler(records))
+    apply_levels(levels, level)
+
+    _listener = QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    logging.captureWarnings(True)
+
+
+def setup_worker_logging(records, level: str = "INFO", levels: str = ""):
+    """
+    Sends the records of a worker process to the listener of its parent.
+
+    Call first thing in a process started by fork; the listener inherited
+    from the parent does not run in the child and is left alone.
+
+    Parameters:
+    records: The multiprocessing queue given to setup_logging in the parent.
+    level (str), levels (str): As for setup_logging.
+    """
+    global _listener
+    _listener = None
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_QueueHandler(records))
+    apply_levels(levels, level)
+
+
+def stop_logging():
+    """Writes out queued records and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,114 @@
+"""
+file    : utility/membench.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Peak memory of the ingest path under a synthetic burst, to catch memory
+    regressions before they reach a 1 GB Raspberry Pi.
+
+    Edge nodes flushing their offline buffers at once are simulated with
+    MESSAGES payloads of BATCH events from SENSORS sensors. Each payload goes
+    the way main.on_message takes it: parsed into MotionEvent, summarised and
+    counted in the rollups of a temporary database. The peak of the Python
+    heap during the burst is measured with tracemalloc, the peak RSS of the
+    process is read from the kernel, and both are checked against a limit.
+
+        python -m utility.membench
+        python -m utility.membench --messages 5000 --batch 100 --max-kib 4096 --max-rss-kib 65536
+
+    Exits with status 1 when either peak is over its limit, so it can be run
+    as a check before deploying a new version (see README.md).
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import argparse, json, os, tempfile, time, tracemalloc
+from db.rollup import RollupStore
+from utility import memory
+from utility.events import parse_payload, summarise_batch
+
+# Default limits, well above a healthy run (about 40 KiB of heap, 17 MiB RSS on a
+# 64-bit PC) so only leaks trip them
+MAX_PEAK_KIB = 2048
+MAX_PEAK_RSS_KIB = 48 * 1024
+
+
+def burst_payloads(messages: int, batch: int, sensors: int):
+    """Yields buffered-flush payloads as an edge node publishes them."""
+    now = int(time.time())
+    for i in range(messages):
+        yield json.dumps({
+            "sensorid": str(i % sensors + 1),
+            "core": 1,
+            "sensitivity": 5,
+            "events": [{"motion": 1, "time": now - batch + j} for j in range(batch)],
+        })
+
+
+def run(messages: int = 2000, batch: int = 50, sensors: int = 4) -> dict:
+    """
+    Runs the burst and returns its measurements.
+
+    Returns:
+    dict: "events", "seconds", "peak_kib" (heap peak during the burst) and
+        "rss_kib" / "peak_rss_kib" of the process afterwards.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        rollups = RollupStore(os.path.join(directory, "membench.db"))
+        events = 0
+        tracemalloc.start()
+        started = time.monotonic()
+        try:
+            for payload in burst_payloads(messages, batch, sensors):
+                motions = [event for event in parse_payload(payload) if event.motion]
+                summarise_batch(motions)
+                rollups.record([(event.sensor_id, event.event_time()) for event in motions])
+                events += len(motions)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        seconds = time.monotonic() - started
+
+    return {"events": events, "seconds": seconds, "peak_kib": peak // 1024,
+            "rss_kib": memory.rss_kib(), "peak_rss_kib": memory.peak_rss_kib()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Peak memory of the ingest path under a synthetic burst")
+    parser.add_argument("--messages", type=int, default=2000, help="MQTT payloads in the burst")
+    parser.add_argument("--batch", type=int, default=50, help="buffered events per payload")
+    parser.add_argument("--sensors", type=int, default=4, help="distinct sensor IDs")
+    parser.add_argument("--max-kib", type=int, default=MAX_PEAK_KIB, help="limit of the heap peak in KiB")
+    parser.add_argument("--max-rss-kib", type=int, default=MAX_PEAK_RSS_KIB,
+                        help="limit of the process peak RSS in KiB")
+    args = parser.parse_args()
+
+    result = run(args.messages, args.batch, args.sensors)
+    print(f"{result['events']} events in {result['seconds']:.1f}s, heap peak {result['peak_kib']} KiB "
+          f"(limit {args.max_kib} KiB), peak RSS {result['peak_rss_kib']} KiB (limit {args.max_rss_kib} KiB)")
+
+    failures = []
+    if result["peak_kib"] > args.max_kib:
+        failures.append("heap peak over the limit")
+    if result["peak_rss_kib"] is None:
+        print("Peak RSS not available on this platform, not checked")
+    elif result["peak_rss_kib"] > args.max_rss_kib:
+        failures.append("peak RSS over the limit")
+    if failures:
+        print(f"FAIL: {', '.join(failures)}")
+        raise SystemExit(1)
+    print("OK")
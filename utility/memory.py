@@ -0,0 +1,73 @@
+"""
+file    : utility/memory.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Resident memory of the running process, for the startup baseline in the
+    log and the /status command.
+
+    RSS and its peak are read from /proc/self/status (VmRSS, VmHWM). Where
+    that file does not exist only the peak is known, from getrusage.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import sys
+
+STATUS_FILE = "/proc/self/status"
+
+
+def _status_kib(field: str):
+    try:
+        with open(STATUS_FILE) as file:
+            for line in file:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def rss_kib():
+    """Returns the current resident set size in KiB, None if it is not available."""
+    return _status_kib("VmRSS")
+
+
+def peak_rss_kib():
+    """Returns the peak resident set size in KiB, None if it is not available."""
+    peak = _status_kib("VmHWM")
+    if peak is not None:
+        return peak
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # Bytes on macOS
+
+
+def summary() -> str:
+    """One line with the current and peak RSS, for logs and the /status command."""
+    rss, peak = rss_kib(), peak_rss_kib()
+    if rss is None and peak is None:
+        return "RSS unknown"
+    parts = []
+    if rss is not None:
+        parts.append(f"RSS {rss / 1024:.1f} MiB")
+    if peak is not None:
+        parts.append(f"peak {peak / 1024:.1f} MiB")
+    return ", ".join(parts)
@@ -0,0 +1,161 @@
+"""
+file    : utility/profiler.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    On-demand profiling of the running process, used by the /profile
+    command to see why a box in the field is slow without logging in.
+
+    For the requested duration a stack sampler reads the stack of every
+    thread (MQTT network loop, audio, bot event loop, database threads)
+    from sys._current_frames() at a fixed interval, and tracemalloc traces
+    new allocations. The report lists the functions seen most often on the
+    stacks (cumulative: anywhere on the stack, self: the frame running),
+    where each thread was running and the sites of the memory allocated
+    during the run that is still alive at its end.
+
+    Nothing is hooked into the program: when no profile is running there
+    is no sampling loop, no trace function and no tracemalloc, so the
+    overhead is zero.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import logging, os, sys, threading, time, tracemalloc
+from collections import Counter
+from datetime import datetime
+
+log = logging.getLogger(__name__)
+
+MIN_SECONDS = 1
+MAX_SECONDS = 300
+
+
+def _function(code) -> str:
+    """Readable name of a code object: function (file:line)."""
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Profiler:
+    """Runs one stack sampling and tracemalloc session at a time."""
+
+    def __init__(self, interval: float = 0.01, top: int = 25):
+        """
+        Parameters:
+        interval (float): Seconds between two stack samples.
+        top (int): Entries listed per section of the report.
+        """
+        self.interval = interval
+        self.top = top
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def sample(self, seconds: float) -> dict:
+        """
+        Samples the stacks of every other thread for the given time.
+
+        Returns:
+        dict: "samples" (sampling rounds), "stacks" (thread stacks read),
+            "cumulative" and "self" (Counter of function names) and
+            "threads" (thread name -> Counter of its running functions).
+        """
+        me = threading.get_ident()
+        cumulative, own, threads = Counter(), Counter(), {}
+        samples = stacks = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                running = _function(frame.f_code)
+                threads.setdefault(names.get(ident, f"thread-{ident}"), Counter())[running] += 1
+                own[running] += 1
+                stacks += 1
+                seen = set()
+                while frame is not None:
+                    seen.add(frame.f_code)
+                    frame = frame.f_back
+                cumulative.update(_function(code) for code in seen)
+            samples += 1
+            time.sleep(self.interval)
+        return {"samples": samples, "stacks": stacks, "cumulative": cumulative, "self": own, "threads": threads}
+
+    def profile(self, seconds: float) -> str:
+        """
+        Profiles the process for the given time and returns the text report.
+        Blocks the calling thread, which is left out of the samples.
+
+        Raises:
+        RuntimeError: If a profile is already running.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        try:
+            # Leave tracemalloc as it was if something else started it
+            tracing = tracemalloc.is_tracing()
+            if not tracing:
+                tracemalloc.start()
+            log.info("Profiling for %s seconds", seconds)
+            started = datetime.now()
+            try:
+                stacks = self.sample(seconds)
+                snapshot = tracemalloc.take_snapshot().filter_traces((
+                    tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__),
+                ))
+            finally:
+                if not tracing:
+                    tracemalloc.stop()
+            return self.report(started, seconds, stacks, snapshot)
+        finally:
+            self._lock.release()
+
+    def report(self, started: datetime, seconds: float, stacks: dict, snapshot) -> str:
+        """Formats the sampled stacks and allocations as plain text."""
+        lines = [f"Profile of pid {os.getpid()} started {started:%Y-%m-%d %H:%M:%S}, "
+                 f"{seconds} s, {stacks['samples']} samples every {self.interval * 1000:.0f} ms", ""]
+
+        # Per thread: where it was running, as a share of its own samples
+        lines.append("Threads")
+        for name, counter in sorted(stacks["threads"].items()):
+            total = sum(counter.values())
+            lines.append(f"  {name}")
+            for function, count in counter.most_common(3):
+                lines.append(f"    {count * 100 / total:6.1f}%  {function}")
+
+        # Overall: share of all thread stacks read
+        samples = max(stacks["stacks"], 1)
+        for title, counter in (("Top functions by cumulative samples", stacks["cumulative"]),
+                               ("Top functions by self samples", stacks["self"])):
+            lines += ["", title]
+            for name, count in counter.most_common(self.top):
+                lines.append(f"  {count * 100 / samples:6.1f}%  {name}")
+
+        statistics = snapshot.statistics("lineno")
+        lines += ["", f"Top allocation sites (alive at the end, {sum(s.size for s in statistics) / 1024:.1f} KiB total)"]
+        for stat in statistics[:self.top]:
+            frame = stat.traceback[0]
+            lines.append(f"  {stat.size / 1024:9.1f} KiB  {stat.count:7d} blocks  "
+                         f"{os.path.basename(frame.filename)}:{frame.lineno}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide profiler used by the /profile command
+profiler = Profiler()
@@ -0,0 +1,119 @@
+"""
+file    : utility/readiness.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Readiness gates for the subsystems brought up at startup (audio, MQTT,
+    database, Telegram). Each subsystem starts in its own thread or task
+    and marks itself ready or failed here; other code checks a gate instead
+    of waiting for the whole program to finish starting. The time from
+    process start to ready is recorded per subsystem.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import logging, threading, time
+
+log = logging.getLogger(__name__)
+
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+
+
+class Subsystem:
+    """State of one startup gate."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = PENDING
+        self.error = None
+        self.ready_after = None
+        self.event = threading.Event()
+
+
+class Readiness:
+    """Tracks the readiness of named subsystems, safe to use from any thread."""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self._subsystems = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name: str) -> Subsystem:
+        with self._lock:
+            if name not in self._subsystems:
+                self._subsystems[name] = Subsystem(name)
+            return self._subsystems[name]
+
+    def begin(self, *names: str):
+        """Declares subsystems that are expected to become ready."""
+        for name in names:
+            self._get(name)
+
+    def mark_ready(self, name: str):
+        """Opens the gate of a subsystem and reports its time-to-ready."""
+        subsystem = self._get(name)
+        if subsystem.state == READY:
+            return
+        subsystem.state = READY
+        subsystem.error = None
+        subsystem.ready_after = time.monotonic() - self.started_at
+        subsystem.event.set()
+        log.info("✅ %s ready in %.2f s", name, subsystem.ready_after, extra={"subsystem": name})
+
+        if self.all_ready():
+            log.info("🐒 All subsystems ready in %.2f s", subsystem.ready_after)
+
+    def mark_failed(self, name: str, error=None):
+        """Records that a subsystem could not start; the gate stays closed."""
+        subsystem = self._get(name)
+        subsystem.state = FAILED
+        subsystem.error = str(error) if error else None
+        log.error("❌ %s failed to start%s", name, f": {error}" if error else "", extra={"subsystem": name})
+
+    def is_ready(self, name: str) -> bool:
+        return self._get(name).state == READY
+
+    def wait(self, name: str, timeout: float = None) -> bool:
+        """Blocks until the subsystem is ready, returns False on timeout."""
+        return self._get(name).event.wait(timeout)
+
+    def all_ready(self) -> bool:
+        with self._lock:
+            return all(s.state == READY for s in self._subsystems.values())
+
+    def report(self) -> list:
+        """Returns (name, state, seconds to ready or None, error) per subsystem."""
+        with self._lock:
+            return [(s.name, s.state, s.ready_after, s.error) for s in self._subsystems.values()]
+
+    def summary(self) -> str:
+        """One line per subsystem, for logs and the /status command."""
+        lines = []
+        for name, state, ready_after, error in self.report():
+            if state == READY:
+                lines.append(f"{name}: ready ({ready_after:.2f} s)")
+            elif state == FAILED:
+                lines.append(f"{name}: failed{f' ({error})' if error else ''}")
+            else:
+                lines.append(f"{name}: starting")
+        return "\n".join(lines)
+
+
+# Process-wide readiness gates
+readiness = Readiness()
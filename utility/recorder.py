@@ -0,0 +1,112 @@
+"""
+file    : utility/recorder.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Append-only recording of the raw MQTT messages received from the edge
+    nodes, so a real burst from the field can be replayed against a new
+    build with utility/replay.py.
+
+    The file starts with the 8 byte magic MAGIC, followed by one record per
+    message:
+
+        receive time   float64, epoch seconds
+        topic length   uint16
+        payload length uint32
+        topic          UTF-8 bytes
+        payload        raw bytes
+
+    All numbers are big endian. Records are only ever appended; a record cut
+    short by a crash is ignored when the file is read.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import logging, os, struct, threading, time
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"MQTTREC1"
+HEADER = struct.Struct(">dHI")
+
+
+class Recorder:
+    """Appends raw MQTT messages to a recording file, safe to use from any thread."""
+
+    def __init__(self, path: str):
+        """
+        Parameters:
+        path (str): Recording file, created with its directory on the first message.
+        """
+        self.path = path
+        self.count = 0
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        file = open(self.path, "ab")
+        if file.tell() == 0:
+            file.write(MAGIC)
+        log.info("Recording MQTT messages to %s", self.path)
+        return file
+
+    def record(self, topic: str, payload: bytes, received_at: float = None):
+        """Appends one message; received_at defaults to now."""
+        topic = topic.encode("utf-8")
+        with self._lock:
+            if self._file is None:
+                self._file = self._open()
+            self._file.write(HEADER.pack(received_at or time.time(), len(topic), len(payload)))
+            self._file.write(topic)
+            self._file.write(payload)
+            self._file.flush()
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_recording(path: str):
+    """
+    Yields the messages of a recording in the order they were received.
+
+    Yields:
+    tuple: (receive time in epoch seconds, topic, payload bytes)
+
+    Raises:
+    ValueError: If the file is not a recording.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an MQTT recording")
+        while True:
+            header = file.read(HEADER.size)
+            if len(header) < HEADER.size:
+                break
+            received_at, topic_length, payload_length = HEADER.unpack(header)
+            topic = file.read(topic_length)
+            payload = file.read(payload_length)
+            if len(topic) < topic_length or len(payload) < payload_length:
+                log.warning("Recording %s ends with a partial message, ignored", path)
+                break
+            yield received_at, topic.decode("utf-8"), payload
@@ -0,0 +1,167 @@
+"""
+file    : utility/replay.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    Replays an MQTT recording (utility/recorder.py) through main.on_message,
+    to regression-test a build on real field traffic.
+
+        python -m utility.replay recordings/mqtt.rec              # as recorded (1x)
+        python -m utility.replay recordings/mqtt.rec --speed 10   # 10 times faster
+        python -m utility.replay recordings/mqtt.rec --speed max  # no waiting
+        python -m utility.replay recordings/mqtt.rec --json       # machine readable
+
+    Messages are delivered in recorded order, from one thread as the MQTT
+    network loop does, with the recorded gaps divided by the speed. Each
+    message keeps its recorded receive time, so the results do not depend
+    on the speed. The
+    alerts on_message raises are counted instead of dispatched, so a replay
+    plays no sound, sends nothing to Telegram and writes nothing to the
+    database. The report has the throughput, the time on_message took per
+    message, how far delivery fell behind the recorded schedule, the number
+    of alerts and alerted motion events, and the hits the correlation rules
+    (CORRELATION_RULES) kept from raising an alert.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import argparse, json, time
+from utility.recorder import read_recording
+
+
+class ReplayMessage:
+    """The part of paho's MQTTMessage that on_message uses, plus the recorded time.
+
+    on_message takes received_at (epoch seconds) as the time the message
+    arrived, so events without a usable node timestamp are correlated on
+    the recorded schedule whatever the playback speed.
+    """
+
+    def __init__(self, topic: str, payload: bytes, received_at: float = None):
+        self.topic = topic
+        self.payload = payload
+        self.received_at = received_at
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Nearest-rank percentile of sorted values, 0 for none."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def replay(path: str, handler, speed: float = 1.0) -> dict:
+    """
+    Delivers the messages of a recording to handler(client, userdata, msg).
+
+    Parameters:
+    path (str): Recording file.
+    handler (callable): MQTT on_message callback.
+    speed (float): Playback speed, 0 for as fast as possible.
+
+    Returns:
+    dict: "messages", "seconds", "recorded_seconds", "durations" (seconds per
+        message, sorted) and "lags" (seconds behind schedule, sorted).
+    """
+    durations, lags = [], []
+    first = None
+    started = time.monotonic()
+    for received_at, topic, payload in read_recording(path):
+        if first is None:
+            first = received_at
+        recorded = received_at - first
+        due = started + (recorded / speed if speed else 0.0)
+        now = time.monotonic()
+        if now < due:
+            time.sleep(due - now)
+            now = time.monotonic()
+
+        handler(None, None, ReplayMessage(topic, payload, received_at))
+        durations.append(time.monotonic() - now)
+        lags.append(max(now - due, 0.0))
+
+    return {
+        "messages": len(durations),
+        "seconds": time.monotonic() - started,
+        "recorded_seconds": recorded if durations else 0.0,
+        "durations": sorted(durations),
+        "lags": sorted(lags),
+    }
+
+
+def report(result: dict, alerts: int, motions: int, uncorrelated: int = 0) -> dict:
+    """Summarises a replay result into the printed figures."""
+    durations, lags = result["durations"], result["lags"]
+    seconds = result["seconds"] or 1e-9
+    return {
+        "messages": result["messages"],
+        "seconds": round(result["seconds"], 3),
+        "recorded_seconds": round(result["recorded_seconds"], 3),
+        "messages_per_second": round(result["messages"] / seconds, 1),
+        "handler_ms_p50": round(percentile(durations, 0.50) * 1000, 3),
+        "handler_ms_p95": round(percentile(durations, 0.95) * 1000, 3),
+        "handler_ms_p99": round(percentile(durations, 0.99) * 1000, 3),
+        "handler_ms_max": round((durations[-1] if durations else 0.0) * 1000, 3),
+        "lag_ms_max": round((lags[-1] if lags else 0.0) * 1000, 3),
+        "alerts": alerts,
+        "alerted_motions": motions,
+        "uncorrelated_hits": uncorrelated,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay an MQTT recording through main.on_message")
+    parser.add_argument("recording", help="file written with MQTT_RECORD_FILE")
+    parser.add_argument("--speed", default="1", help="playback speed, e.g. 1, 10 or max (default 1)")
+    parser.add_argument("--log-level", default="WARNING", help="log level during the replay")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    speed = 0.0 if args.speed.lower() == "max" else float(args.speed.lower().rstrip("x"))
+    if speed < 0:
+        parser.error("--speed must be positive or max")
+
+    import main
+    from utility.logger import apply_levels
+    apply_levels("", args.log_level)
+
+    # Count the alerts instead of dispatching them, and do not record the replay
+    counts = {"alerts": 0, "motions": 0, "uncorrelated": 0}
+
+    def count(motions):
+        counts["alerts"] += 1
+        counts["motions"] += len(motions)
+
+    def count_raw(motions):
+        counts["uncorrelated"] += len(motions)
+
+    main.dispatch = count
+    main.log_raw = count_raw
+    main.recorder = None
+
+    figures = report(replay(args.recording, main.on_message, speed),
+                     counts["alerts"], counts["motions"], counts["uncorrelated"])
+    if args.json:
+        print(json.dumps(figures))
+    else:
+        print(f"Replayed {figures['messages']} messages ({figures['recorded_seconds']} s recorded) "
+              f"in {figures['seconds']} s at {args.speed}x: {figures['messages_per_second']} msg/s")
+        print(f"on_message: p50 {figures['handler_ms_p50']} ms, p95 {figures['handler_ms_p95']} ms, "
+              f"p99 {figures['handler_ms_p99']} ms, max {figures['handler_ms_max']} ms; "
+              f"max lag behind schedule {figures['lag_ms_max']} ms")
+        print(f"Alerts: {figures['alerts']} ({figures['alerted_motions']} motion events), "
+              f"{figures['uncorrelated_hits']} uncorrelated hits")
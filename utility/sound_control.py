@@ -19,6 +19,10 @@ copyright:
     along with this program. If not, see <https://www.gnu.org/licenses/>
 """
 
+import logging
+
+log = logging.getLogger(__name__)
+
 class sound_control:
     """Sound control utility for enabling/disabling sound playback."""
     def __init__(self):
@@ -31,11 +35,11 @@ class sound_control:
                 return file.read().strip().lower() == "on"
         
         except FileNotFoundError:
-            print(f"Warning: {self.sound_file} not found. Defaulting to sound enabled.")
+            log.warning("%s not found. Defaulting to sound enabled.", self.sound_file)
             return True  # Default to sound enabled if file does not exist
         
         except Exception as e:
-            print(f"Error reading {self.sound_file}: {e}")
+            log.error("Error reading %s: %s", self.sound_file, e)
             return True  # Default to sound enabled on error
     
     def set_sound_enabled(self, enabled: bool):
@@ -0,0 +1,158 @@
+"""
+file    : utility/supervisor.py
+version : 1.0.0
+author  : basyair7
+date    : 2025
+description:
+    A small process supervisor for the multi-process mode (RUN_MODE=multi).
+
+    Each worker runs in its own process and proves it is alive by calling
+    beat() on its heartbeat, a shared double holding the time of its last
+    beat. The supervisor checks every worker periodically: a process that
+    exited is started again, and a process whose heartbeat is older than
+    the timeout is considered hung, terminated (killed if it does not stop)
+    and started again. Restarts of a worker that keeps failing are delayed
+    with an exponential backoff.
+
+Copyright:
+    Copyright (C) 2025, basyair7
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program. If not, see <https://www.gnu.org/licenses/>
+"""
+
+import logging, time
+
+log = logging.getLogger(__name__)
+
+
+def beat(heartbeat):
+    """Records that the calling worker is alive."""
+    heartbeat.value = time.monotonic()
+
+
+class Worker:
+    """One supervised process and its restart state."""
+
+    def __init__(self, context, name: str, target, args: tuple):
+        self.name = name
+        self.target = target
+        self.args = args
+        self.heartbeat = context.Value("d", 0.0, lock=False)
+        self.process = None
+        self.restarts = 0
+        self.failures = 0  # Consecutive failures, reset once the worker stays up
+        self.next_start = 0.0
+        self.started_at = None
+
+
+class Supervisor:
+    """Starts the workers and restarts any that exit or stop beating."""
+
+    def __init__(self, context, heartbeat_timeout: float = 30, check_interval: float = 2,
+                 min_backoff: float = 1, max_backoff: float = 60, stable_after: float = 60, stop_grace: float = 5):
+        """
+        Parameters:
+        context: multiprocessing context the processes are created with.
+        heartbeat_timeout (float): Seconds without a beat after which a worker is restarted.
+        check_interval (float): Seconds between checks.
+        min_backoff (float), max_backoff (float): Bounds of the delay before a restart.
+        stable_after (float): Seconds a worker must run before its backoff is reset.
+        stop_grace (float): Seconds a worker gets to exit after SIGTERM on stop().
+        """
+        self.context = context
+        self.heartbeat_timeout = heartbeat_timeout
+        self.check_interval = check_interval
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.stop_grace = stop_grace
+        self.workers = []
+        self._running = False
+
+    def add(self, name: str, target, *args):
+        """Adds a worker; target(heartbeat, *args) runs in its own process."""
+        self.workers.append(Worker(self.context, name, target, args))
+
+    def _start(self, worker: Worker):
+        worker.heartbeat.value = time.monotonic()  # Grace period for the startup
+        worker.process = self.context.Process(
+            target=worker.target, args=(worker.heartbeat, *worker.args), name=worker.name, daemon=True
+        )
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        log.info("Started %s worker (pid %d)", worker.name, worker.process.pid,
+                 extra={"worker": worker.name, "pid": worker.process.pid})
+
+    def _terminate(self, worker: Worker, grace: float = 5):
+        process = worker.process
+        if process is None or not process.is_alive():
+            return
+        process.terminate()
+        process.join(grace)
+        if process.is_alive():
+            log.warning("%s worker did not stop, killing it", worker.name)
+            process.kill()
+            process.join()
+
+    def _schedule_restart(self, worker: Worker, reason: str):
+        now = time.monotonic()
+        if worker.started_at is not None and now - worker.started_at >= self.stable_after:
+            worker.failures = 0
+        delay = min(self.min_backoff * 2 ** worker.failures, self.max_backoff)
+        worker.failures += 1
+        worker.restarts += 1
+        worker.next_start = now + delay
+        worker.process = None
+        log.error("%s worker %s, restarting in %.0f s", worker.name, reason, delay,
+                  extra={"worker": worker.name, "restarts": worker.restarts})
+
+    def check(self):
+        """Restarts workers that exited or hung; runs one supervision round."""
+        now = time.monotonic()
+        for worker in self.workers:
+            if worker.process is None:
+                if now >= worker.next_start:
+                    self._start(worker)
+            elif not worker.process.is_alive():
+                self._schedule_restart(worker, f"exited with code {worker.process.exitcode}")
+            elif now - worker.heartbeat.value > self.heartbeat_timeout:
+                self._terminate(worker)
+                self._schedule_restart(worker, f"sent no heartbeat for {now - worker.heartbeat.value:.0f} s")
+
+    def status(self) -> list:
+        """Returns (name, pid or None, seconds since the last beat, restarts) per worker."""
+        now = time.monotonic()
+        return [(worker.name, worker.process.pid if worker.process else None,
+                 now - worker.heartbeat.value, worker.restarts) for worker in self.workers]
+
+    def run(self):
+        """Starts every worker and supervises them until stop() is called."""
+        self._running = True
+        try:
+            while self._running:
+                self.check()
+                time.sleep(self.check_interval)
+        finally:
+            self.stop()
+
+    def request_stop(self):
+        """Makes run() return after the current round; safe to call from a signal handler."""
+        self._running = False
+
+    def stop(self):
+        """Stops supervising and terminates every worker, in the order they were added."""
+        self._running = False
+        for worker in self.workers:
+            self._terminate(worker, self.stop_grace)
+            if worker.process is not None:
+                log.info("Stopped %s worker (exit code %s)", worker.name, worker.process.exitcode)